@@ -1,26 +1,39 @@
 
+import time
+
 from kivymd.app import MDApp
 from kivy.uix.screenmanager import Screen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.label import MDLabel
 from kivymd.uix.toolbar import MDTopAppBar
+from kivymd.uix.button import MDFlatButton, MDRaisedButton
+from kivymd.uix.dialog import MDDialog
 from kivy.metrics import dp
 
+from voicessh import profiler
+
+# Κρυφά διαγνωστικά: τόσα πατήματα στον τίτλο μέσα σε τόσα δευτερόλεπτα
+DIAGNOSTICS_TAPS = 5
+DIAGNOSTICS_TAP_WINDOW = 3.0
+
 class AboutScreen(Screen):
     """Οθόνη 'About' με τεκμηρίωση για PsExec και SSH."""
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.title_taps = []
+        self.dialog = None
         self.build_ui()
 
     def build_ui(self):
         layout = MDBoxLayout(orientation='vertical')
 
         # Toolbar
-        toolbar = MDTopAppBar(title="Πληροφορίες & Απαιτήσεις", elevation=4)
-        toolbar.left_action_items = [["arrow-left", lambda x: self.go_back()]]
-        layout.add_widget(toolbar)
+        self.toolbar = MDTopAppBar(title="Πληροφορίες & Απαιτήσεις", elevation=4)
+        self.toolbar.left_action_items = [["arrow-left", lambda x: self.go_back()]]
+        self.toolbar.ids.label_title.bind(on_touch_down=self.on_title_touch)
+        layout.add_widget(self.toolbar)
 
         # Content in ScrollView
         scroll = MDScrollView()
@@ -136,3 +149,59 @@ class AboutScreen(Screen):
     def go_back(self):
         """Επιστροφή στην κεντρική οθόνη."""
         self.manager.current = 'main'
+
+    # --- Διαγνωστικά (κρυφά) ---
+
+    def on_title_touch(self, label, touch):
+        """Πολλά γρήγορα πατήματα στον τίτλο εμφανίζουν το κουμπί του profiler."""
+        if not label.collide_point(*touch.pos):
+            return False
+        now = time.monotonic()
+        self.title_taps = [t for t in self.title_taps if now - t < DIAGNOSTICS_TAP_WINDOW] + [now]
+        if len(self.title_taps) >= DIAGNOSTICS_TAPS:
+            self.title_taps = []
+            self.show_diagnostics()
+        return False
+
+    def show_diagnostics(self):
+        icon = "stop-circle-outline" if profiler.is_running() else "chart-timeline-variant"
+        self.toolbar.right_action_items = [
+            [icon, lambda x: self.toggle_profiler()],
+            ["memory", lambda x: self.go_to_diagnostics()],
+        ]
+
+    def go_to_diagnostics(self):
+        """Μνήμη, threads και ζωντανά αντικείμενα (βλ. diagnostics_screen.py)."""
+        self.manager.current = 'diagnostics'
+
+    def toggle_profiler(self):
+        """Έναρξη/διακοπή του sampling profiler (όλα τα threads, βλ. voicessh/profiler.py)."""
+        if not profiler.is_running():
+            profiler.start()
+            self.show_diagnostics()
+            return
+        try:
+            path, samples = profiler.stop_and_save()
+        except OSError as e:
+            self.show_diagnostics()
+            self.show_dialog("Σφάλμα profiling", str(e))
+            return
+        self.show_diagnostics()
+        top = '\n'.join(f'{name}: {count}' for name, count in profiler.default_profiler.top(5))
+        self.show_dialog(
+            "Profiling",
+            f"{samples} δείγματα σε {profiler.default_profiler.elapsed:.1f} s\n{path}\n\n{top}",
+            export_path=path,
+        )
+
+    def show_dialog(self, title, text, export_path=None):
+        buttons = [MDRaisedButton(text="OK", on_release=lambda x: self.dialog.dismiss())]
+        if export_path:
+            buttons.insert(0, MDFlatButton(text="ΕΞΑΓΩΓΗ", on_release=lambda x: self.export(export_path)))
+        self.dialog = MDDialog(title=title, text=text, buttons=buttons)
+        self.dialog.open()
+
+    def export(self, path):
+        """Εξαγωγή του αρχείου με τον file manager των ρυθμίσεων (όπως το export της βάσης)."""
+        self.dialog.dismiss()
+        self.manager.get_screen('settings').export_file(path)
@@ -0,0 +1,201 @@
+# benchmarks/bench_associations.py
+"""
+Benchmark των queries συσχέτισης εντολών/servers πριν και μετά το schema v2.
+
+"Πριν": το σχήμα v1 (command_servers με ssh_alias TEXT, χωρίς index στο alias)
+και τα queries όπως τα έκανε ο database.py πριν το migration.
+"Μετά": η ίδια βάση αφού περάσει από το database.init_db() (migration σε v2).
+
+Χρήση:
+    python benchmarks/bench_associations.py [--commands 2000] [--servers 20] [--per-command 3]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voicessh import database  # noqa: E402
+
+SCHEMA_V1 = '''
+    CREATE TABLE commands (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        executable TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE ssh_connections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        alias TEXT UNIQUE NOT NULL,
+        host TEXT NOT NULL,
+        port INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        password TEXT
+    );
+    CREATE TABLE command_servers (
+        command_id INTEGER NOT NULL,
+        ssh_alias TEXT NOT NULL,
+        PRIMARY KEY (command_id, ssh_alias),
+        FOREIGN KEY (command_id) REFERENCES commands(id) ON DELETE CASCADE,
+        FOREIGN KEY (ssh_alias) REFERENCES ssh_connections(alias) ON DELETE CASCADE
+    );
+'''
+
+
+def build_v1(path, n_commands, n_servers, per_command):
+    """Δημιουργεί βάση με το σχήμα v1 και τυχαίες συσχετίσεις."""
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_V1)
+    aliases = [f'server-{i:03d}' for i in range(n_servers)]
+    conn.executemany(
+        'INSERT INTO ssh_connections (alias, host, port, username, password) VALUES (?, ?, 22, ?, ?)',
+        [(alias, f'10.0.0.{i}', 'user', 'pass') for i, alias in enumerate(aliases)]
+    )
+    for i in range(n_commands):
+        cur = conn.execute(
+            'INSERT INTO commands (name, executable) VALUES (?, ?)',
+            (f'εντολή {i}', f'C:\\Tools\\tool{i}.exe')
+        )
+        conn.executemany(
+            'INSERT INTO command_servers (command_id, ssh_alias) VALUES (?, ?)',
+            [(cur.lastrowid, alias) for alias in rnd.sample(aliases, per_command)]
+        )
+    conn.commit()
+    conn.close()
+    return aliases
+
+
+# ---------- Queries v1 (όπως ήταν στο database.py πριν το schema v2) ----------
+
+def _v1_connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def v1_command_servers(path, command_id):
+    conn = _v1_connect(path)
+    rows = conn.execute(
+        'SELECT ssh_alias FROM command_servers WHERE command_id = ? ORDER BY ssh_alias',
+        (command_id,)
+    ).fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def v1_get_all_commands(path):
+    conn = _v1_connect(path)
+    rows = conn.execute('SELECT id, name, executable FROM commands ORDER BY name').fetchall()
+    commands = []
+    for row in rows:
+        cmd = dict(row)
+        cmd['aliases'] = v1_command_servers(path, cmd['id'])
+        commands.append(cmd)
+    conn.close()
+    return commands
+
+
+def v1_get_command_details(path, name):
+    conn = _v1_connect(path)
+    row = conn.execute('SELECT id, name, executable FROM commands WHERE name = ?', (name,)).fetchone()
+    conn.close()
+    cmd = dict(row)
+    cmd['aliases'] = v1_command_servers(path, cmd['id'])
+    return cmd
+
+
+def v1_get_server_commands(path, alias):
+    conn = _v1_connect(path)
+    rows = conn.execute(
+        '''SELECT c.id, c.name, c.executable
+           FROM command_servers cs JOIN commands c ON c.id = cs.command_id
+           WHERE cs.ssh_alias = ? ORDER BY c.name''',
+        (alias,)
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def v1_update_command(path, command_id, name, executable, aliases):
+    conn = _v1_connect(path)
+    conn.execute('UPDATE commands SET name = ?, executable = ? WHERE id = ?', (name, executable, command_id))
+    conn.execute('DELETE FROM command_servers WHERE command_id = ?', (command_id,))
+    for alias in aliases:
+        conn.execute('INSERT INTO command_servers (command_id, ssh_alias) VALUES (?, ?)', (command_id, alias))
+    conn.commit()
+    conn.close()
+
+
+# ---------- Μέτρηση ----------
+
+def measure(fn, repeat):
+    """Returns: διάμεσος χρόνος μιας κλήσης σε ms."""
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', type=int, default=2000)
+    parser.add_argument('--servers', type=int, default=20)
+    parser.add_argument('--per-command', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='voicessh-bench-')
+    try:
+        v1_path = os.path.join(workdir, 'v1.db')
+        v2_path = os.path.join(workdir, 'v2.db')
+        aliases = build_v1(v1_path, args.commands, args.servers, args.per_command)
+        shutil.copy(v1_path, v2_path)
+
+        database.DB_PATH = v2_path
+        start = time.perf_counter()
+        database.init_db()
+        migration_ms = (time.perf_counter() - start) * 1000
+
+        rnd = random.Random(7)
+        names = [f'εντολή {rnd.randrange(args.commands)}' for _ in range(args.repeat + 1)]
+        ids = [rnd.randrange(1, args.commands + 1) for _ in range(args.repeat + 1)]
+        it = {'v1': iter(range(10 ** 9)), 'v2': iter(range(10 ** 9))}
+
+        cases = [
+            ('get_all_commands',
+             lambda: v1_get_all_commands(v1_path),
+             lambda: database.get_all_commands()),
+            ('get_command_details',
+             lambda: v1_get_command_details(v1_path, names[next(it['v1']) % len(names)]),
+             lambda: database.get_command_details(names[next(it['v2']) % len(names)])),
+            ('commands of server (reverse)',
+             lambda: v1_get_server_commands(v1_path, aliases[0]),
+             lambda: database.get_server_commands(aliases[0])),
+            ('update_command (3 servers)',
+             lambda: v1_update_command(v1_path, ids[0], 'εντολή x', 'x.exe', rnd.sample(aliases, 3)),
+             lambda: database.update_command(ids[0], 'εντολή x', 'x.exe', rnd.sample(aliases, 3))),
+        ]
+
+        print(f'{args.commands} commands, {args.servers} servers, {args.per_command} servers/command')
+        print(f'migration v1 -> v2: {migration_ms:.1f} ms\n')
+        print(f'{"query":32} {"v1 (ms)":>10} {"v2 (ms)":>10} {"speedup":>8}')
+        for label, before, after in cases:
+            t1 = measure(before, args.repeat)
+            t2 = measure(after, args.repeat)
+            print(f'{label:32} {t1:10.3f} {t2:10.3f} {t1 / t2 if t2 else 0:7.1f}x')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+# benchmarks/bench_suite.py
+"""
+Micro-benchmarks για τα hot paths: βάση, αναγνώριση εντολής, εκτέλεση SSH.
+
+- db: import_db_data, φόρτωση του config snapshot, get_all_commands,
+  get_command_details, export_db_data σε 100 / 10k / 100k εντολές
+- match: match_command (όνομα, φράση, παραμετρική, αποτυχία) και search_commands
+- ssh: run_remote (connect / auth / exec / read) σε in-process SSH server
+  (voicessh.stub_server), με νέα σύνδεση κάθε φορά ή από το pool
+
+Τα αποτελέσματα (διάμεσος και p95 σε ms) γράφονται σε JSON και συγκρίνονται με
+το αποθηκευμένο baseline· exit code 1 αν κάποια μέτρηση είναι πιο αργή από
+το --threshold.
+
+Χρήση:
+    python benchmarks/bench_suite.py                   # Όλα, σύγκριση με το baseline.json
+    python benchmarks/bench_suite.py --quick           # Χωρίς τα 100k
+    python benchmarks/bench_suite.py --only db,match --sizes 100,10000
+    python benchmarks/bench_suite.py --save-baseline   # Το τρέχον αποτέλεσμα γίνεται baseline
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voicessh import database  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results.json')
+
+SIZES = (100, 10_000, 100_000)
+QUICK_SIZES = (100, 10_000)
+SERVERS = 20
+SERVERS_PER_COMMAND = 3
+PHRASES_PER_COMMAND = 2
+
+# Κάθε μέτρηση επαναλαμβάνεται ως το χρονικό όριο (τουλάχιστον MIN_REPEAT φορές)
+MIN_REPEAT = 5
+MAX_REPEAT = 500
+TIME_BUDGET = 1.0
+
+# Διαφορές κάτω από αυτό (ms) δεν μετράνε ως regression, όποιος κι αν είναι ο λόγος
+NOISE_FLOOR_MS = 0.05
+
+
+# ---------- Μέτρηση ----------
+
+def measure(fn, min_repeat=MIN_REPEAT, max_repeat=MAX_REPEAT, budget=TIME_BUDGET, warmup=True):
+    """Returns: {'median', 'p95', 'min' (ms), 'runs'} για το fn()."""
+    if warmup:
+        fn()
+    times = []
+    deadline = time.perf_counter() + budget
+    while len(times) < max_repeat and (len(times) < min_repeat or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        'median': times[len(times) // 2],
+        'p95': times[min(len(times) - 1, int(len(times) * 0.95))],
+        'min': times[0],
+        'runs': len(times),
+    }
+
+
+class Results:
+    """Οι μετρήσεις με κλειδί "ομάδα/όνομα@μέγεθος"."""
+
+    def __init__(self):
+        self.cases = {}
+
+    def add(self, group, name, stats, size=None):
+        key = f'{group}/{name}' + (f'@{size}' if size is not None else '')
+        self.cases[key] = stats
+        print(f'{key:48} {stats["median"]:10.3f} {stats["p95"]:10.3f} {stats["runs"]:6d}', flush=True)
+
+    def to_dict(self):
+        return {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+            },
+            'cases': self.cases,
+        }
+
+
+# ---------- Δεδομένα ----------
+
+def build_data(n_commands, seed=42):
+    """Δεδομένα σε μορφή export (ό,τι δέχεται το import_db_data)."""
+    rnd = random.Random(seed)
+    aliases = [f'server-{i:03d}' for i in range(SERVERS)]
+    connections = [{'alias': alias, 'host': f'10.0.0.{i + 1}', 'port': 22,
+                    'username': 'user', 'password': 'pass'} for i, alias in enumerate(aliases)]
+    commands = [{
+        'name': f'εντολή {i}',
+        'executable': f'C:\\Tools\\tool{i}.exe',
+        'aliases': rnd.sample(aliases, SERVERS_PER_COMMAND),
+        'phrases': [f'φράση {i} {k}' for k in range(PHRASES_PER_COMMAND)],
+    } for i in range(n_commands)]
+    # Λίγες παραμετρικές εντολές, όπως σε πραγματικό κατάλογο
+    commands += [{
+        'name': f'ένταση {i} {{n:int}}',
+        'executable': f'nircmd setsysvolume{i} {{n}}',
+        'aliases': [aliases[0]],
+    } for i in range(10)]
+    return {'ssh_connections': connections, 'commands': commands}
+
+
+def use_fresh_db(workdir, name):
+    database.DB_PATH = os.path.join(workdir, f'{name}.db')
+    database._snapshot = None
+    database.init_db()
+
+
+# ---------- Ομάδες ----------
+
+def bench_db(results, workdir, sizes):
+    for size in sizes:
+        data = build_data(size)
+        use_fresh_db(workdir, f'db-{size}')
+        # Το import μεγάλων καταλόγων κρατάει δευτερόλεπτα: λιγότερες επαναλήψεις, χωρίς warm-up
+        repeat = {'min_repeat': 1 if size >= 100_000 else 3, 'budget': 0.5, 'warmup': size < 10_000}
+        results.add('db', 'import_db_data(replace)',
+                    measure(lambda: database.import_db_data(data, 'replace'), **repeat), size)
+
+        results.add('db', 'load_snapshot', measure(database._publish_snapshot, **repeat), size)
+        results.add('db', 'get_all_commands', measure(database.get_all_commands), size)
+
+        rnd = random.Random(7)
+        names = [f'εντολή {rnd.randrange(size)}' for _ in range(1000)]
+        it = iter(range(10 ** 9))
+        results.add('db', 'get_command_details',
+                    measure(lambda: database.get_command_details(names[next(it) % len(names)])), size)
+        results.add('db', 'export_db_data', measure(database.export_db_data), size)
+
+
+def bench_match(results, workdir, sizes):
+    for size in sizes:
+        use_fresh_db(workdir, f'match-{size}')
+        database.import_db_data(build_data(size), 'replace')
+        database.get_snapshot()
+        last = size - 1
+        cases = [
+            ('match_command(name)', lambda: database.match_command(f'εντολή {last}')),
+            ('match_command(phrase)', lambda: database.match_command(f'φράση {last} 1')),
+            ('match_command(template)', lambda: database.match_command('ένταση 9 τριάντα πέντε')),
+            ('match_command(miss)', lambda: database.match_command('κάτι που δεν υπάρχει')),
+            ('search_commands', lambda: database.search_commands(f'εντολη {last}')),
+        ]
+        for name, fn in cases:
+            results.add('match', name, measure(fn), size)
+
+
+def bench_ssh(results, workdir, sizes=None, output_sizes=(0, 64 * 1024)):
+    from voicessh.pool import ConnectionPool
+    from voicessh.stub_server import StubSSHServer, psexec_handler
+    from voicessh.transport import run_remote
+
+    use_fresh_db(workdir, 'ssh')
+    for output_size in output_sizes:
+        payload = 'x' * output_size
+
+        def handler(command, payload=payload):
+            if not payload:
+                return psexec_handler(command)
+            return payload, '', 0
+
+        with StubSSHServer(handler=handler) as stub:
+            conn = {'alias': 'bench', 'host': stub.host, 'port': stub.port,
+                    'username': stub.username, 'password': stub.password}
+            phases = {}
+
+            def cold():
+                result = run_remote('bench.exe', 'bench', conn)
+                assert result.ok, result
+                for phase, ms in result.timings.items():
+                    phases.setdefault(phase, []).append(ms)
+
+            label = f'out={output_size // 1024}k'
+            results.add('ssh', f'run_remote(cold, {label})', measure(cold, max_repeat=50))
+            # Ανάλυση ανά φάση (διάμεσος των χρόνων που μέτρησε το ίδιο το run_remote)
+            for phase, values in phases.items():
+                values.sort()
+                median = values[len(values) // 2]
+                results.add('ssh', f'phase.{phase}({label})',
+                            {'median': median, 'p95': values[int(len(values) * 0.95)],
+                             'min': values[0], 'runs': len(values)})
+
+            pool = ConnectionPool()
+            try:
+                results.add('ssh', f'run_remote(pooled, {label})',
+                            measure(lambda: run_remote('bench.exe', 'bench', conn, pool=pool)))
+            finally:
+                pool.close_all()
+
+
+# Το ssh δεν εξαρτάται από το μέγεθος του καταλόγου (sizes)
+GROUPS = {'db': bench_db, 'match': bench_match, 'ssh': bench_ssh}
+
+
+# ---------- Σύγκριση ----------
+
+def compare(current, baseline, threshold):
+    """
+    Τυπώνει τη σύγκριση των διάμεσων με το baseline.
+    Returns: τα κλειδιά που είναι πιο αργά από (1 + threshold) × baseline.
+    """
+    regressions = []
+    print(f'\n{"case":48} {"base":>10} {"now":>10} {"ratio":>7}')
+    for key, stats in current['cases'].items():
+        base = baseline['cases'].get(key)
+        if base is None:
+            continue
+        ratio = stats['median'] / base['median'] if base['median'] else 1.0
+        significant = abs(stats['median'] - base['median']) >= NOISE_FLOOR_MS
+        mark = ''
+        if ratio > 1 + threshold and significant:
+            mark = '  ▲ πιο αργό'
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold) and significant:
+            mark = '  ▼ πιο γρήγορο'
+        print(f'{key:48} {base["median"]:10.3f} {stats["median"]:10.3f} {ratio:6.2f}x{mark}')
+    if baseline.get('environment') != current.get('environment'):
+        print('\n(Το baseline μετρήθηκε σε άλλο περιβάλλον· οι λόγοι είναι ενδεικτικοί)')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default=','.join(GROUPS), help='Ομάδες, χωρισμένες με κόμμα (db,match,ssh)')
+    parser.add_argument('--sizes', help='Μεγέθη καταλόγου, π.χ. 100,10000 (default: 100,10000,100000)')
+    parser.add_argument('--quick', action='store_true', help='Χωρίς το μέγεθος 100k')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Αρχείο JSON αποτελεσμάτων')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Αρχείο baseline για σύγκριση')
+    parser.add_argument('--save-baseline', action='store_true', help='Αποθήκευση των αποτελεσμάτων ως baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Επιτρεπτή επιβράδυνση πριν θεωρηθεί regression (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    groups = [group.strip() for group in args.only.split(',') if group.strip()]
+    unknown = [group for group in groups if group not in GROUPS]
+    if unknown:
+        parser.error(f'Άγνωστες ομάδες: {", ".join(unknown)}')
+    if args.sizes:
+        sizes = tuple(int(size) for size in args.sizes.split(','))
+    else:
+        sizes = QUICK_SIZES if args.quick else SIZES
+
+    results = Results()
+    workdir = tempfile.mkdtemp(prefix='voicessh-bench-')
+    print(f'{"case":48} {"median ms":>10} {"p95 ms":>10} {"runs":>6}')
+    try:
+        for group in groups:
+            GROUPS[group](results, workdir, sizes)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    current = results.to_dict()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2, ensure_ascii=False)
+    print(f'\nΑποτελέσματα: {args.output}')
+
+    if args.save_baseline:
+        shutil.copy(args.output, args.baseline)
+        print(f'Baseline: {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('Δεν υπάρχει baseline (δημιουργείται με --save-baseline)')
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} μετρήσεις πιο αργές από το baseline κατά πάνω από {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+# benchmarks/fleet.py
+"""
+Προσομοίωση στόλου SSH hosts για load test του parallel fan-out.
+
+Ξεκινά N stub SSH servers (voicessh.stub_server) σε θύρες του loopback, σε
+ξεχωριστή διεργασία, ώστε τα threads και η μνήμη που μετράμε να είναι μόνο
+της πλευράς που εκτελεί. Γεμίζει τα ssh_connections / command_servers μιας
+προσωρινής βάσης με αυτούς τους hosts και τρέχει μια εντολή σε όλους μέσα από
+το dispatch.iter_results, όπως η εφαρμογή και το daemon.
+
+Ανά host ρυθμίζονται: καθυστέρηση handshake, καθυστέρηση εκτέλεσης, μέγεθος
+εξόδου, ποσοστό αποτυχιών (exit 1) και ποσοστό timeouts (ο host δέχεται τη
+σύνδεση αλλά δεν απαντά· ο client περιμένει το timeout του transport, 10 s).
+
+Για κάθε μέγεθος στόλου: συνολικός χρόνος, throughput (hosts/s), latency ανά
+host (p50/p95/p99/max, από την αρχή του fan-out ως το αποτέλεσμα), μέγιστα
+threads και RSS της διεργασίας.
+
+Χρήση:
+    python benchmarks/fleet.py                                  # 10, 100, 500 hosts
+    python benchmarks/fleet.py --hosts 100 --rounds 3 --pooled  # Όπως το daemon (κοινό pool)
+    python benchmarks/fleet.py --hosts 500 --max-parallel 64     # Περισσότερα ταυτόχρονα threads
+    python benchmarks/fleet.py --handshake-ms 80 --exec-ms 200 --failure-rate 0.05 --timeout-rate 0.01
+    python benchmarks/fleet.py --json fleet.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voicessh import database  # noqa: E402
+from voicessh import dispatch  # noqa: E402
+
+DEFAULT_HOSTS = (10, 100, 500)
+EXECUTABLE = 'fleet.exe'
+COMMAND_NAME = 'fleet'
+
+# Κάθε πόσο (s) καταγράφονται threads και RSS κατά τη διάρκεια ενός γύρου
+SAMPLE_INTERVAL = 0.01
+
+
+def _raise_fd_limit():
+    """500 hosts = χιλιάδες sockets (listen + client + server)· το default soft limit δεν φτάνει."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _rss_bytes():
+    """Τρέχον RSS της διεργασίας (Linux: /proc), αλλιώς το μέγιστο από το getrusage."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# ---------- Ο στόλος (στη δική του διεργασία) ----------
+
+def host_specs(n_hosts, args):
+    """Οι ρυθμίσεις κάθε host, με ±50% διασπορά γύρω από τις μέσες τιμές."""
+    rnd = random.Random(args.seed)
+    return [{
+        'handshake_delay': args.handshake_ms / 1000 * rnd.uniform(0.5, 1.5),
+        'exec_delay': args.exec_ms / 1000 * rnd.uniform(0.5, 1.5),
+        'output_bytes': args.output_bytes,
+        'failure_rate': args.failure_rate,
+        'drop_rate': args.timeout_rate,
+        'seed': rnd.randrange(2 ** 32),
+    } for _ in range(n_hosts)]
+
+
+def _make_handler(spec):
+    from voicessh.stub_server import psexec_handler
+
+    rnd = random.Random(spec['seed'])
+    payload = 'x' * spec['output_bytes']
+    lock = threading.Lock()
+
+    def handler(command):
+        time.sleep(spec['exec_delay'])
+        with lock:
+            failed = rnd.random() < spec['failure_rate']
+        if failed:
+            return '', 'PsExec could not start fleet.exe: Access is denied.\r\n', 1
+        if payload:
+            return payload, '', 0
+        return psexec_handler(command)
+
+    return handler
+
+
+def _fleet_main(pipe, specs):
+    """Διεργασία του στόλου: ξεκινά τους servers, στέλνει τις θύρες και περιμένει το stop."""
+    from voicessh.stub_server import StubSSHServer
+
+    _raise_fd_limit()
+    stubs = [StubSSHServer(handler=_make_handler(spec), handshake_delay=spec['handshake_delay'],
+                           drop_rate=spec['drop_rate'], seed=spec['seed']).start()
+             for spec in specs]
+    pipe.send([stub.port for stub in stubs])
+    pipe.recv()
+    pipe.send({'connections': sum(stub.connections for stub in stubs),
+               'commands': sum(len(stub.commands) for stub in stubs)})
+    for stub in stubs:
+        stub.stop()
+
+
+class Fleet:
+    """N stub SSH servers σε άλλη διεργασία."""
+
+    def __init__(self, specs):
+        self.specs = specs
+        self.ports = []
+        self.stats = {}
+        self._pipe = None
+        self._process = None
+
+    def __enter__(self):
+        # spawn: καθαρή διεργασία, χωρίς τα threads/μνήμη του driver
+        context = multiprocessing.get_context('spawn')
+        self._pipe, child = context.Pipe()
+        self._process = context.Process(target=_fleet_main, args=(child, self.specs), daemon=True)
+        self._process.start()
+        self.ports = self._pipe.recv()
+        return self
+
+    def __exit__(self, *exc):
+        self._pipe.send('stop')
+        self.stats = self._pipe.recv()
+        self._process.join(timeout=30)
+
+
+# ---------- Ο driver ----------
+
+def populate(workdir, ports):
+    """Προσωρινή βάση με έναν server ανά host και μία εντολή σε όλους. Returns: τα aliases."""
+    database.DB_PATH = os.path.join(workdir, f'fleet-{len(ports)}.db')
+    database._snapshot = None
+    database.init_db()
+    aliases = [f'fleet-{i:04d}' for i in range(len(ports))]
+    database.import_db_data({
+        'ssh_connections': [{'alias': alias, 'host': '127.0.0.1', 'port': port,
+                             'username': 'user', 'password': 'pass'}
+                            for alias, port in zip(aliases, ports)],
+        'commands': [{'name': COMMAND_NAME, 'executable': EXECUTABLE, 'aliases': aliases}],
+    }, 'replace')
+    return database.get_command_details(COMMAND_NAME)['aliases']
+
+
+class Sampler:
+    """Thread που καταγράφει τα μέγιστα threads και RSS όσο τρέχει ένας γύρος."""
+
+    def __init__(self):
+        self.peak_threads = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Χωρίς το ίδιο το thread του sampler
+            self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+            self._stop.wait(SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_round(aliases, run, max_parallel=None):
+    """Ένα fan-out σε όλους τους hosts. Returns: dict με τις μετρήσεις."""
+    latencies = []
+    errors = {}
+    with Sampler() as sampler:
+        start = time.perf_counter()
+        for _, result in dispatch.iter_results(EXECUTABLE, aliases, run=run, command_name=COMMAND_NAME,
+                                               max_parallel=max_parallel):
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not result.ok:
+                errors[result.error] = errors.get(result.error, 0) + 1
+        wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'hosts': len(aliases),
+        'wall_s': wall,
+        'throughput': len(aliases) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1],
+        'ok': len(aliases) - sum(errors.values()),
+        'errors': errors,
+        'peak_threads': sampler.peak_threads,
+        'peak_rss_mb': sampler.peak_rss / (1024 * 1024),
+    }
+
+
+def run_fleet(n_hosts, args, workdir):
+    from voicessh.pool import ConnectionPool
+    from voicessh.transport import run_remote
+
+    rounds = []
+    with Fleet(host_specs(n_hosts, args)) as fleet:
+        aliases = populate(workdir, fleet.ports)
+        pool = ConnectionPool() if args.pooled else None
+        try:
+            def run(executable, alias, conn_details):
+                return run_remote(executable, alias, conn_details, pool=pool)
+
+            for index in range(args.rounds):
+                stats = run_round(aliases, run, args.max_parallel)
+                stats['round'] = index + 1
+                rounds.append(stats)
+                print_row(stats)
+        finally:
+            if pool is not None:
+                pool.close_all()
+    rounds[-1]['fleet'] = fleet.stats
+    return rounds
+
+
+HEADER = (f'{"hosts":>6} {"round":>5} {"wall s":>8} {"hosts/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+          f'{"p99 ms":>8} {"max ms":>8} {"ok":>5} {"errors":>14} {"threads":>7} {"RSS MB":>7}')
+
+
+def print_row(stats):
+    errors = ','.join(f'{name}:{count}' for name, count in sorted(stats['errors'].items())) or '-'
+    print(f'{stats["hosts"]:6d} {stats["round"]:5d} {stats["wall_s"]:8.2f} {stats["throughput"]:8.1f} '
+          f'{stats["p50_ms"]:8.0f} {stats["p95_ms"]:8.0f} {stats["p99_ms"]:8.0f} {stats["max_ms"]:8.0f} '
+          f'{stats["ok"]:5d} {errors:>14} {stats["peak_threads"]:7d} {stats["peak_rss_mb"]:7.1f}', flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hosts', default=','.join(map(str, DEFAULT_HOSTS)),
+                        help='Μεγέθη στόλου, χωρισμένα με κόμμα')
+    parser.add_argument('--rounds', type=int, default=2, help='Γύροι fan-out ανά μέγεθος')
+    parser.add_argument('--pooled', action='store_true',
+                        help='Κοινό ConnectionPool σε όλους τους γύρους (όπως το daemon)')
+    parser.add_argument('--handshake-ms', type=float, default=20, help='Μέση καθυστέρηση πριν το handshake')
+    parser.add_argument('--exec-ms', type=float, default=50, help='Μέση διάρκεια εκτέλεσης της εντολής')
+    parser.add_argument('--output-bytes', type=int, default=0, help='Μέγεθος stdout (0 = όπως το psexec -d)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Πιθανότητα exit 1 ανά εκτέλεση')
+    parser.add_argument('--timeout-rate', type=float, default=0.0,
+                        help='Πιθανότητα μια σύνδεση να μην απαντήσει ποτέ (timeout)')
+    parser.add_argument('--max-parallel', type=int, default=None,
+                        help='Ταυτόχρονες εκτελέσεις του fan-out (default: dispatch.DEFAULT_MAX_PARALLEL)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Αρχείο για τα αποτελέσματα σε JSON')
+    args = parser.parse_args(argv)
+
+    _raise_fd_limit()
+    # Τα σφάλματα μετριούνται στον πίνακα· χωρίς τα tracebacks του paramiko στο stderr
+    logging.getLogger('paramiko').addHandler(logging.NullHandler())
+    sizes = [int(size) for size in args.hosts.split(',')]
+    workdir = tempfile.mkdtemp(prefix='voicessh-fleet-')
+    report = {'config': vars(args), 'runs': []}
+    print(HEADER)
+    try:
+        for n_hosts in sizes:
+            report['runs'].extend(run_fleet(n_hosts, args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f'\nΑποτελέσματα: {args.json}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# benchmarks/replay.py
+"""
+Replay καταγεγραμμένων αποτελεσμάτων του recognizer μέσα από την αναζήτηση
+εντολών, χωρίς Kivy/Android.
+
+Κάθε γραμμή του corpus (JSONL) είναι μια N-best λίστα όπως την παραδίδει το
+RecognitionListener.onResults, και η εντολή που εννοούσε ο χρήστης:
+    {"texts": ["σημείωση", "σημειώσεις"], "confidences": [0.52, 0.47], "expected": "σημειώσεις"}
+"expected": όνομα εντολής ή σκηνής, ή null αν η φράση δεν είναι εντολή (πρέπει
+να απορριφθεί). Γραμμές χωρίς "expected" μετρούν μόνο στη latency.
+Διαβάζονται και γραμμές από το logcat της εφαρμογής (ό,τι ακολουθεί το
+"Recognition: ", βλ. recognition.log_line)· αρκεί να προστεθεί το "expected".
+
+Οι εντολές φορτώνονται σε προσωρινή βάση από ένα αρχείο export (--config)
+ή από αντίγραφο μιας υπάρχουσας βάσης (--db), ώστε το dataset να μένει σταθερό.
+
+Για κάθε τιμή του --alternatives (πόσες υποθέσεις δοκιμάζονται):
+    top-1 accuracy:  σωστή εντολή / φράσεις που είναι εντολές
+    false accepts:   εκτελέστηκε λάθος εντολή (ή εντολή σε φράση που δεν ήταν) / όλες
+    false rejects:   καμία εντολή σε φράση που ήταν εντολή / φράσεις που είναι εντολές
+    latency:         χρόνος της recognition.resolve ανά φράση (p50/p95/p99/max)
+
+Χρήση:
+    python benchmarks/replay.py                                   # Το δείγμα του benchmarks/corpus
+    python benchmarks/replay.py --alternatives 1,3,5 --errors
+    python benchmarks/replay.py --corpus logcat.txt --db commands.db --json replay.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voicessh import database  # noqa: E402
+from voicessh import recognition  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+DEFAULT_CORPUS = os.path.join(CORPUS_DIR, 'sample.jsonl')
+DEFAULT_CONFIG = os.path.join(CORPUS_DIR, 'sample_config.json')
+
+# Επαναλήψεις ανά φράση για τη latency (κρατιέται η διάμεση)
+DEFAULT_REPEAT = 20
+
+
+def load_corpus(path):
+    """Returns: [{'texts', 'confidences', 'expected' (αν υπάρχει), 'line'}, ...]"""
+    utterances = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if recognition.LOG_PREFIX in line:
+                line = line.split(recognition.LOG_PREFIX, 1)[1]
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f'{path}:{number}: όχι JSON, παραλείπεται', file=sys.stderr)
+                continue
+            if not entry.get('texts'):
+                print(f'{path}:{number}: χωρίς "texts", παραλείπεται', file=sys.stderr)
+                continue
+            entry.setdefault('confidences', None)
+            entry['line'] = number
+            utterances.append(entry)
+    return utterances
+
+
+def use_database(workdir, config=None, db=None):
+    """Προσωρινή βάση: αντίγραφο του --db ή νέα βάση με το --config (export)."""
+    database.DB_PATH = os.path.join(workdir, 'replay.db')
+    database._snapshot = None
+    if db:
+        shutil.copyfile(db, database.DB_PATH)
+        database.init_db()
+        return
+    database.init_db()
+    with open(config, encoding='utf-8') as f:
+        database.import_db_data(json.load(f), 'replace')
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def replay(utterances, alternatives, repeat=DEFAULT_REPEAT):
+    """Returns: (μετρήσεις, λάθη) για ένα πλήθος υποθέσεων."""
+    counts = {'labeled': 0, 'positives': 0, 'correct': 0, 'false_accepts': 0, 'false_rejects': 0,
+              'rescued': 0}
+    latencies = []
+    errors = []
+    for entry in utterances:
+        texts, confidences = entry['texts'], entry['confidences']
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            match = recognition.resolve(texts, confidences, alternatives)
+            samples.append(time.perf_counter() - start)
+        latencies.append(statistics.median(samples) * 1e6)
+
+        if 'expected' not in entry:
+            continue
+        expected = entry['expected']
+        got = match['name'] if match else None
+        counts['labeled'] += 1
+        if expected is not None:
+            counts['positives'] += 1
+        if got == expected:
+            if got is not None:
+                counts['correct'] += 1
+                if match['rank'] > 0:
+                    counts['rescued'] += 1  # Σωστή χάρη σε υπόθεση πέρα από την πρώτη
+            continue
+        if got is None:
+            counts['false_rejects'] += 1
+        else:
+            counts['false_accepts'] += 1
+        errors.append({'line': entry['line'], 'texts': texts, 'expected': expected, 'got': got,
+                       'rank': match['rank'] if match else None})
+
+    latencies.sort()
+    positives, labeled = counts['positives'], counts['labeled']
+    stats = dict(
+        counts,
+        alternatives=alternatives,
+        utterances=len(utterances),
+        accuracy=counts['correct'] / positives if positives else None,
+        false_accept_rate=counts['false_accepts'] / labeled if labeled else None,
+        false_reject_rate=counts['false_rejects'] / positives if positives else None,
+        mean_us=statistics.fmean(latencies) if latencies else 0.0,
+        p50_us=percentile(latencies, 0.50) if latencies else 0.0,
+        p95_us=percentile(latencies, 0.95) if latencies else 0.0,
+        p99_us=percentile(latencies, 0.99) if latencies else 0.0,
+        max_us=latencies[-1] if latencies else 0.0,
+    )
+    return stats, errors
+
+
+HEADER = (f'{"alt":>3} {"φράσεις":>7} {"top-1":>7} {"FA":>7} {"FR":>7} {"rescued":>7} '
+          f'{"p50 µs":>8} {"p95 µs":>8} {"p99 µs":>8} {"max µs":>8}')
+
+
+def _percent(value):
+    return f'{value * 100:6.1f}%' if value is not None else '      -'
+
+
+def print_row(stats):
+    print(f'{stats["alternatives"]:3d} {stats["utterances"]:7d} {_percent(stats["accuracy"])} '
+          f'{_percent(stats["false_accept_rate"])} {_percent(stats["false_reject_rate"])} '
+          f'{stats["rescued"]:7d} {stats["p50_us"]:8.1f} {stats["p95_us"]:8.1f} '
+          f'{stats["p99_us"]:8.1f} {stats["max_us"]:8.1f}')
+
+
+def print_errors(errors):
+    for error in errors:
+        kind = 'FA' if error['got'] is not None else 'FR'
+        got = f'"{error["got"]}" (υπόθεση {error["rank"] + 1})' if error['got'] is not None else '-'
+        expected = f'"{error["expected"]}"' if error['expected'] is not None else '-'
+        print(f'    {kind} γραμμή {error["line"]}: {error["texts"]} → {got}, αναμενόταν {expected}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Αρχείο JSONL (ή logcat) με N-best λίστες')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--config', default=DEFAULT_CONFIG, help='Export (JSON) με τις εντολές και τις σκηνές')
+    source.add_argument('--db', help='Υπάρχουσα βάση (χρησιμοποιείται αντίγραφό της)')
+    parser.add_argument('--alternatives', default=str(recognition.MAX_ALTERNATIVES),
+                        help='Πλήθος υποθέσεων που δοκιμάζονται, χωρισμένα με κόμμα (π.χ. 1,3,5)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Επαναλήψεις ανά φράση για τη latency')
+    parser.add_argument('--errors', action='store_true', help='Εμφάνιση των λαθών (FA/FR) ανά φράση')
+    parser.add_argument('--json', help='Αρχείο για τα αποτελέσματα σε JSON')
+    args = parser.parse_args(argv)
+
+    utterances = load_corpus(args.corpus)
+    if not utterances:
+        print(f'Κενό corpus: {args.corpus}', file=sys.stderr)
+        return 2
+
+    workdir = tempfile.mkdtemp(prefix='voicessh-replay-')
+    report = {'corpus': args.corpus, 'runs': []}
+    try:
+        use_database(workdir, config=args.config, db=args.db)
+        # Το πρώτο lookup φορτώνει το snapshot και κάνει compile τα templates
+        recognition.resolve(utterances[0]['texts'])
+        print(HEADER)
+        for alternatives in (int(value) for value in args.alternatives.split(',')):
+            stats, errors = replay(utterances, alternatives, args.repeat)
+            print_row(stats)
+            if args.errors:
+                print_errors(errors)
+            report['runs'].append(dict(stats, errors=errors))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f'\nΑποτελέσματα: {args.json}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
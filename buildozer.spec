@@ -22,7 +22,7 @@ source.include_exts = py,png,jpg,kv,atlas
 #source.exclude_exts = spec
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = tests, bin, venv, .buildozer, .git, .idea, .vscode
+source.exclude_dirs = tests, benchmarks, bin, venv, .buildozer, .git, .idea, .vscode
 
 # (list) List of exclusions using pattern matching
 # Do not prefix with './'
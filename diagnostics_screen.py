@@ -0,0 +1,113 @@
+# diagnostics_screen.py
+"""
+DiagnosticsScreen: μνήμη, threads και ζωντανά αντικείμενα της εφαρμογής
+(βλ. voicessh/memdiag.py) και callbacks του UI thread που ξεπερνούν
+τον χρόνο ενός frame (βλ. frame_monitor.py). Ανοίγει από τα κρυφά διαγνωστικά της οθόνης
+Πληροφορίες.
+"""
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.uix.screenmanager import Screen
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDRaisedButton
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.label import MDLabel
+from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.toolbar import MDTopAppBar
+
+import frame_monitor
+from voicessh import memdiag
+
+# Ανανέωση της οθόνης όσο είναι ανοιχτή (s)
+REFRESH_INTERVAL = 5
+
+
+class DiagnosticsScreen(Screen):
+    """Οθόνη διαγνωστικών μνήμης."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.refresh_event = None
+        self.dialog = None
+        self.build_ui()
+
+    def build_ui(self):
+        layout = MDBoxLayout(orientation='vertical')
+
+        self.toolbar = MDTopAppBar(title="Διαγνωστικά", elevation=4)
+        self.toolbar.left_action_items = [["arrow-left", lambda x: self.go_back()]]
+        layout.add_widget(self.toolbar)
+
+        scroll = MDScrollView()
+        self.report_lbl = MDLabel(
+            text="",
+            font_name="RobotoMono-Regular",
+            theme_text_color="Primary",
+            size_hint_y=None,
+            padding=[dp(12), dp(12)],
+        )
+        self.report_lbl.bind(
+            width=lambda *x: self.report_lbl.setter('text_size')(self.report_lbl, (self.report_lbl.width, None)),
+            texture_size=lambda *x: self.report_lbl.setter('height')(self.report_lbl, self.report_lbl.texture_size[1])
+        )
+        scroll.add_widget(self.report_lbl)
+        layout.add_widget(scroll)
+
+        self.add_widget(layout)
+        self.update_actions()
+
+    def update_actions(self):
+        running = memdiag.default_monitor.running
+        self.toolbar.right_action_items = [
+            ["stop-circle-outline" if running else "play-circle-outline", lambda x: self.toggle_monitor()],
+            ["camera-outline", lambda x: self.take_snapshot()],
+            ["export", lambda x: self.export()],
+        ]
+
+    def on_enter(self):
+        self.refresh()
+        self.refresh_event = Clock.schedule_interval(lambda dt: self.refresh(), REFRESH_INTERVAL)
+
+    def on_leave(self):
+        if self.refresh_event is not None:
+            self.refresh_event.cancel()
+            self.refresh_event = None
+
+    def go_back(self):
+        self.manager.current = 'about'
+
+    def refresh(self):
+        monitor = memdiag.default_monitor
+        header = ("Παρακολούθηση (tracemalloc): ενεργή" if monitor.running
+                  else "Παρακολούθηση (tracemalloc): ανενεργή, ▶ για έναρξη")
+        frames = frame_monitor.format_report(frame_monitor.default_monitor.report())
+        self.report_lbl.text = f'{header}\n\n{memdiag.format_report(monitor.report())}\n\n{frames}'
+
+    def toggle_monitor(self):
+        monitor = memdiag.default_monitor
+        if monitor.running:
+            monitor.stop()
+        else:
+            monitor.start()
+        self.update_actions()
+        self.refresh()
+
+    def take_snapshot(self):
+        """Snapshot τώρα, εκτός του περιοδικού (π.χ. πριν και μετά από μια ενέργεια)."""
+        memdiag.default_monitor.snapshot()
+        self.refresh()
+
+    def export(self):
+        """Η αναφορά σε JSON, με τον file manager των ρυθμίσεων (όπως το export της βάσης)."""
+        try:
+            path = memdiag.default_monitor.save()
+        except OSError as e:
+            self.dialog = MDDialog(
+                title="Σφάλμα Export",
+                text=str(e),
+                buttons=[MDRaisedButton(text="OK", on_release=lambda x: self.dialog.dismiss())],
+            )
+            self.dialog.open()
+            return
+        self.manager.get_screen('settings').export_file(path)
@@ -0,0 +1,263 @@
+# frame_monitor.py
+"""
+FrameMonitor: ποια callbacks του Kivy main loop ξεπερνούν τον χρόνο ενός frame.
+
+Ό,τι τρέχει στο UI thread (callbacks του Clock, handlers των events των
+widgets) καθυστερεί το επόμενο frame. Όταν είναι εγκατεστημένο:
+- τα Clock.schedule_once / schedule_interval / create_trigger τυλίγουν το
+  callback με μέτρηση χρόνου,
+- το Widget.dispatch μετράει τους handlers των events (on_release, on_enter, ...),
+- το measure(όνομα) μετράει απευθείας κλήσεις (π.χ. το init_db στο build).
+Κάθε μέτρηση κρατάει και τον "δικό της" χρόνο, χωρίς όσες μετρήσεις έγιναν
+μέσα της, ώστε το φταίξιμο να πέφτει στο εσωτερικό callback (π.χ. στο
+on_enter μιας οθόνης και όχι στο animation της μετάβασης που το προκάλεσε).
+Όσες ξεπερνούν τα BUDGET_MS μπαίνουν σε ring buffer (το πολύ MAX_OFFENDERS).
+
+Σε debug builds (ή με VOICESSH_DEBUG=1) εμφανίζεται και ένα μικρό overlay
+πάνω στο παράθυρο με το χειρότερο frame και τον τελευταίο παραβάτη.
+"""
+
+import collections
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp, sp
+from kivy.uix.label import Label
+from kivy.uix.widget import Widget
+from kivy.utils import platform
+
+# Ο χρόνος ενός frame στα 60 Hz
+BUDGET_MS = 16.0
+
+# Πόσοι παραβάτες κρατιούνται (οι παλαιότεροι φεύγουν)
+MAX_OFFENDERS = 200
+
+# Events που απλώς προωθούνται στα παιδιά: μετράνε τα events που προκαλούν (on_release κ.λπ.)
+PROPAGATION_EVENTS = frozenset(('on_touch_down', 'on_touch_move', 'on_touch_up', 'on_motion',
+                                'on_mouse_pos'))
+
+# Ανανέωση του overlay (s)
+OVERLAY_INTERVAL = 0.5
+
+
+def is_debug_build():
+    """Debug APK (FLAG_DEBUGGABLE) στο Android· αλλού με τη μεταβλητή VOICESSH_DEBUG."""
+    if os.environ.get('VOICESSH_DEBUG'):
+        return True
+    if platform != 'android':
+        return False
+    try:
+        from jnius import autoclass
+        ApplicationInfo = autoclass('android.content.pm.ApplicationInfo')
+        activity = autoclass('org.kivy.android.PythonActivity').mActivity
+        return bool(activity.getApplicationInfo().flags & ApplicationInfo.FLAG_DEBUGGABLE)
+    except Exception:
+        return False
+
+
+def callback_name(callback):
+    """Qualified όνομα ενός callback, με αρχείο:γραμμή για τα lambdas/closures."""
+    func = getattr(callback, '__func__', callback)
+    func = getattr(func, 'func', func)  # functools.partial
+    name = getattr(func, '__qualname__', None) or repr(func)
+    code = getattr(func, '__code__', None)
+    if code is not None and '<' in name:
+        name += f' ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+    return name
+
+
+class FrameMonitor:
+    """Μετρήσεις χρόνου των callbacks του UI thread (βλ. docstring του module)."""
+
+    def __init__(self, budget_ms=BUDGET_MS, max_offenders=MAX_OFFENDERS):
+        self.budget_ms = budget_ms
+        self.offenders = collections.deque(maxlen=max_offenders)
+        self.installed = False
+        self.frames = 0
+        self.slow_frames = 0
+        self.worst_frame_ms = 0.0
+        self._children = []   # Στοίβα: χρόνος μετρήσεων μέσα στην τρέχουσα μέτρηση
+        self._originals = {}
+        self._last_frame = None
+        self._frame_event = None
+        self._overlay = None
+        self._overlay_event = None
+
+    # --- Εγκατάσταση ---
+
+    def install(self, overlay=False):
+        if self.installed:
+            return self
+        self.installed = True
+        for name in ('schedule_once', 'schedule_interval', 'create_trigger'):
+            original = getattr(Clock, name)
+            self._originals[name] = original
+            setattr(Clock, name, self._wrap_scheduler(original))
+        Widget.dispatch = self._wrap_dispatch(Widget.dispatch)
+
+        schedule_interval = self._originals['schedule_interval']
+        self._frame_event = schedule_interval(self._on_frame, 0)
+        if overlay:
+            self._overlay = FrameOverlay()
+            Window.add_widget(self._overlay)
+            self._overlay_event = schedule_interval(lambda dt: self._overlay.update(self), OVERLAY_INTERVAL)
+        return self
+
+    def uninstall(self):
+        if not self.installed:
+            return
+        for name in ('schedule_once', 'schedule_interval', 'create_trigger'):
+            delattr(Clock, name)
+        del Widget.dispatch  # Ξανά το EventDispatcher.dispatch
+        self._originals.clear()
+        for event in (self._frame_event, self._overlay_event):
+            if event is not None:
+                event.cancel()
+        if self._overlay is not None:
+            Window.remove_widget(self._overlay)
+        self._frame_event = self._overlay_event = self._overlay = None
+        self._last_frame = None
+        self.installed = False
+
+    def _wrap_scheduler(self, schedule):
+        def scheduler(callback, *args, **kwargs):
+            return schedule(self._wrap_callback(callback), *args, **kwargs)
+        return scheduler
+
+    def _wrap_callback(self, callback):
+        name = callback_name(callback)
+
+        def timed(*args, **kwargs):
+            with self.measure(name, 'clock'):
+                return callback(*args, **kwargs)
+        return timed
+
+    def _wrap_dispatch(self, dispatch):
+        monitor = self
+
+        def timed_dispatch(widget, event_type, *args, **kwargs):
+            if event_type in PROPAGATION_EVENTS or threading.current_thread() is not threading.main_thread():
+                return dispatch(widget, event_type, *args, **kwargs)
+            start = time.perf_counter()
+            monitor._children.append(0.0)
+            try:
+                return dispatch(widget, event_type, *args, **kwargs)
+            finally:
+                monitor._finish(start, lambda: monitor._event_name(widget, event_type), 'event')
+        return timed_dispatch
+
+    # --- Μέτρηση ---
+
+    @contextmanager
+    def measure(self, name, kind='call'):
+        """Μετράει ένα κομμάτι κώδικα στο UI thread (π.χ. with monitor.measure('init_db'): ...)."""
+        if not self.installed or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        start = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            yield
+        finally:
+            self._finish(start, lambda: name, kind)
+
+    def _finish(self, start, name, kind):
+        elapsed = (time.perf_counter() - start) * 1000
+        nested = self._children.pop()
+        if self._children:
+            self._children[-1] += elapsed
+        own = elapsed - nested
+        if own >= self.budget_ms:
+            self.offenders.append({'time': time.time(), 'name': name(), 'kind': kind,
+                                   'ms': round(elapsed, 1), 'own_ms': round(own, 1)})
+
+    @staticmethod
+    def _event_name(widget, event_type):
+        """π.χ. 'MDRaisedButton.on_release → MainScreen.build_ui.<locals>.<lambda> (main.py:86)'"""
+        name = f'{type(widget).__name__}.{event_type}'
+        try:
+            handlers = widget.get_property_observers(event_type)
+        except Exception:
+            handlers = ()
+        if handlers:
+            name += ' → ' + ', '.join(callback_name(handler) for handler in handlers)
+        return name
+
+    def _on_frame(self, dt):
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            frame_ms = (now - self._last_frame) * 1000
+            self.frames += 1
+            if frame_ms > self.budget_ms * 2:  # Ένα frame χάθηκε
+                self.slow_frames += 1
+            self.worst_frame_ms = max(self.worst_frame_ms, frame_ms)
+        self._last_frame = now
+
+    # --- Αναφορά ---
+
+    def report(self, top=10):
+        """Returns: {'frames', 'slow_frames', 'worst_frame_ms', 'offenders' (νεότεροι πρώτοι), 'worst'}"""
+        offenders = list(self.offenders)
+        worst = {}
+        for offender in offenders:
+            current = worst.get(offender['name'])
+            if current is None or offender['own_ms'] > current['own_ms']:
+                worst[offender['name']] = dict(offender, count=0)
+            worst[offender['name']]['count'] += 1
+        return {
+            'installed': self.installed,
+            'budget_ms': self.budget_ms,
+            'frames': self.frames,
+            'slow_frames': self.slow_frames,
+            'worst_frame_ms': round(self.worst_frame_ms, 1),
+            'offenders': offenders[::-1],
+            'worst': sorted(worst.values(), key=lambda o: o['own_ms'], reverse=True)[:top],
+        }
+
+
+def format_report(report):
+    """Σύντομη περιγραφή για την οθόνη διαγνωστικών."""
+    if not report['installed']:
+        return 'Frame monitor: ανενεργό (debug build ή VOICESSH_FRAME_MONITOR=1)'
+    lines = [f'Frames: {report["frames"]}, αργά: {report["slow_frames"]}, '
+             f'χειρότερο: {report["worst_frame_ms"]:.0f} ms (budget {report["budget_ms"]:.0f} ms)']
+    if report['worst']:
+        lines.append('Callbacks πάνω από το budget (χειρότερο, φορές):')
+        for offender in report['worst']:
+            lines.append(f'  {offender["own_ms"]:.0f} ms ×{offender["count"]} {offender["name"]}')
+    return '\n'.join(lines)
+
+
+class FrameOverlay(Label):
+    """Μικρή ένδειξη πάνω αριστερά: χειρότερο frame και τελευταίος παραβάτης."""
+
+    def __init__(self, **kwargs):
+        super().__init__(font_size=sp(10), size_hint=(None, None), halign='left', valign='top',
+                         color=(1, 1, 0.4, 1), **kwargs)
+        self.bind(texture_size=self._resize)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self._background = Rectangle()
+        Window.bind(size=lambda *args: self._resize())
+
+    def _resize(self, *args):
+        self.size = (self.texture_size[0] + dp(8), self.texture_size[1] + dp(4))
+        self.pos = (dp(4), Window.height - self.height - dp(4))
+        self._background.pos = self.pos
+        self._background.size = self.size
+
+    def update(self, monitor):
+        text = f'frame max {monitor.worst_frame_ms:.0f} ms · αργά {monitor.slow_frames}/{monitor.frames}'
+        if monitor.offenders:
+            last = monitor.offenders[-1]
+            text += f'\n{last["own_ms"]:.0f} ms {last["name"][:60]}'
+        self.text = text
+
+
+# Ο monitor της εφαρμογής
+default_monitor = FrameMonitor()
@@ -0,0 +1,164 @@
+# history_screen.py
+"""
+HistoryScreen: το ιστορικό εκτελέσεων (βλ. voicessh/history.py), νεότερες πρώτα.
+Οι γραμμές φορτώνονται ανά σελίδα (keyset pagination) όσο ο χρήστης κυλάει
+προς τα κάτω· η έξοδος μιας εκτέλεσης διαβάζεται μόνο όταν την ανοίξει.
+"""
+
+import threading
+import time
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.uix.screenmanager import Screen
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDRaisedButton
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.list import MDList, TwoLineAvatarIconListItem, IconLeftWidget
+from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.textfield import MDTextField
+from kivymd.uix.toolbar import MDTopAppBar
+
+from voicessh import history
+
+# Πόσο κοντά στο τέλος της λίστας (0 = τέρμα κάτω) φορτώνεται η επόμενη σελίδα
+LOAD_MORE_AT = 0.1
+
+_STATUS_ICONS = {
+    'ok': 'check-circle-outline',
+    'queued': 'email-outline',
+    'cancelled': 'stop-circle-outline',
+    'remote': 'alert-outline',
+}
+
+
+class HistoryScreen(Screen):
+    """Οθόνη με το ιστορικό εκτελέσεων."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cursor = None        # Cursor της επόμενης σελίδας (None = δεν υπάρχει άλλη)
+        self.loading = False
+        self.generation = 0       # Αυξάνεται σε κάθε reset, ώστε να αγνοούνται παλιές σελίδες
+        self.dialog = None
+        self.filter_trigger = Clock.create_trigger(lambda dt: self.reset(), 0.4)
+        self.build_ui()
+
+    def build_ui(self):
+        layout = MDBoxLayout(orientation='vertical')
+
+        toolbar = MDTopAppBar(title="Ιστορικό", elevation=4)
+        toolbar.left_action_items = [["arrow-left", lambda x: self.go_back()]]
+        toolbar.right_action_items = [["refresh", lambda x: self.reset()]]
+        layout.add_widget(toolbar)
+
+        filter_box = MDBoxLayout(adaptive_height=True, padding=[dp(20), 0, dp(20), 0])
+        self.alias_input = MDTextField(
+            hint_text="Server (alias)",
+            icon_right="filter-outline",
+        )
+        self.alias_input.bind(text=lambda instance, value: self.filter_trigger())
+        filter_box.add_widget(self.alias_input)
+        layout.add_widget(filter_box)
+
+        self.scroll = MDScrollView()
+        self.scroll.bind(scroll_y=self.on_scroll)
+        self.list_layout = MDList()
+        self.scroll.add_widget(self.list_layout)
+        layout.add_widget(self.scroll)
+
+        self.add_widget(layout)
+
+    def on_enter(self):
+        self.reset()
+
+    def go_back(self):
+        self.manager.current = 'main'
+
+    def reset(self):
+        """Άδειασμα της λίστας και φόρτωση της πρώτης σελίδας."""
+        self.generation += 1
+        self.list_layout.clear_widgets()
+        self.cursor = None
+        self.loading = False
+        self.scroll.scroll_y = 1
+        self.load_page()
+
+    def on_scroll(self, instance, scroll_y):
+        if scroll_y <= LOAD_MORE_AT and self.cursor is not None:
+            self.load_page()
+
+    def load_page(self):
+        """Φόρτωση της επόμενης σελίδας σε thread (η βάση στο κινητό μπορεί να αργεί)."""
+        if self.loading:
+            return
+        self.loading = True
+        generation, cursor = self.generation, self.cursor
+        alias = self.alias_input.text.strip() or None
+
+        def load():
+            try:
+                entries, next_cursor = history.page(cursor, alias)
+            except Exception as e:
+                print(f'History load error: {e}')
+                entries, next_cursor = [], None
+            Clock.schedule_once(lambda dt: self.show_page(generation, entries, next_cursor, cursor is None))
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def show_page(self, generation, entries, next_cursor, first):
+        if generation != self.generation:
+            return  # Η λίστα άλλαξε (φίλτρο, ανανέωση) όσο φόρτωνε
+        self.loading = False
+        self.cursor = next_cursor
+        for entry in entries:
+            self.list_layout.add_widget(self._make_item(entry))
+        if first and not entries:
+            self.list_layout.add_widget(
+                TwoLineAvatarIconListItem(
+                    text="Δεν υπάρχουν εκτελέσεις",
+                    secondary_text="Οι εντολές που εκτελούνται καταγράφονται εδώ"
+                )
+            )
+
+    def _make_item(self, entry):
+        name = entry['command_name'] or entry['executable']
+        started = time.strftime('%d/%m %H:%M:%S', time.localtime(entry['started_at']))
+        duration = (entry['finished_at'] - entry['started_at']) * 1000
+        details = f'{started} · {duration:.0f} ms'
+        if entry['status'] != 'ok':
+            details += f' · {entry["status"]}'
+        elif entry['pid']:
+            details += f' · PID {entry["pid"]}'
+        item = TwoLineAvatarIconListItem(
+            text=f'{name} @{entry["alias"]}',
+            secondary_text=details,
+            on_release=lambda x, i=entry['id']: self.show_entry(i)
+        )
+        item.add_widget(IconLeftWidget(icon=_STATUS_ICONS.get(entry['status'], 'close-circle-outline')))
+        return item
+
+    def show_entry(self, entry_id):
+        """Λεπτομέρειες μιας εκτέλεσης, με την έξοδό της."""
+        entry = history.get(entry_id)
+        if entry is None:
+            return
+        lines = [f'Εντολή: {entry["executable"]}',
+                 f'Server: {entry["alias"]}',
+                 f'Κατάσταση: {entry["status"]}' + (f' (exit {entry["exit_status"]})'
+                                                   if entry['exit_status'] is not None else '')]
+        if entry['timings']:
+            lines.append('Χρόνοι: ' + ', '.join(f'{phase} {ms:.0f} ms' for phase, ms in entry['timings'].items()))
+        if entry['message']:
+            lines.append(f'Μήνυμα: {entry["message"]}')
+        if entry['stdout']:
+            lines.append(f'\nstdout ({entry["stdout_bytes"]} bytes):\n{entry["stdout"]}')
+        if entry['stderr']:
+            lines.append(f'\nstderr ({entry["stderr_bytes"]} bytes):\n{entry["stderr"]}')
+
+        self.dialog = MDDialog(
+            title=entry['command_name'] or 'Εκτέλεση',
+            text='\n'.join(lines),
+            buttons=[MDRaisedButton(text="OK", on_release=lambda x: self.dialog.dismiss())],
+        )
+        self.dialog.open()
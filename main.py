@@ -1,10 +1,17 @@
 # main.py
+import os
 import sys
 import io
+import threading
+import time
 from kivymd.app import MDApp
 from kivymd.uix.boxlayout import MDBoxLayout
 from settings_screen import SettingsScreen, ConnectionEditScreen
 from about_screen import AboutScreen
+from history_screen import HistoryScreen
+from diagnostics_screen import DiagnosticsScreen
+from output_console import OutputConsole
+import frame_monitor
 from kivymd.uix.gridlayout import MDGridLayout
 from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.button import MDRaisedButton, MDIconButton, MDRectangleFlatIconButton, MDFloatingActionButton
@@ -19,10 +26,24 @@ from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.utils import platform
 from kivy.metrics import dp
-import paramiko
 
 # Import database module
-import database
+from voicessh import cancel as cancellation
+from voicessh import database
+from voicessh import command_templates
+from voicessh import db_writer
+from voicessh import dispatch
+from voicessh import history
+from voicessh import memdiag
+from voicessh import metrics
+from voicessh import outbox
+from voicessh import profiler
+from voicessh import recognition
+from voicessh import retry
+from voicessh import scenes
+from voicessh import transport
+from voicessh import results as exec_results
+from voicessh.results import format_label, format_speech
 
 # ---------- Android-specific imports ----------
 # These are only loaded when running on Android to prevent build errors
@@ -44,100 +65,30 @@ if platform == 'android':
     Bundle = autoclass('android.os.Bundle')
 
 # ---------- Constants ----------
+# Καθυστέρηση (sec) πριν την αναζήτηση όσο ο χρήστης πληκτρολογεί
+SEARCH_DEBOUNCE_SECONDS = 0.2
 
-# ---------- Helpers ----------
-def run_remote(cmd, alias='Primary'):
-    """
-    Εκτελεί εντολή σε Windows μέσω SSH (Paramiko) χρησιμοποιώντας το συγκεκριμένο alias.
-    Returns stdout (string) ή σφάλμα (string).
-    """
-    try:
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
-        # Load settings for this alias
-        conn_details = database.get_ssh_connection(alias)
-        if not conn_details:
-            return f'❌ Σφάλμα: Δεν βρέθηκαν ρυθμίσεις για το alias "{alias}"'
-            
-        HOST = conn_details['host']
-        PORT = int(conn_details['port'])
-        USER = conn_details['username']
-        PASS = conn_details['password']
-
-        # Μικρότερα timeouts για να μην κολλάει η εφαρμογή
-        client.connect(
-            HOST, PORT, USER, PASS, 
-            timeout=10,        # Connection timeout
-            banner_timeout=10  # SSH banner timeout
-        )
+# Αν μετά από αποτυχημένη αναγνώριση ο χρήστης διαλέξει εντολή από το μενού μέσα σε
+# αυτό το διάστημα, το λάθος κείμενο καταγράφεται ως νέα φράση της εντολής
+LEARN_WINDOW_SECONDS = 30
 
-        cmd_lower = cmd.lower().strip()
-        # Καταργώ την Ανίχνευση εντολών που ξεκινούν προγράμματα που μένουν ενεργά
-        is_background_cmd=True
-
-        if is_background_cmd:
-            # Για GUI εφαρμογές, χρησιμοποιούμε το PsExec για να τρέξουν
-            # στο interactive user session (Session 1).
-            # Το -i 1 σημαίνει: εκτέλεση στο Session ID 1 (το πρώτο interactive session)
-            # Το -d σημαίνει: don't wait for process termination
-            # Το -accepteula σημαίνει: αποδοχή του EULA αυτόματα
-            
-            # Αφαιρούμε το 'start ' αν υπάρχει
-            if cmd_lower.startswith('start '):
-                cmd = cmd[6:].strip()
-            
-            # Αν η εντολή περιέχει κενά και δεν έχει ήδη εισαγωγικά, προσθέτουμε
-            if ' ' in cmd and not (cmd.startswith('"') and cmd.endswith('"')):
-                cmd_quoted = f'"{cmd}"'
-            else:
-                cmd_quoted = cmd
-            
-            # Δημιουργία της psexec εντολής
-            # -i 1 = interactive session 1
-            # -u username -p password = τρέχει με τα δικαιώματα του συγκεκριμένου χρήστη
-            # -d = don't wait for termination
-            # -accepteula = αυτόματη αποδοχή EULA
-            psexec_cmd = f'psexec -i 1 -u {USER} -p {PASS} -d -accepteula {cmd_quoted}'
-            
-            try:
-                stdin, stdout, stderr = client.exec_command(psexec_cmd, timeout=10)
-                output = stdout.read().decode('utf-8', errors='ignore').strip()
-                error = stderr.read().decode('utf-8', errors='ignore').strip()
-                
-                client.close()
-                
-                debug_info = f"📋 DEBUG INFO:\n"
-                debug_info += f"Command sent: {psexec_cmd}\n"
-                debug_info += f"Stdout: {output}\n"
-                debug_info += f"Stderr: {error}\n"
-                
-                # Create masked version for return
-                masked_debug = debug_info.replace(USER, "***").replace(PASS, "***")
-                
-                if error and ('ERROR' in error or 'denied' in error.lower()):
-                    return f"⚠️ Σφάλμα psexec:\n{error}\n\n{masked_debug}"
-                
-                return f"✓ Πρόγραμμα εκτελέστηκε με psexec\n{masked_debug}"
-                
-            except Exception as psexec_err:
-                client.close()
-                return f"⚠️ Exception στο psexec: {psexec_err}"
-
-    except paramiko.AuthenticationException:
-        return f'❌ SSH Error: Λάθος username ή password για {HOST}'
-    except paramiko.SSHException as ssh_err:
-        return f'❌ SSH Error: {ssh_err}'
-    except TimeoutError:
-        return f'❌ Timeout: Δεν απαντά το {HOST}:{PORT} (SSH server offline;)'
-    except ConnectionRefusedError:
-        return f'❌ Connection Refused: Το {HOST}:{PORT} αρνήθηκε τη σύνδεση'
-    except OSError as os_err:
-        # Socket errors, network unreachable, etc.
-        return f'❌ Network Error: {os_err}'
-    except Exception as e:
-        return f'❌ Unexpected Error: {type(e).__name__}: {e}'
+# ---------- Metrics (βλ. voicessh/metrics.py) ----------
+APP_COMMANDS = metrics.counter('voicessh_app_commands_total',
+                               'Εντολές που εκτέλεσε η εφαρμογή ανά εντολή και αποτέλεσμα (ok, queued, failed)',
+                               ('command', 'status'))
+APP_COMMAND_SECONDS = metrics.histogram('voicessh_app_command_seconds',
+                                        'Χρόνος εκτέλεσης μιας εντολής της εφαρμογής σε όλους τους servers')
+APP_CANCELLATIONS = metrics.counter('voicessh_app_cancellations_total',
+                                    'Εκτελέσεις που διακόπηκαν ανά αιτία (button, back, superseded, exit)',
+                                    ('source',))
 
+# Μήνυμα (ExecResult.message) ανά αιτία διακοπής
+CANCEL_REASONS = {
+    'button': 'Διακοπή από τον χρήστη',
+    'back': 'Διακοπή με το πλήκτρο επιστροφής',
+    'superseded': 'Αντικαταστάθηκε από νέα εντολή',
+    'exit': 'Η εφαρμογή έκλεισε',
+}
 
 # ---------- Screens ----------
 
@@ -151,6 +102,9 @@ class MainScreen(Screen):
         self.tts = None
         self.tts_initialized = False
         self.is_listening = False
+        self.last_miss = None  # (κείμενο, time.monotonic()) της τελευταίας αποτυχημένης αναγνώρισης
+        self.active_run = None  # CancelToken της εκτέλεσης σε εξέλιξη (βλ. voicessh/cancel.py)
+        self.search_trigger = Clock.create_trigger(self.show_search_results, SEARCH_DEBOUNCE_SECONDS)
         self.build_ui()
     
     def build_ui(self):
@@ -159,7 +113,7 @@ class MainScreen(Screen):
         # Toolbar
         self.toolbar = MDTopAppBar(title="Φωνητικές Εντολές", elevation=4)
         self.toolbar.md_bg_color=[0,0,1,1]
-        self.toolbar.right_action_items = [["file", lambda x: self.go_to_commands_list(x)], ["cog", lambda x: self.go_to_settings(x)], ["information", lambda x: self.go_to_about(x)]]
+        self.toolbar.right_action_items = [["file", lambda x: self.go_to_commands_list(x)], ["history", lambda x: self.go_to_history(x)], ["cog", lambda x: self.go_to_settings(x)], ["information", lambda x: self.go_to_about(x)]]
         self.toolbar.icon_color=[0,0,0,1]
         layout.add_widget(self.toolbar)
 
@@ -176,8 +130,23 @@ class MainScreen(Screen):
         )
         self.main_btn.bind(on_release=self.open_menu)
         menu_layout.add_widget(self.main_btn)
+        
+        # Διακοπή της εκτέλεσης σε εξέλιξη (ενεργό μόνο όσο τρέχει κάτι)
+        self.stop_btn = MDIconButton(icon="stop-circle-outline", disabled=True)
+        self.stop_btn.bind(on_release=lambda btn: self.cancel_run('button'))
+        menu_layout.add_widget(self.stop_btn)
         content.add_widget(menu_layout)
         
+        # Type-ahead αναζήτηση εντολής
+        self.search_input = MDTextField(
+            hint_text="Αναζήτηση εντολής",
+            icon_right="magnify",
+            size_hint_y=None,
+            height=dp(48)
+        )
+        self.search_input.bind(text=lambda instance, value: self.search_trigger())
+        content.add_widget(self.search_input)
+        
         # Status Label
         self.status_lbl = MDLabel(
             text='Πάτησε το μικρόφωνο για να ακούσω',
@@ -188,18 +157,21 @@ class MainScreen(Screen):
         )
         content.add_widget(self.status_lbl)
 
-        # Output ScrollView
-        scroll = MDScrollView(size_hint_y=0.5)
-        self.output_lbl = MDLabel(
-            text='Αναμονή για εντολή...',
-            halign='left',
-            valign='top',
-            theme_text_color="Primary",
-            size_hint_y=None
+        # Εντολές σε αναμονή για hosts που δεν είναι διαθέσιμοι (βλ. outbox.py)
+        self.outbox_lbl = MDLabel(
+            text='',
+            halign='center',
+            theme_text_color="Hint",
+            size_hint_y=None,
+            height=dp(24)
         )
-        self.output_lbl.bind(texture_size=self.output_lbl.setter('size'))
-        scroll.add_widget(self.output_lbl)
-        content.add_widget(scroll)
+        content.add_widget(self.outbox_lbl)
+
+        # Έξοδος εντολών (ring buffer + RecycleView, βλ. output_console.py)
+        self.console = OutputConsole(size_hint_y=0.5)
+        memdiag.register_gauge('console_lines', lambda: self.console.line_count)
+        self.console.write('Αναμονή για εντολή...')
+        content.add_widget(self.console)
 
         # Microphone FAB
         fab_layout = MDBoxLayout(orientation='vertical', adaptive_height=True, padding=[0, dp(20), 0, 0])
@@ -219,6 +191,7 @@ class MainScreen(Screen):
     
     def on_enter(self):
         """Initialize TTS when entering the screen, with debugging."""
+        self.refresh_outbox_status()
         # Initialize TTS on first entry, wrapped in try/except to avoid crashes
         if platform == 'android' and not self.tts_initialized:
             try:
@@ -253,79 +226,243 @@ class MainScreen(Screen):
         )
         self.menu.open()
     
+    def show_search_results(self, *args):
+        """Εμφάνιση των αποτελεσμάτων type-ahead σε dropdown κάτω από το πεδίο αναζήτησης."""
+        if self.menu:
+            self.menu.dismiss()
+        query = self.search_input.text.strip()
+        if not query:
+            return
+        
+        menu_items = [
+            {
+                "viewclass": "OneLineListItem",
+                "text": cmd['name'],
+                "on_release": lambda x=cmd: self.execute_from_search(x),
+            }
+            for cmd in database.search_commands_prefix(query)
+        ]
+        if not menu_items:
+            menu_items.append({"viewclass": "OneLineListItem", "text": "(Κανένα αποτέλεσμα)"})
+        
+        self.menu = MDDropdownMenu(
+            caller=self.search_input,
+            items=menu_items,
+            width_mult=4,
+        )
+        self.menu.open()
+    
+    def execute_from_search(self, cmd_data):
+        """Εκτέλεση εντολής από τα αποτελέσματα αναζήτησης."""
+        self.search_input.text = ''
+        self.search_trigger.cancel()  # Το άδειασμα του πεδίου ξαναπυροδοτεί την αναζήτηση
+        self.execute_from_menu(cmd_data)
+    
     def execute_from_menu(self, cmd_data):
         """Εκτέλεση εντολής από το dropdown."""
         self.menu.dismiss()
+        if command_templates.is_template(cmd_data['name']):
+            # Οι παραμετρικές εντολές χρειάζονται τιμές για τα slots τους
+            self.status_lbl.text = f'Πείτε φωνητικά: {cmd_data["name"]}'
+            return
         self.status_lbl.text = f'Εκτέλεση: {cmd_data["name"]}'
         
         aliases = cmd_data.get('aliases', ['Primary'])
         aliases_str = ', '.join(aliases)
-        self.output_lbl.text = f'⛙️ Εκτέλεση: {cmd_data["executable"]} (@{aliases_str})\n\n'
+        self.cancel_run('superseded')
+        self.show_output(f'⛙️ Εκτέλεση: {cmd_data["executable"]} (@{aliases_str})\n')
+        
+        self.learn_from_miss(cmd_data)
         
         # Run in thread or schedule logic if needed, simple call for now
-        Clock.schedule_once(lambda dt: self._run_cmd(cmd_data['executable'], aliases, cmd_data['name']), 0.1)
+        cache_ttl = cmd_data.get('cache_ttl', 0)
+        outbox_ttl = cmd_data.get('outbox_ttl', 0)
+        retry_policy = retry.policy_for(cmd_data)
+        Clock.schedule_once(lambda dt: self._run_cmd(cmd_data['executable'], aliases, cmd_data['name'],
+                                                     cache_ttl, outbox_ttl, retry_policy), 0.1)
 
-    def _run_cmd(self, executable, aliases, cmd_name=''):
+    def learn_from_miss(self, cmd_data):
+        """
+        Καταγράφει το κείμενο της τελευταίας αποτυχημένης αναγνώρισης ως φράση
+        της εντολής που διάλεξε ο χρήστης, αν η επιλογή έγινε αμέσως μετά.
+        Η εγγραφή γίνεται στο thread του writer (βλ. voicessh/db_writer.py).
+        Returns: τη φράση που θα καταγραφεί ή None.
+        """
+        miss = self.last_miss
+        self.last_miss = None
+        if not miss:
+            return None
+        text, missed_at = miss
+        if time.monotonic() - missed_at > LEARN_WINDOW_SECONDS:
+            return None
+        db_writer.submit(database.add_command_phrase, cmd_data['id'], text, learned=True,
+                         callback=lambda future: self.on_phrase_learned(future, text, cmd_data['name']))
+        return text
+
+    def on_phrase_learned(self, future, text, cmd_name):
+        """Μετά το commit της φράσης (στο UI thread)."""
+        try:
+            added = future.result()
+        except Exception as e:
+            print(f'Learn phrase error: {e}')
+            return
+        if added:
+            print(f'Learned phrase "{text}" for command "{cmd_name}"')
+            self.console.write(f'📚 Η φράση "{text}" θα αναγνωρίζεται πλέον ως "{cmd_name}"\n')
+    
+    def _run_cmd(self, executable, aliases, cmd_name='', cache_ttl=0, outbox_ttl=0, retry_policy=None):
         """
         Εκτελεί μια εντολή σε έναν ή περισσότερους SSH servers.
         aliases: λίστα από alias strings (π.χ. ['Primary', 'Secondary'])
+        cache_ttl: για εντολές που μόνο διαβάζουν, απάντηση από την cache (βλ. result_cache.py)
+        outbox_ttl: αν ένας host δεν είναι διαθέσιμος, η εντολή περιμένει στην ουρά (βλ. outbox.py)
+        retry_policy: επαναλήψεις μετά από παροδικά σφάλματα (βλ. retry.py)
+        Η εκτέλεση γίνεται σε thread (βλ. _start_run)· το UI μένει ελεύθερο και το κουμπί
+        διακοπής, το back ή μια νέα εντολή τη διακόπτουν.
         """
-        import threading
-        
-        # Αν είναι string αντί για λίστα (backward compatibility)
-        if isinstance(aliases, str):
-            aliases = [aliases]
-        
-        results = {}
-        threads = []
-        
-        def execute_on_server(alias):
-            """Εκτέλεση σε έναν συγκεκριμένο server."""
-            output = run_remote(executable, alias)
-            results[alias] = output
-        
-        # Δημιουργία thread για κάθε server
-        for alias in aliases:
-            thread = threading.Thread(target=execute_on_server, args=(alias,))
-            threads.append(thread)
-            thread.start()
-        
-        # Αναμονή όλων των threads
-        for thread in threads:
-            thread.join()
-        
-        # Εμφάνιση αποτελεσμάτων
-        output_text = ''
-        all_success = True
-        any_error= False
-        
-        for alias in aliases:
-            output = results.get(alias, '❌ Κανένα αποτέλεσμα')
-            if len(aliases) > 1:
-                output_text += f'\n─── Server: {alias} ───\n{output}\n'
+        def work(cancel):
+            start = time.perf_counter()
+            results = dispatch.run_on_servers(executable, aliases, cache_ttl=cache_ttl,
+                                              outbox_ttl=outbox_ttl, command_name=cmd_name,
+                                              retry=retry_policy, cancel=cancel)
+            APP_COMMAND_SECONDS.observe(time.perf_counter() - start)
+            if all(result.ok for result in results.values()):
+                status = 'ok'
+            elif all(result.ok or result.error == exec_results.QUEUED for result in results.values()):
+                status = 'queued'
+            elif cancel.cancelled:
+                status = 'cancelled'
             else:
-                output_text += f'{output}\n'
-            
-            # Έλεγχος για errors
-            if ('❌' in output or '⚠️' in output or 
-                'σφάλμα' in output.lower() or 'error' in output.lower() or
-                'denied' in output.lower() or 'αποτυχία' in output.lower() or
-                'exception' in output.lower()):
-                any_error = True
-                all_success = False
-        
-        self.output_lbl.text += f'Output:\n{output_text}'
+                status = 'failed'
+            APP_COMMANDS.inc(command=cmd_name or executable, status=status)
+            return results
+
+        self._start_run(work, lambda results: self._show_results(results, cmd_name))
+
+    def _show_results(self, results, cmd_name):
+        """Εμφάνιση των αποτελεσμάτων μιας εντολής (στο UI thread)."""
+        if isinstance(results, Exception):
+            self.console.write(f'❌ Σφάλμα εκτέλεσης: {results}')
+            self.speak_text('υπάρχει πρόβλημα')
+            return
+
+        # Εμφάνιση αποτελεσμάτων (μία ενότητα ανά server, αν είναι πολλοί)
+        self.console.write('Output:')
+        for alias, result in results.items():
+            section = self.console.section(f'Server: {alias}') if len(results) > 1 else None
+            self.console.write(format_label(result), section)
         
         # Voice feedback based on command result
-        if any_error:
-            self.speak_text('υπάρχει πρόβλημα')
-        else:
-            self.speak_text(f'η εντολή {cmd_name} εκτελέστηκε επιτυχώς')
+        self.speak_text(format_speech(results.values(), cmd_name))
+        self.refresh_outbox_status()
+    
+    def show_output(self, text):
+        """Καθαρίζει την κονσόλα εξόδου και γράφει νέο κείμενο."""
+        self.console.clear()
+        self.console.write(text)
+    
+    def refresh_outbox_status(self):
+        """Ενημέρωση της γραμμής με τις εντολές που περιμένουν στο outbox."""
+        try:
+            pending = database.outbox_pending()
+        except Exception as e:
+            print(f'Outbox status error: {e}')
+            return
+        if not pending:
+            self.outbox_lbl.text = ''
+            return
+        per_host = ', '.join(f'{alias}: {count}' for alias, count in sorted(pending.items()))
+        self.outbox_lbl.text = f'📬 Σε αναμονή: {sum(pending.values())} ({per_host})'
     
+    def on_outbox_delivery(self, entry, result):
+        """Καλείται από το thread του OutboxWorker μετά από κάθε παράδοση."""
+        def show(dt):
+            name = entry['command_name'] or entry['executable']
+            self.console.write(f'📬 [{entry["alias"]}] {name}: {format_label(result)}')
+            self.refresh_outbox_status()
+        Clock.schedule_once(show, 0)
+    
+    def _start_run(self, work, show):
+        """
+        Τρέχει το work(cancel) σε thread με νέο CancelToken και δίνει το αποτέλεσμά του
+        στο show(αποτέλεσμα) στο UI thread (ή την εξαίρεση, αν το work απέτυχε· και τότε
+        το κουμπί διακοπής απενεργοποιείται). Μια εκτέλεση σε εξέλιξη διακόπτεται πρώτα
+        (η νέα εντολή την αντικαθιστά).
+        """
+        self.cancel_run('superseded')
+        token = cancellation.CancelToken()
+        self.active_run = token
+        self.stop_btn.disabled = False
+
+        def finish(outcome):
+            if self.active_run is not token:
+                return  # Την αντικατέστησε νεότερη εκτέλεση
+            self.active_run = None
+            self.stop_btn.disabled = True
+            show(outcome)
+
+        def target():
+            try:
+                outcome = work(token)
+            except Exception as e:
+                print(f'Run error: {e}')
+                outcome = e
+            Clock.schedule_once(lambda dt: finish(outcome), 0)
+
+        threading.Thread(target=target, name='voicessh-command', daemon=True).start()
+
+    def cancel_run(self, source):
+        """
+        Διακόπτει την εκτέλεση σε εξέλιξη: κλείνουν αμέσως οι συνδέσεις και τα channels της
+        και οι servers που δεν απάντησαν ακόμα σημειώνονται ως "Διακόπηκε".
+        source: η αιτία (βλ. CANCEL_REASONS). Returns: True αν υπήρχε εκτέλεση σε εξέλιξη.
+        """
+        token = self.active_run
+        if token is None:
+            return False
+        if source == 'superseded':
+            # Η οθόνη ανήκει πια στη νέα εντολή: τα αποτελέσματα της παλιάς δεν εμφανίζονται
+            self.active_run = None
+            self.stop_btn.disabled = True
+        if not token.cancel(CANCEL_REASONS[source]):
+            return False
+        APP_CANCELLATIONS.inc(source=source)
+        print(f'Cancelled: {CANCEL_REASONS[source]}')
+        if source != 'superseded':
+            self.status_lbl.text = f'⏹ {CANCEL_REASONS[source]}'
+        return True
+
+    def _run_scene(self, scene):
+        """Εκτελεί τα βήματα μιας σκηνής (παράλληλα όσα δεν εξαρτώνται μεταξύ τους)."""
+        def work(cancel):
+            try:
+                return scenes.run_scene(scene, cancel=cancel)
+            except scenes.SceneError as e:
+                return e
+
+        self._start_run(work, lambda outcomes: self._show_scene_results(outcomes, scene))
+
+    def _show_scene_results(self, outcomes, scene):
+        """Εμφάνιση των αποτελεσμάτων μιας σκηνής (στο UI thread)."""
+        if isinstance(outcomes, Exception):  # SceneError ή απρόβλεπτο σφάλμα (βλ. _start_run)
+            self.console.write(f'❌ Σφάλμα σκηνής: {outcomes}')
+            self.speak_text('υπάρχει πρόβλημα')
+            return
+
+        self.console.write('Output:')
+        for step, results in outcomes:
+            section = self.console.section(f'Βήμα: {step["key"]} ({step["command"]})')
+            self.console.write(scenes.format_step(step, results, header=False), section)
+        self.speak_text(scenes.format_scene_speech(outcomes, scene['name']))
+
     def go_to_commands_list(self, btn):
         """Μετάβαση στη λίστα προσταγμάτων."""
         self.manager.current = 'commands_list'
 
+    def go_to_history(self, btn):
+        """Μετάβαση στο ιστορικό εκτελέσεων."""
+        self.manager.current = 'history'
+
     def go_to_settings(self, btn):
         """Μετάβαση στη σελίδα ρυθμίσεων."""
         self.manager.current = 'settings'
@@ -385,7 +522,7 @@ class MainScreen(Screen):
 
         except Exception as e:
             self.status_lbl.text = f'Εξαίρεση: {str(e)}'
-            self.output_lbl.text = f'Σφάλμα κατά την εκκίνηση: {str(e)}'
+            self.show_output(f'Σφάλμα κατά την εκκίνηση: {str(e)}')
 
     def _actually_start_listening(self):
         try:
@@ -421,6 +558,7 @@ class MainScreen(Screen):
                     super().__init__()
                     self.main_screen = main_screen
                     self.silence_timer = None
+                    self.speech_ended_at = None
 
                 def reset_silence_timer(self):
                     """Επαναφορά του χρονομέτρου σιωπής."""
@@ -467,6 +605,7 @@ class MainScreen(Screen):
                 def onEndOfSpeech(self):
                     if self.silence_timer:
                         self.silence_timer.cancel()
+                    self.speech_ended_at = time.perf_counter()
                     Clock.schedule_once(lambda dt: setattr(app_ref.status_lbl, 'text', 'Επεξεργάζομαι...'), 0)
 
                 @java_method('(I)V')
@@ -484,6 +623,7 @@ class MainScreen(Screen):
                         SpeechRecognizer.ERROR_SPEECH_TIMEOUT: "Timeout"
                     }
                     error_msg = error_msgs.get(error, f"Σφάλμα {error}")
+                    recognition.RECOGNIZER_ERRORS.inc(code=error)
                     Clock.schedule_once(lambda dt: setattr(app_ref.status_lbl, 'text', f'❌ {error_msg}'), 0)
                     # Καθαρισμός του recognizer στο UI thread
                     app_ref.cleanup_recognizer()
@@ -492,10 +632,18 @@ class MainScreen(Screen):
                 def onResults(self, results):
                     if self.silence_timer:
                         self.silence_timer.cancel()
+                    if self.speech_ended_at is not None:
+                        recognition.RECOGNIZER_LATENCY.observe(time.perf_counter() - self.speech_ended_at)
+                        self.speech_ended_at = None
                     matches = results.getStringArrayList(SpeechRecognizer.RESULTS_RECOGNITION)
+                    recognition.RECOGNIZER_RESULTS.inc(result='text' if matches and matches.size() > 0 else 'empty')
                     if matches and matches.size() > 0:
-                        text = str(matches.get(0))
-                        Clock.schedule_once(lambda dt: app_ref.handle_command(text), 0)
+                        # Όλη η N-best λίστα, με τα confidences αν τα δίνει ο recognizer
+                        texts = [str(matches.get(i)) for i in range(matches.size())]
+                        scores = results.getFloatArray(SpeechRecognizer.CONFIDENCE_SCORES)
+                        confidences = list(scores) if scores is not None else None
+                        print(recognition.log_line(texts, confidences))
+                        Clock.schedule_once(lambda dt: app_ref.handle_command(texts, confidences), 0)
                     else:
                         Clock.schedule_once(lambda dt: setattr(app_ref.status_lbl, 'text', 'Δε βρέθηκε κείμενο'), 0)
                     # Καθαρισμός του recognizer στο UI thread
@@ -544,7 +692,7 @@ class MainScreen(Screen):
             
         except Exception as e:
             self.status_lbl.text = f'Εξαίρεση: {str(e)}'
-            self.output_lbl.text = f'Σφάλμα κατά την εκκίνηση: {str(e)}'
+            self.show_output(f'Σφάλμα κατά την εκκίνηση: {str(e)}')
     
     def init_tts(self):
         """Initialize Android Text-to-Speech."""
@@ -701,27 +849,48 @@ class MainScreen(Screen):
             print(f'❌ TTS speak error: {e}')
             import traceback
             traceback.print_exc()
-    def handle_command(self, recognized_text):
-        self.status_lbl.text = f'Αναγνωρίστηκε: "{recognized_text}"'
-        # Συνήθης προσαρμογή για ελληνική ορθογραφία
-        recognized_text = recognized_text.strip().lower()
-        
-        # Χρήση βάσης δεδομένων
-        cmd_details = database.get_command_details(recognized_text)
+    def handle_command(self, recognized, confidences=None):
+        """
+        recognized: το κείμενο ή η N-best λίστα του recognizer (τα πιθανότερα πρώτα).
+        confidences: τα confidences της λίστας, αν υπάρχουν.
+        """
+        texts = [recognized] if isinstance(recognized, str) else list(recognized)
+        self.status_lbl.text = f'Αναγνωρίστηκε: "{texts[0]}"'
+        recognized_text = recognition.normalize(texts[0])
+
+        # Σκηνή (πολλά βήματα με μία φράση) ή εντολή (ακριβές όνομα ή παραμετρικό template)
+        match = recognition.resolve(texts, confidences)
+        if match is not None and match['kind'] == 'scene':
+            scene = match['scene']
+            self.last_miss = None
+            self.cancel_run('superseded')
+            self.show_output(f'🎬 Σκηνή: {scene["name"]} ({len(scene["steps"])} βήματα)\n')
+            Clock.schedule_once(lambda dt: self._run_scene(scene), 0.1)
+            return
+
+        cmd_details = match['command'] if match is not None else None
         
         if cmd_details is None:
-            self.output_lbl.text = f'❌ Δεν αναγνωρίστηκε εντολή: "{recognized_text}"'
+            self.show_output(f'❌ Δεν αναγνωρίστηκε εντολή: "{recognized_text}"')
+            # Αν ο χρήστης διαλέξει τώρα εντολή από το μενού, θα μάθουμε αυτή τη φράση
+            self.last_miss = (recognized_text, time.monotonic())
             return
+        self.last_miss = None
 
         cmd_exec = cmd_details['executable']
         cmd_aliases = cmd_details.get('aliases', ['Primary'])
         cmd_name = cmd_details['name']
+        cache_ttl = cmd_details['cache_ttl']
+        outbox_ttl = cmd_details['outbox_ttl']
+        retry_policy = retry.policy_for(cmd_details)
         
         aliases_str = ', '.join(cmd_aliases)
-        self.output_lbl.text = f'⛙️ Εκτέλεση: {cmd_exec} (@{aliases_str})\n\n'
+        self.cancel_run('superseded')
+        self.show_output(f'⛙️ Εκτέλεση: {cmd_exec} (@{aliases_str})\n')
         
         # Αποστολή SSH
-        Clock.schedule_once(lambda dt: self._run_cmd(cmd_exec, cmd_aliases, cmd_name), 0.1)
+        Clock.schedule_once(lambda dt: self._run_cmd(cmd_exec, cmd_aliases, cmd_name, cache_ttl, outbox_ttl,
+                                                     retry_policy), 0.1)
 
 
 class CommandsListScreen(Screen):
@@ -729,6 +898,7 @@ class CommandsListScreen(Screen):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.search_trigger = Clock.create_trigger(lambda dt: self.refresh_list(), SEARCH_DEBOUNCE_SECONDS)
         self.build_ui()
     
     def build_ui(self):
@@ -740,6 +910,16 @@ class CommandsListScreen(Screen):
         toolbar.right_action_items = [["plus", lambda x: self.add_command()]]
         layout.add_widget(toolbar)
         
+        # Αναζήτηση (φιλτράρει τη λίστα)
+        search_box = MDBoxLayout(adaptive_height=True, padding=[dp(20), 0, dp(20), 0])
+        self.search_input = MDTextField(
+            hint_text="Αναζήτηση",
+            icon_right="magnify",
+        )
+        self.search_input.bind(text=lambda instance, value: self.search_trigger())
+        search_box.add_widget(self.search_input)
+        layout.add_widget(search_box)
+        
         # List in ScrollView
         scroll = MDScrollView()
         self.list_layout = MDList()
@@ -753,9 +933,13 @@ class CommandsListScreen(Screen):
         self.refresh_list()
     
     def refresh_list(self):
-        """Φόρτωση commands από βάση."""
+        """Φόρτωση commands από βάση (ή από την αναζήτηση, αν υπάρχει κείμενο)."""
         self.list_layout.clear_widgets()
-        commands = database.get_all_commands()
+        query = self.search_input.text.strip()
+        if query:
+            commands = database.search_commands(query)
+        else:
+            commands = database.get_all_commands()
         
         for cmd in commands:
             aliases_str = ', '.join(cmd.get('aliases', ['Primary']))
@@ -776,7 +960,14 @@ class CommandsListScreen(Screen):
             
             self.list_layout.add_widget(item)
         
-        if not commands:
+        if not commands and query:
+            self.list_layout.add_widget(
+                TwoLineAvatarIconListItem(
+                    text="Κανένα αποτέλεσμα", 
+                    secondary_text=f'Καμία εντολή δεν ταιριάζει με "{query}"'
+                )
+            )
+        elif not commands:
             self.list_layout.add_widget(
                 TwoLineAvatarIconListItem(
                     text="Δεν υπάρχουν προστάγματα", 
@@ -818,9 +1009,9 @@ class CommandsListScreen(Screen):
         self.dialog.open()
         
     def do_delete(self, cmd_id):
-        database.delete_command(cmd_id)
+        # Η εγγραφή γίνεται στο thread του writer· η λίστα ανανεώνεται μετά το commit
+        db_writer.submit(database.delete_command, cmd_id, callback=lambda future: self.refresh_list())
         self.dialog.dismiss()
-        self.refresh_list()
 
 
 class CommandEditScreen(Screen):
@@ -862,6 +1053,54 @@ class CommandEditScreen(Screen):
         )
         form.add_widget(self.exec_input)
         
+        self.phrases_input = MDTextField(
+            hint_text="Εναλλακτικές φράσεις",
+            helper_text="Μία φράση ανά γραμμή",
+            helper_text_mode="on_focus",
+            mode="rectangle",
+            multiline=True
+        )
+        form.add_widget(self.phrases_input)
+        
+        self.cache_input = MDTextField(
+            hint_text="Cache αποτελέσματος (δευτερόλεπτα)",
+            helper_text="Μόνο για εντολές που διαβάζουν (π.χ. ipconfig)· 0 = χωρίς cache",
+            helper_text_mode="on_focus",
+            mode="rectangle",
+            text="0"
+        )
+        form.add_widget(self.cache_input)
+        
+        self.outbox_input = MDTextField(
+            hint_text="Αναμονή αν ο host είναι offline (δευτερόλεπτα)",
+            helper_text="Η εντολή εκτελείται όταν ο host επανέλθει· 0 = χωρίς αναμονή",
+            helper_text_mode="on_focus",
+            mode="rectangle",
+            text="0"
+        )
+        form.add_widget(self.outbox_input)
+        
+        # Idempotent: η εντολή μπορεί να επαναληφθεί χωρίς να διπλασιαστεί το αποτέλεσμά της
+        from kivymd.uix.selectioncontrol import MDCheckbox
+        idempotent_box = MDBoxLayout(orientation='horizontal', adaptive_height=True, spacing=dp(10))
+        self.idempotent_checkbox = MDCheckbox(size_hint=(None, None), size=(dp(40), dp(40)))
+        idempotent_box.add_widget(self.idempotent_checkbox)
+        idempotent_box.add_widget(MDLabel(
+            text="Ασφαλής επανάληψη (η εντολή δεν ανοίγει κάτι δεύτερη φορά)",
+            size_hint_y=None,
+            height=dp(40)
+        ))
+        form.add_widget(idempotent_box)
+        
+        self.retry_input = MDTextField(
+            hint_text="Πολιτική επανάληψης (JSON)",
+            helper_text='π.χ. {"max_attempts": 5, "deadline": 10}· κενό = η default πολιτική',
+            helper_text_mode="on_focus",
+            mode="rectangle",
+            multiline=True
+        )
+        form.add_widget(self.retry_input)
+        
         # SSH Servers Selector (Αντικατάσταση του alias_btn)
         servers_label = MDLabel(
             text="Επιλέξτε SSH Servers:",
@@ -948,6 +1187,11 @@ class CommandEditScreen(Screen):
             if cmd:
                 self.name_input.text = cmd['name']
                 self.exec_input.text = cmd['executable']
+                self.phrases_input.text = '\n'.join(cmd.get('phrases', []))
+                self.cache_input.text = str(cmd.get('cache_ttl', 0))
+                self.outbox_input.text = str(cmd.get('outbox_ttl', 0))
+                self.idempotent_checkbox.active = bool(cmd.get('idempotent'))
+                self.retry_input.text = cmd.get('retry_policy') or ''
                 
                 # Επιλογή των σωστών checkboxes
                 selected_aliases = cmd.get('aliases', [])
@@ -958,6 +1202,11 @@ class CommandEditScreen(Screen):
             self.toolbar.title = 'Νέο Πρόσταγμα'
             self.name_input.text = ''
             self.exec_input.text = ''
+            self.phrases_input.text = ''
+            self.cache_input.text = '0'
+            self.outbox_input.text = '0'
+            self.idempotent_checkbox.active = False
+            self.retry_input.text = ''
             # Επιλογή Primary by default
             if 'Primary' in self.server_checkboxes:
                 self.server_checkboxes['Primary'].active = True
@@ -973,6 +1222,10 @@ class CommandEditScreen(Screen):
         # Reset error states
         self.name_input.error = False
         self.exec_input.error = False
+        self.phrases_input.error = False
+        self.cache_input.error = False
+        self.outbox_input.error = False
+        self.retry_input.error = False
         self.error_lbl.text = ''
 
         if not name:
@@ -984,6 +1237,42 @@ class CommandEditScreen(Screen):
             self.error_lbl.text = 'Η εντολή είναι υποχρεωτική!'
             return
         
+        template_error = command_templates.validate_template(name.lower(), executable)
+        if template_error:
+            self.name_input.error = True
+            self.error_lbl.text = template_error
+            return
+        
+        phrases = [p.strip() for p in self.phrases_input.text.splitlines() if p.strip()]
+        for phrase in phrases:
+            template_error = command_templates.validate_template(phrase.lower(), executable)
+            if template_error:
+                self.phrases_input.error = True
+                self.error_lbl.text = f'"{phrase}": {template_error}'
+                return
+        
+        cache_ttl = self.cache_input.text.strip() or '0'
+        if not cache_ttl.isdigit():
+            self.cache_input.error = True
+            self.error_lbl.text = 'Η cache πρέπει να είναι αριθμός δευτερολέπτων!'
+            return
+        cache_ttl = int(cache_ttl)
+        
+        outbox_ttl = self.outbox_input.text.strip() or '0'
+        if not outbox_ttl.isdigit():
+            self.outbox_input.error = True
+            self.error_lbl.text = 'Η αναμονή πρέπει να είναι αριθμός δευτερολέπτων!'
+            return
+        outbox_ttl = int(outbox_ttl)
+        
+        try:
+            retry_policy = retry.validate_policy(self.retry_input.text)
+        except ValueError as e:
+            self.retry_input.error = True
+            self.error_lbl.text = str(e)
+            return
+        idempotent = self.idempotent_checkbox.active
+        
         # Συλλογή επιλεγμένων servers
         selected_aliases = [alias for alias, checkbox in self.server_checkboxes.items() if checkbox.active]
         
@@ -991,16 +1280,30 @@ class CommandEditScreen(Screen):
             self.error_lbl.text = 'Πρέπει να επιλέξετε τουλάχιστον έναν server!'
             return
         
-        if self.mode == 'add':
-            result = database.add_command(name, executable, selected_aliases)
-            if result is None:
-                self.error_lbl.text = f'Το πρόσταγμα "{name}" υπάρχει ήδη!'
-                return
+        # Η εγγραφή γίνεται στο thread του writer (βλ. voicessh/db_writer.py)
+        mode = self.mode
+        if mode == 'add':
+            db_writer.submit(database.add_command, name, executable, selected_aliases, phrases,
+                             cache_ttl, outbox_ttl, idempotent, retry_policy,
+                             callback=lambda future: self.on_saved(future, mode, name))
         else:
-            result = database.update_command(self.command_id, name, executable, selected_aliases)
-            if not result:
-                self.error_lbl.text = 'Αποτυχία ενημέρωσης (ίσως υπάρχει ήδη αυτό το όνομα)'
-                return
+            db_writer.submit(database.update_command, self.command_id, name, executable, selected_aliases,
+                             phrases, cache_ttl, outbox_ttl, idempotent, retry_policy or '',
+                             callback=lambda future: self.on_saved(future, mode, name))
+    
+    def on_saved(self, future, mode, name):
+        """Μετά το commit της αποθήκευσης (στο UI thread)."""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.error_lbl.text = f'Σφάλμα αποθήκευσης: {e}'
+            return
+        if mode == 'add' and result is None:
+            self.error_lbl.text = f'Το πρόσταγμα "{name}" υπάρχει ήδη!'
+            return
+        if mode == 'edit' and not result:
+            self.error_lbl.text = 'Αποτυχία ενημέρωσης (ίσως υπάρχει ήδη αυτό το όνομα)'
+            return
         
         self.manager.current = 'commands_list'
 
@@ -1010,6 +1313,11 @@ class VoiceSSHApp(MDApp):
     def build(self):
         self.theme_cls.primary_palette = "Blue"  # Διάλεξε χρώμα: Teal, Blue, Red, κλπ.
         self.theme_cls.theme_style = "Light"    # ή "Dark"
+
+        # Χρόνοι των callbacks του UI thread (βλ. frame_monitor.py)· overlay μόνο σε debug builds
+        debug_build = frame_monitor.is_debug_build()
+        if debug_build or os.environ.get('VOICESSH_FRAME_MONITOR'):
+            frame_monitor.default_monitor.install(overlay=debug_build)
         
         # Αίτηση αδειών για Android (API 23+)
         if platform == 'android':
@@ -1021,16 +1329,20 @@ class VoiceSSHApp(MDApp):
             ])
         
         # Αρχικοποίηση βάσης δεδομένων
-        database.init_db()
+        with frame_monitor.default_monitor.measure('database.init_db'):
+            database.init_db()
 
         # Screen Manager
         sm = ScreenManager()
-        sm.add_widget(MainScreen(name='main'))
+        self.main_screen = MainScreen(name='main')
+        sm.add_widget(self.main_screen)
         sm.add_widget(CommandsListScreen(name='commands_list'))
         sm.add_widget(CommandEditScreen(name='command_edit'))
         sm.add_widget(SettingsScreen(name='settings'))
         sm.add_widget(ConnectionEditScreen(name='connection_edit'))
         sm.add_widget(AboutScreen(name='about'))
+        sm.add_widget(HistoryScreen(name='history'))
+        sm.add_widget(DiagnosticsScreen(name='diagnostics'))
         
         return sm
     
@@ -1039,6 +1351,30 @@ class VoiceSSHApp(MDApp):
         # Δέσιμο του back button
         Window.bind(on_keyboard=self.on_keyboard)
         self.exit_dialog = None
+        
+        # Οι εγγραφές των οθονών στη βάση, εκτός UI thread· τα callbacks επιστρέφουν με το Clock
+        db_writer.default_writer.start(schedule=lambda callback: Clock.schedule_once(lambda dt: callback(), 0))
+        
+        # Παράδοση εντολών που περιμένουν hosts που δεν ήταν διαθέσιμοι
+        self.outbox_worker = outbox.OutboxWorker(on_change=self.main_screen.on_outbox_delivery).start()
+        
+        # Κλάδεμα του ιστορικού εκτελέσεων στο παρασκήνιο
+        history.prune_async()
+
+        # Οι μετρήσεις γράφονται περιοδικά δίπλα στη βάση (βλ. voicessh/metrics.py)
+        self.metrics_flusher = metrics.MetricsFlusher().start()
+    
+    def on_stop(self):
+        """Καλείται όταν κλείνει η εφαρμογή."""
+        self.main_screen.cancel_run('exit')
+        if getattr(self, 'outbox_worker', None) is not None:
+            self.outbox_worker.stop()
+        transport.close_upstream()
+        db_writer.default_writer.stop()
+        if getattr(self, 'metrics_flusher', None) is not None:
+            self.metrics_flusher.stop()
+        if profiler.is_running():
+            print(f'Profile: {profiler.stop_and_save()[0]}')
     
     def on_keyboard(self, window, key, scancode, codepoint, modifier):
         """
@@ -1049,13 +1385,15 @@ class VoiceSSHApp(MDApp):
         if key == 27:
             current_screen = self.root.current
             
-            # Αν είμαστε στην κεντρική οθόνη, ρωτάμε για έξοδο
+            # Αν είμαστε στην κεντρική οθόνη, πρώτα διακόπτεται η εκτέλεση σε εξέλιξη
+            # και μετά (στο επόμενο back) ρωτάμε για έξοδο
             if current_screen == 'main':
-                self.show_exit_confirmation()
+                if not self.main_screen.cancel_run('back'):
+                    self.show_exit_confirmation()
                 return True  # Μην κάνεις το default (έξοδος)
             
             # Αν είμαστε σε άλλη οθόνη, πηγαίνουμε back
-            elif current_screen in ['commands_list', 'settings', 'about']:
+            elif current_screen in ['commands_list', 'settings', 'about', 'history']:
                 self.root.current = 'main'
                 return True
             
@@ -1066,6 +1404,10 @@ class VoiceSSHApp(MDApp):
             elif current_screen == 'connection_edit':
                 self.root.current = 'settings'
                 return True
+
+            elif current_screen == 'diagnostics':
+                self.root.current = 'about'
+                return True
         
         # Για άλλα πλήκτρα, επιτρέπουμε το default behavior
         return False
@@ -0,0 +1,168 @@
+# output_console.py
+"""
+OutputConsole: η έξοδος των εντολών στην κεντρική οθόνη.
+
+Ένα MDLabel που μεγαλώνει με "+=" ξαναστοιχίζει και ξαναζωγραφίζει όλο το
+κείμενο σε ένα texture σε κάθε προσθήκη (και πάνω από ένα μέγεθος ξεπερνά το
+μέγιστο texture της GPU). Εδώ:
+- οι γραμμές κρατιούνται σε ring buffer (το πολύ MAX_LINES, οι παλαιότερες φεύγουν),
+- ένα RecycleView ζωγραφίζει μόνο τις γραμμές που φαίνονται, με σταθερό ύψος
+  γραμμής και monospace γραμματοσειρά (η αναδίπλωση γίνεται σε στήλες, χωρίς layout κειμένου),
+- οι προσθήκες μαζεύονται και εφαρμόζονται μία φορά ανά frame,
+- η έξοδος κάθε server είναι ενότητα που ανοιγοκλείνει με ένα πάτημα στον τίτλο της.
+"""
+
+import itertools
+import textwrap
+import threading
+from collections import deque
+
+from kivy.clock import Clock
+from kivy.core.text import Label as CoreLabel
+from kivy.metrics import dp, sp
+from kivy.properties import ObjectProperty, StringProperty
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivymd.uix.label import MDLabel
+
+# Πόσες γραμμές (πριν την αναδίπλωση) κρατιούνται συνολικά
+MAX_LINES = 2000
+
+FONT_NAME = 'RobotoMono-Regular'
+FONT_SIZE = sp(13)
+LINE_HEIGHT = dp(18)
+HEADER_HEIGHT = dp(32)
+
+# Αν η λίστα είναι τόσο κοντά στο τέλος, ακολουθεί τις νέες γραμμές
+FOLLOW_THRESHOLD = 0.02
+
+
+class ConsoleLine(MDLabel):
+    """Μία (αναδιπλωμένη) γραμμή εξόδου."""
+
+    def __init__(self, **kwargs):
+        super().__init__(font_name=FONT_NAME, font_size=FONT_SIZE, theme_text_color="Primary",
+                         size_hint_y=None, height=LINE_HEIGHT, **kwargs)
+        self.bind(width=lambda instance, width: setattr(self, 'text_size', (width, None)))
+
+
+class ConsoleHeader(ButtonBehavior, MDLabel):
+    """Τίτλος ενότητας (π.χ. ένας server)· με πάτημα ανοίγει/κλείνει."""
+
+    section = StringProperty('')
+    console = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(bold=True, theme_text_color="Secondary",
+                         size_hint_y=None, height=HEADER_HEIGHT, **kwargs)
+        self.bind(width=lambda instance, width: setattr(self, 'text_size', (width, None)))
+
+    def on_release(self):
+        if self.console is not None:
+            self.console.toggle(self.section)
+
+
+class OutputConsole(RecycleView):
+    """Φραγμένη, virtualized κονσόλα εξόδου (βλ. docstring του module)."""
+
+    def __init__(self, max_lines=MAX_LINES, **kwargs):
+        super().__init__(**kwargs)
+        self._lines = deque(maxlen=max_lines)  # (section ή None, γραμμή)
+        self._sections = {}                    # section -> {'title', 'collapsed'}
+        self._pending = []
+        self._lock = threading.Lock()          # Το write μπορεί να κληθεί από άλλο thread
+        self._ids = itertools.count(1)
+        self._char_width = CoreLabel(font_name=FONT_NAME, font_size=FONT_SIZE).get_extents('M')[0] or 8
+        self._flush_trigger = Clock.create_trigger(self._flush, 0)
+        self._rebuild_trigger = Clock.create_trigger(lambda dt: self._rebuild(), 0)
+
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, LINE_HEIGHT), default_size_hint=(1, None),
+                                  padding=[dp(4), 0])
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = 'ConsoleLine'
+        self.bind(width=lambda instance, width: self._rebuild_trigger())
+
+    # --- API ---
+
+    def section(self, title):
+        """Νέα ενότητα (π.χ. η έξοδος ενός server). Returns: το κλειδί της για το write."""
+        key = str(next(self._ids))
+        with self._lock:
+            self._sections[key] = {'title': title, 'collapsed': False}
+        return key
+
+    def write(self, text, section=None):
+        """Προσθέτει κείμενο (μία ή περισσότερες γραμμές)· εμφανίζεται στο επόμενο frame."""
+        lines = text.rstrip('\n').split('\n')
+        with self._lock:
+            self._pending.extend((section, line) for line in lines)
+        self._flush_trigger()
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._lines.clear()
+            self._sections.clear()
+        self._flush_trigger()
+
+    def toggle(self, section):
+        with self._lock:
+            if section not in self._sections:
+                return
+            self._sections[section]['collapsed'] = not self._sections[section]['collapsed']
+        self._rebuild()
+
+    @property
+    def line_count(self):
+        """Πόσες γραμμές κρατιούνται (το πολύ max_lines)."""
+        return len(self._lines)
+
+    @property
+    def text(self):
+        """Όλες οι γραμμές που κρατιούνται (και όσες περιμένουν το επόμενο frame)."""
+        with self._lock:
+            return '\n'.join(line for _, line in itertools.chain(self._lines, self._pending))
+
+    # --- Εσωτερικά ---
+
+    def _flush(self, dt=None):
+        with self._lock:
+            self._lines.extend(self._pending)
+            self._pending.clear()
+        self._rebuild()
+
+    def _columns(self):
+        return max(20, int((self.width - dp(8)) / self._char_width))
+
+    def _rebuild(self):
+        """Ξαναφτιάχνει τα data του RecycleView (μόνο λίστα από dicts· κανένα texture)."""
+        follow = not self.data or self.scroll_y <= FOLLOW_THRESHOLD
+        columns = self._columns()
+        with self._lock:
+            lines = list(self._lines)
+            live = {section for section, _ in lines}
+            for key in [key for key in self._sections if key not in live]:
+                del self._sections[key]  # Οι γραμμές της έφυγαν από το ring buffer
+            sections = {key: dict(value) for key, value in self._sections.items()}
+
+        data = []
+        for section, run in itertools.groupby(lines, key=lambda item: item[0]):
+            run = [line for _, line in run]
+            if section is not None and section in sections:
+                collapsed = sections[section]['collapsed']
+                data.append({'viewclass': 'ConsoleHeader', 'section': section, 'console': self,
+                             'height': HEADER_HEIGHT,
+                             'text': f'{"▸" if collapsed else "▾"} {sections[section]["title"]}'
+                                     + (f' ({len(run)} γραμμές)' if collapsed else '')})
+                if collapsed:
+                    continue
+            for line in run:
+                for part in textwrap.wrap(line, columns, replace_whitespace=False,
+                                          drop_whitespace=False) or ['']:
+                    data.append({'viewclass': 'ConsoleLine', 'text': part, 'height': LINE_HEIGHT})
+        self.data = data
+        if follow:
+            Clock.schedule_once(lambda dt: setattr(self, 'scroll_y', 0), 0)
@@ -15,10 +15,16 @@ from kivymd.uix.dialog import MDDialog
 from kivymd.uix.label import MDLabel
 from kivymd.uix.list import MDList, ThreeLineAvatarIconListItem, IconRightWidget, IconLeftWidget
 from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.selectioncontrol import MDCheckbox
 from kivy.metrics import dp
-import database
+from kivy.clock import Clock
+from voicessh import database
+from voicessh import db_writer
+from voicessh import transport
 import json
 import os
+import shutil
+import threading
 from kivymd.uix.filemanager import MDFileManager
 
 class SettingsScreen(Screen):
@@ -27,6 +33,7 @@ class SettingsScreen(Screen):
         super().__init__(**kwargs)
         self.file_manager = None
         self.manager_mode = None  # 'import' or 'export'
+        self.export_source = None  # Αρχείο για export αντί της βάσης (βλ. export_file)
         self.build_ui()
 
     def build_ui(self):
@@ -39,6 +46,7 @@ class SettingsScreen(Screen):
         self.toolbar.right_action_items = [
             ["database-export", lambda x: self.export_db()],
             ["database-import", lambda x: self.import_db_dialog()],
+            ["speedometer", lambda x: self.calibrate_transport()],
             ["plus", lambda x: self.add_connection()]
         ]
         layout.add_widget(self.toolbar)
@@ -99,12 +107,22 @@ class SettingsScreen(Screen):
         self.dialog.open()
 
     def do_delete(self, alias):
-        database.delete_ssh_connection(alias)
+        # Η εγγραφή γίνεται στο thread του writer· η λίστα ανανεώνεται μετά το commit
+        db_writer.submit(database.delete_ssh_connection, alias, callback=lambda future: self.refresh_list())
         self.dialog.dismiss()
-        self.refresh_list()
 
     def export_db(self):
         """Άνοιγμα του file manager για επιλογή φακέλου εξαγωγής."""
+        self.export_source = None
+        self.open_file_manager(self.export_directory(), mode='export')
+
+    def export_file(self, source_path):
+        """Εξαγωγή ενός αρχείου της εφαρμογής (π.χ. profiling) με τον ίδιο file manager."""
+        self.export_source = source_path
+        self.open_file_manager(self.export_directory(), mode='export')
+
+    def export_directory(self):
+        """Ο αρχικός φάκελος του export (στο Android: Documents)."""
         path = "."
         if platform == 'android':
             try:
@@ -116,8 +134,7 @@ class SettingsScreen(Screen):
             except Exception:
                 from android.storage import primary_external_storage_path
                 path = primary_external_storage_path()
-
-        self.open_file_manager(path, mode='export')
+        return path
 
     def open_file_manager(self, path, mode='import'):
         self.manager_mode = mode
@@ -142,11 +159,12 @@ class SettingsScreen(Screen):
         
         if self.manager_mode == 'export':
             # Για export, ο χρήστης επιλέγει φάκελο
-            if os.path.isdir(path):
-                self.do_export_to_path(path, "commands_backup.json")
+            # Αν επέλεξε αρχείο, παίρνουμε τον φάκελο του
+            directory = path if os.path.isdir(path) else os.path.dirname(path)
+            if self.export_source:
+                self.do_copy_to_path(directory, self.export_source)
             else:
-                # Αν επέλεξε αρχείο, παίρνουμε τον φάκελο του
-                self.do_export_to_path(os.path.dirname(path), "commands_backup.json")
+                self.do_export_to_path(directory, "commands_backup.json")
         else:
             # Για import, ο χρήστης επιλέγει αρχείο
             if os.path.isfile(path) and path.endswith('.json'):
@@ -172,6 +190,18 @@ class SettingsScreen(Screen):
         except Exception as e:
             self.show_info_dialog("Σφάλμα Export", str(e))
 
+    def do_copy_to_path(self, directory, source_path):
+        """Αντιγραφή ενός αρχείου της εφαρμογής στον φάκελο που επιλέχθηκε."""
+        try:
+            full_path = os.path.join(directory, os.path.basename(source_path))
+            shutil.copyfile(source_path, full_path)
+            self.show_info_dialog(
+                "Επιτυχία Export",
+                f"Το αρχείο αποθηκεύτηκε στο:\n{full_path}"
+            )
+        except Exception as e:
+            self.show_info_dialog("Σφάλμα Export", str(e))
+
     def import_db_dialog(self):
         """Άνοιγμα του file manager για επιλογή αρχείου εισαγωγής."""
         path = "."
@@ -286,15 +316,49 @@ class SettingsScreen(Screen):
             # Χρήση του helper για να διαβάσουμε το αρχείο (υποστηρίζει content:// URIs)
             content = self.read_file_content(file_path)
             data = json.loads(content)
-            
-            success = database.import_db_data(data, mode)
-            if success:
-                self.show_info_dialog("Επιτυχία", "Η εισαγωγή ολοκληρώθηκε επιτυχώς!")
-                self.refresh_list()
-            else:
-                self.show_info_dialog("Σφάλμα", "Αποτυχία κατά την εισαγωγή στη βάση.")
         except Exception as e:
             self.show_info_dialog("Σφάλμα Import", str(e))
+            return
+        db_writer.submit(database.import_db_data, data, mode, callback=self.on_imported)
+
+    def on_imported(self, future):
+        """Μετά το commit της εισαγωγής (στο UI thread)."""
+        try:
+            success = future.result()
+        except Exception as e:
+            self.show_info_dialog("Σφάλμα Import", str(e))
+            return
+        if success:
+            self.show_info_dialog("Επιτυχία", "Η εισαγωγή ολοκληρώθηκε επιτυχώς!")
+            self.refresh_list()
+        else:
+            self.show_info_dialog("Σφάλμα", "Αποτυχία κατά την εισαγωγή στη βάση.")
+
+    def calibrate_transport(self):
+        """
+        Βαθμονόμηση των SSH αλγορίθμων για τη συσκευή (βλ. voicessh/calibrate.py).
+        Τρέχει σε background thread· διαρκεί μερικά δευτερόλεπτα.
+        """
+        progress = MDDialog(title="Βαθμονόμηση SSH", text="Μέτρηση αλγορίθμων...")
+        progress.open()
+
+        def update(message):
+            Clock.schedule_once(lambda dt: setattr(progress, 'text', f"Μέτρηση: {message}"), 0)
+
+        def work():
+            from voicessh import calibrate
+            try:
+                profile = calibrate.calibrate_and_save(progress=update)
+                title, text = "Βαθμονόμηση ολοκληρώθηκε", calibrate.format_summary(profile)
+            except Exception as e:
+                title, text = "Σφάλμα βαθμονόμησης", str(e)
+
+            def done(dt):
+                progress.dismiss()
+                self.show_info_dialog(title, text)
+            Clock.schedule_once(done, 0)
+
+        threading.Thread(target=work, daemon=True).start()
 
     def show_info_dialog(self, title, text):
         """Βοηθητικό dialog για μηνύματα."""
@@ -361,6 +425,20 @@ class ConnectionEditScreen(Screen):
         )
         form.add_widget(self.pass_input)
 
+        self.via_input = MDTextField(
+            hint_text="Via (jump host)",
+            helper_text="Alias σύνδεσης μέσω της οποίας περνάμε (Optional)",
+            helper_text_mode="on_focus"
+        )
+        form.add_widget(self.via_input)
+
+        # Compression: χρήσιμο σε αργές (mobile) γραμμές, κοστίζει CPU σε γρήγορες
+        compression_row = MDBoxLayout(orientation='horizontal', size_hint_y=None, height=dp(48))
+        self.compression_check = MDCheckbox(size_hint=(None, None), size=(dp(48), dp(48)))
+        compression_row.add_widget(self.compression_check)
+        compression_row.add_widget(MDLabel(text="Compression (για αργές συνδέσεις)"))
+        form.add_widget(compression_row)
+
         self.error_lbl = MDLabel(text="", theme_text_color="Error", halign="center")
         form.add_widget(self.error_lbl)
 
@@ -383,6 +461,8 @@ class ConnectionEditScreen(Screen):
                 self.port_input.text = str(data['port'])
                 self.user_input.text = data['username']
                 self.pass_input.text = data['password'] or ""
+                self.compression_check.active = bool(data['compression'])
+                self.via_input.text = data['via'] or ""
         else:
             self.toolbar.title = "Νέα Σύνδεση"
             self.alias_input.text = ""
@@ -390,6 +470,8 @@ class ConnectionEditScreen(Screen):
             self.port_input.text = "22"
             self.user_input.text = ""
             self.pass_input.text = ""
+            self.compression_check.active = False
+            self.via_input.text = ""
 
     def go_back(self):
         self.manager.current = 'settings'
@@ -400,6 +482,7 @@ class ConnectionEditScreen(Screen):
         port = self.port_input.text.strip()
         user = self.user_input.text.strip()
         password = self.pass_input.text.strip()
+        via = self.via_input.text.strip() or None
 
         if not alias or not host or not user:
             self.error_lbl.text = "Συμπληρώστε Alias, Host και Username."
@@ -409,7 +492,43 @@ class ConnectionEditScreen(Screen):
             self.error_lbl.text = "Το Port πρέπει να είναι αριθμός."
             return
 
-        success = database.save_ssh_connection(alias, host, int(port), user, password, old_alias=self.old_alias)
+        if via is not None:
+            if via in (alias, self.old_alias):
+                self.error_lbl.text = "Μια σύνδεση δεν μπορεί να περνάει από τον εαυτό της."
+                return
+            if database.get_ssh_connection(via) is None:
+                self.error_lbl.text = f"Δεν υπάρχει σύνδεση με alias \"{via}\"."
+                return
+
+            def lookup(name):
+                # Οι jump hosts που περνούν από την παλιά ονομασία αυτής της σύνδεσης
+                # θα περνούν από τη νέα (το via κρατιέται ως id)
+                conn = database.get_ssh_connection(name)
+                if conn is not None and self.old_alias and conn.get('via') == self.old_alias:
+                    conn['via'] = alias
+                return conn
+
+            # Ολόκληρη η αλυσίδα: και οι κύκλοι μέσω άλλων συνδέσεων (A → B → A)
+            try:
+                transport.check_via_chain(alias, via, lookup)
+            except transport.ConfigError as e:
+                self.error_lbl.text = str(e)
+                return
+
+        # Η εγγραφή γίνεται στο thread του writer (βλ. voicessh/db_writer.py)
+        db_writer.submit(
+            database.save_ssh_connection,
+            alias, host, int(port), user, password, old_alias=self.old_alias,
+            compression=self.compression_check.active, via=via, callback=self.on_saved
+        )
+
+    def on_saved(self, future):
+        """Μετά το commit της αποθήκευσης (στο UI thread)."""
+        try:
+            success = future.result()
+        except Exception as e:
+            self.error_lbl.text = f"Σφάλμα αποθήκευσης: {e}"
+            return
         if success:
             self.manager.current = 'settings'
         else:
@@ -0,0 +1,145 @@
+# tests/test_daemon.py
+"""
+End-to-end δοκιμές του daemon: πραγματικός HTTP server (daemon.make_server) και
+πραγματικές SSH συνδέσεις προς το stub_server, σε προσωρινή βάση.
+
+    python -m pytest tests
+"""
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from voicessh import cancel as cancellation
+from voicessh import database
+from voicessh import results as exec_results
+from voicessh.client import DaemonClient, DaemonError
+from voicessh.daemon import make_server
+from voicessh.stub_server import StubSSHServer
+
+
+def _handler(command):
+    """Όπως το psexec -d· οι εντολές 'slow.exe' αργούν (για την ακύρωση)."""
+    if 'slow.exe' in command:
+        time.sleep(5)
+    return '', 'started on STUB with process ID 4242.\r\n', 0
+
+
+class DaemonEndToEndTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.pop('VOICESSH_DAEMON_TOKEN', None)
+        cls.workdir = tempfile.mkdtemp(prefix='voicessh-test-')
+        cls.db_path = database.DB_PATH
+        database.DB_PATH = os.path.join(cls.workdir, 'commands.db')
+        database.init_db()
+
+        cls.stub = StubSSHServer(handler=_handler).start()
+        database.save_ssh_connection('Stub', cls.stub.host, cls.stub.port, 'user', 'pass')
+        database.add_command('σημειώσεις δοκιμής', 'notepad.exe', ['Stub'])
+        database.add_command('αργή δοκιμή', 'slow.exe', ['Stub'])
+
+        cls.server = make_server(port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.client = DaemonClient(cls.server.server_address)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server.execution_daemon.close()
+        cls.stub.stop()
+        database.DB_PATH = cls.db_path
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+
+    def _post(self, body, headers=None, token=True):
+        """POST /run χωρίς τον DaemonClient. Returns: (status, σώμα)."""
+        host, port = self.server.server_address
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        request_headers = {'Content-Type': 'application/json'}
+        if token:
+            request_headers['X-VoiceSSH-Token'] = self.server.token
+        request_headers.update(headers or {})
+        try:
+            conn.request('POST', '/run', body=body, headers=request_headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def test_token_is_written_next_to_the_database(self):
+        with open(database.daemon_token_path()) as f:
+            self.assertEqual(f.read(), self.server.token)
+        self.assertTrue(self.client.available())
+
+    def test_run_by_text(self):
+        events = list(self.client.run(text='σημειώσεις δοκιμής'))
+        self.assertEqual([event['event'] for event in events], ['start', 'result', 'done'])
+        self.assertEqual(events[1]['server'], 'Stub')
+        self.assertTrue(events[1]['ok'], events[1])
+        self.assertEqual(events[1]['result']['pid'], 4242)
+        self.assertTrue(events[2]['ok'])
+        self.assertIn('psexec -i 1 -u user -p pass -d -accepteula notepad.exe', self.stub.commands)
+
+    def test_connections_are_pooled(self):
+        list(self.client.run(executable='calc.exe', servers=['Stub']))
+        connections = self.stub.connections
+        list(self.client.run(executable='calc.exe', servers=['Stub']))
+        self.assertEqual(self.stub.connections, connections)
+        self.assertGreater(self.client.health()['pool']['reuses'], 0)
+
+    def test_unknown_server(self):
+        events = list(self.client.run(executable='calc.exe', servers=['Stub', 'Άγνωστος']))
+        results = {event['server']: event['result'] for event in events if event['event'] == 'result'}
+        self.assertTrue(results['Stub']['ok'])
+        self.assertEqual(results['Άγνωστος']['error'], exec_results.NOT_CONFIGURED)
+
+    def test_unknown_command(self):
+        with self.assertRaises(DaemonError) as ctx:
+            list(self.client.run(text='καμία τέτοια εντολή'))
+        self.assertTrue(str(ctx.exception).startswith('400'))
+
+    def test_invalid_bodies_are_rejected(self):
+        bodies = [
+            b'[]', b'"x"', b'1', b'not json',
+            b'{"text": 5}',
+            b'{"executable": "x.exe", "servers": "Stub"}',
+            b'{"executable": "x.exe", "servers": [1]}',
+            b'{"executable": "x.exe", "servers": ["Stub"], "retry": {"retry_on": 5}}',
+            b'{"executable": "x.exe", "servers": ["Stub"], "retry": {"retry_on": null}}',
+            b'{"executable": "x.exe", "servers": ["Stub"], "cache_ttl": -1}',
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                status, response = self._post(body)
+                self.assertEqual(status, 400)
+                self.assertIn('error', json.loads(response))
+
+    def test_requests_from_browsers_are_rejected(self):
+        body = b'{"executable": "x.exe", "all_servers": true}'
+        self.assertEqual(self._post(body, token=False)[0], 403)
+        self.assertEqual(self._post(body, {'Content-Type': 'text/plain'})[0], 415)
+        self.assertEqual(self._post(body, {'Host': 'rebind.example:8765'})[0], 403)
+        self.assertNotIn('psexec -i 1 -u user -p pass -d -accepteula x.exe', self.stub.commands)
+
+    def test_cancel(self):
+        token = cancellation.CancelToken()
+        threading.Timer(0.5, token.cancel, ('Διακοπή',)).start()
+        start = time.monotonic()
+        events = list(self.client.run(text='αργή δοκιμή', cancel=token))
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertNotIn('done', [event['event'] for event in events])
+        # Το daemon σταματά την εκτέλεση του αιτήματος μόλις κλείσει η σύνδεση
+        deadline = time.monotonic() + 3
+        while self.server.execution_daemon.running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.server.execution_daemon.running, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# tests/test_transport.py
+"""
+Δοκιμές του transport χωρίς δίκτυο: η εντολή PsExec που στέλνεται στον host και ο
+έλεγχος των αλυσίδων jump hosts.
+
+    python -m pytest tests
+"""
+import unittest
+
+from voicessh.transport import MAX_VIA_DEPTH, ConfigError, build_psexec_command, check_via_chain
+
+PREFIX = 'psexec -i 1 -u user -p pass -d -accepteula '
+
+
+class BuildPsexecCommandTest(unittest.TestCase):
+    def assertSent(self, cmd, expected):
+        self.assertEqual(build_psexec_command(cmd, 'user', 'pass'), PREFIX + expected)
+
+    def test_plain_commands_are_unchanged(self):
+        self.assertSent('notepad.exe', 'notepad.exe')
+        self.assertSent('start calc.exe', 'calc.exe')
+        self.assertSent('nircmd setsysvolume 30', 'nircmd setsysvolume 30')
+
+    def test_path_with_spaces_is_quoted(self):
+        self.assertSent(r'C:\Program Files\App\app.exe', r'"C:\Program Files\App\app.exe"')
+        self.assertSent(r'start C:\My Tools\run.bat', r'"C:\My Tools\run.bat"')
+        self.assertSent(r'\\nas\shared apps\setup.exe', r'"\\nas\shared apps\setup.exe"')
+
+    def test_only_the_executable_is_quoted(self):
+        self.assertSent(r'C:\Program Files\x\tool.exe 30', r'"C:\Program Files\x\tool.exe" 30')
+        self.assertSent(r'C:\Program Files\x\tool.exe "a b"', r'"C:\Program Files\x\tool.exe" "a b"')
+        self.assertSent(r'\\nas\shared apps\setup.exe /quiet', r'"\\nas\shared apps\setup.exe" /quiet')
+
+    def test_match_does_not_span_a_leading_command(self):
+        self.assertSent(r'cmd /c C:\my dir\run.bat', r'cmd /c C:\my dir\run.bat')
+
+    def test_path_without_extension_is_quoted_whole(self):
+        self.assertSent(r'C:\Program Files\My App\app', r'"C:\Program Files\My App\app"')
+
+    def test_quoted_commands_are_unchanged(self):
+        self.assertSent(r'"C:\Program Files\App\app.exe"', r'"C:\Program Files\App\app.exe"')
+        self.assertSent(r'"C:\Program Files\x\tool.exe" 30', r'"C:\Program Files\x\tool.exe" 30')
+        self.assertSent(r'C:\Program Files\My App\app "x"', r'C:\Program Files\My App\app "x"')
+
+
+
+class CheckViaChainTest(unittest.TestCase):
+    def check(self, alias, via, connections):
+        return check_via_chain(alias, via, lambda name: {'via': connections[name]} if name in connections else None)
+
+    def test_valid_chain(self):
+        self.assertEqual(self.check('A', 'B', {'B': 'C', 'C': None}), ('A', 'B', 'C'))
+        self.assertEqual(self.check('A', None, {}), ('A',))
+
+    def test_self_reference(self):
+        with self.assertRaisesRegex(ConfigError, 'Κυκλική'):
+            self.check('A', 'A', {'A': None})
+
+    def test_multi_hop_cycle(self):
+        with self.assertRaisesRegex(ConfigError, 'A → B → A'):
+            self.check('A', 'B', {'B': 'A', 'A': 'B'})
+        with self.assertRaisesRegex(ConfigError, 'A → B → C → A'):
+            self.check('A', 'B', {'B': 'C', 'C': 'A', 'A': 'B'})
+
+    def test_cycle_not_through_the_saved_connection(self):
+        with self.assertRaisesRegex(ConfigError, 'B → C → B'):
+            self.check('A', 'B', {'B': 'C', 'C': 'B'})
+
+    def test_unknown_jump_host(self):
+        with self.assertRaisesRegex(ConfigError, 'Άγνωστος'):
+            self.check('A', 'B', {'B': 'X'})
+
+    def test_too_long_chain(self):
+        connections = {f'H{i}': f'H{i + 1}' for i in range(MAX_VIA_DEPTH + 2)}
+        connections[f'H{MAX_VIA_DEPTH + 2}'] = None
+        with self.assertRaisesRegex(ConfigError, 'Πολύ μεγάλη'):
+            self.check('A', 'H0', connections)
+
+
+if __name__ == '__main__':
+    unittest.main()
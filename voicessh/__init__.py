@@ -0,0 +1,5 @@
+# voicessh/__init__.py
+"""
+Ο πυρήνας εκτέλεσης του VoiceSSH (βάση, SSH transport, dispatch), χωρίς εξάρτηση από το Kivy.
+Τον χρησιμοποιούν η εφαρμογή (main.py) και το CLI (voicessh.cli).
+"""
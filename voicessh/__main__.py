@@ -0,0 +1,7 @@
+# voicessh/__main__.py
+"""python -m voicessh"""
+import sys
+
+from voicessh.cli import main
+
+sys.exit(main())
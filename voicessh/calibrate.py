@@ -0,0 +1,161 @@
+# voicessh/calibrate.py
+"""
+Βαθμονόμηση των SSH αλγορίθμων για τη CPU της συσκευής.
+
+Σε αδύναμα ARM κινητά το key exchange και ο cipher κυριαρχούν στον χρόνο
+σύνδεσης. Η βαθμονόμηση μετράει τοπικά, απέναντι στον in-process stub server
+(βλ. stub_server.py), κάθε ασφαλή υποψήφιο αλγόριθμο:
+    kex:     χρόνος handshake (connect + auth)
+    ciphers: ρυθμός μεταφοράς εξόδου (MB/s)
+    macs:    ρυθμός μεταφοράς με σταθερό cipher (MB/s)
+και αποθηκεύει το profile της συσκευής (όλοι οι ασφαλείς αλγόριθμοι, οι
+ταχύτεροι πρώτοι) στο app_settings. Οι συνδέσεις χωρίς δικούς τους αλγορίθμους
+το χρησιμοποιούν αυτόματα· αν ο server δεν υποστηρίζει τον ταχύτερο,
+η διαπραγμάτευση πέφτει στον επόμενο της λίστας.
+
+Το compression δεν βαθμονομείται: εξαρτάται από τη γραμμή, όχι από τη CPU,
+και ορίζεται ανά σύνδεση.
+"""
+import statistics
+import time
+from datetime import datetime
+
+from voicessh import database
+from voicessh.stub_server import StubSSHServer
+from voicessh.transport import PROFILE_SETTING, open_client
+
+# Υποψήφιοι αλγόριθμοι: μόνο ασφαλείς (χωρίς CBC, 3DES, SHA-1, MD5, group1/group-exchange)
+SECURE_KEX = (
+    'curve25519-sha256@libssh.org',
+    'ecdh-sha2-nistp256',
+    'ecdh-sha2-nistp384',
+    'ecdh-sha2-nistp521',
+    'diffie-hellman-group16-sha512',
+    'diffie-hellman-group14-sha256',
+)
+SECURE_CIPHERS = (
+    'aes128-ctr',
+    'aes192-ctr',
+    'aes256-ctr',
+    'aes128-gcm@openssh.com',
+    'aes256-gcm@openssh.com',
+)
+SECURE_MACS = (
+    'hmac-sha2-256-etm@openssh.com',
+    'hmac-sha2-512-etm@openssh.com',
+    'hmac-sha2-256',
+    'hmac-sha2-512',
+)
+
+# Cipher με τον οποίο μετριούνται τα MACs (τα GCM δεν χρησιμοποιούν MAC)
+MAC_REFERENCE_CIPHER = 'aes128-ctr'
+
+DEFAULT_ROUNDS = 3
+DEFAULT_PAYLOAD_BYTES = 1 << 20
+
+
+def _supported(candidates, field):
+    """Οι υποψήφιοι που υποστηρίζει η εγκατεστημένη έκδοση του paramiko."""
+    import paramiko
+    available = getattr(paramiko.Transport, f'_preferred_{field}')
+    return [name for name in candidates if name in available]
+
+
+def _handshake_ms(stub, conn_details):
+    timings = {}
+    client = open_client(conn_details, timings)
+    client.close()
+    return timings['connect'] + timings['auth']
+
+
+def _throughput_mbps(stub, conn_details, payload_bytes):
+    client = open_client(conn_details)
+    try:
+        start = time.perf_counter()
+        _, stdout, _ = client.exec_command('payload')
+        received = 0
+        while True:
+            chunk = stdout.read(32768)
+            if not chunk:
+                break
+            received += len(chunk)
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+    return received / elapsed / 1e6
+
+
+def calibrate(rounds=DEFAULT_ROUNDS, payload_bytes=DEFAULT_PAYLOAD_BYTES, progress=None):
+    """
+    Μετράει τους υποψήφιους αλγορίθμους και επιστρέφει το profile της συσκευής.
+    progress: προαιρετικό callback(μήνυμα) για κάθε αλγόριθμο.
+    Returns: {'kex': [...], 'ciphers': [...], 'macs': [...],
+              'measurements': {'kex': {όνομα: ms}, 'ciphers': {όνομα: MB/s}, 'macs': {όνομα: MB/s}},
+              'calibrated_at': ISO χρόνος}
+    """
+    payload = b'\0' * payload_bytes
+    stub = StubSSHServer(handler=lambda command: (payload, '', 0)).start()
+    base = {'host': stub.host, 'port': stub.port,
+            'username': stub.username, 'password': stub.password}
+    measurements = {'kex': {}, 'ciphers': {}, 'macs': {}}
+    try:
+        # Το πρώτο handshake πληρώνει τη δημιουργία του host key του stub
+        _handshake_ms(stub, base)
+
+        for name in _supported(SECURE_KEX, 'kex'):
+            if progress:
+                progress(f'kex {name}')
+            conn = dict(base, kex=name)
+            measurements['kex'][name] = statistics.median(
+                _handshake_ms(stub, conn) for _ in range(rounds))
+
+        for name in _supported(SECURE_CIPHERS, 'ciphers'):
+            if progress:
+                progress(f'cipher {name}')
+            conn = dict(base, ciphers=name)
+            measurements['ciphers'][name] = statistics.median(
+                _throughput_mbps(stub, conn, payload_bytes) for _ in range(rounds))
+
+        for name in _supported(SECURE_MACS, 'macs'):
+            if progress:
+                progress(f'mac {name}')
+            conn = dict(base, ciphers=MAC_REFERENCE_CIPHER, macs=name)
+            measurements['macs'][name] = statistics.median(
+                _throughput_mbps(stub, conn, payload_bytes) for _ in range(rounds))
+    finally:
+        stub.stop()
+
+    kex = measurements['kex']
+    ciphers = measurements['ciphers']
+    macs = measurements['macs']
+    return {
+        'kex': sorted(kex, key=kex.get),
+        'ciphers': sorted(ciphers, key=ciphers.get, reverse=True),
+        'macs': sorted(macs, key=macs.get, reverse=True),
+        'measurements': {field: {name: round(value, 2) for name, value in values.items()}
+                         for field, values in measurements.items()},
+        'calibrated_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def calibrate_and_save(**kwargs):
+    """Βαθμονόμηση και αποθήκευση ως profile της συσκευής. Returns: το profile."""
+    profile = calibrate(**kwargs)
+    database.set_app_setting(PROFILE_SETTING, profile)
+    return profile
+
+
+def format_summary(profile):
+    """Σύντομη περιγραφή για το UI/CLI."""
+    measurements = profile['measurements']
+    lines = []
+    if profile['kex']:
+        best = profile['kex'][0]
+        lines.append(f"KEX: {best} ({measurements['kex'][best]:.0f} ms)")
+    if profile['ciphers']:
+        best = profile['ciphers'][0]
+        lines.append(f"Cipher: {best} ({measurements['ciphers'][best]:.0f} MB/s)")
+    if profile['macs']:
+        best = profile['macs'][0]
+        lines.append(f"MAC: {best} ({measurements['macs'][best]:.0f} MB/s)")
+    return '\n'.join(lines)
@@ -0,0 +1,108 @@
+# voicessh/cancel.py
+"""
+Ακύρωση εκτελέσεων σε εξέλιξη (κουμπί διακοπής, back, νέα φωνητική εντολή).
+
+    token = CancelToken()
+    dispatch.run_on_servers(executable, aliases, cancel=token)   # σε άλλο thread
+    token.cancel('Διακοπή από τον χρήστη')
+
+Ό,τι μπλοκάρει (TCP connect, SSH handshake, ανάγνωση channel) δηλώνεται με
+closing(token, resource): στο cancel() το resource διακόπτεται αμέσως από το
+thread που ακυρώνει (shutdown για sockets, close για channels/clients), οπότε
+το blocking call αποτυγχάνει τώρα αντί μετά το timeout των 10 s. Όποιος δει
+το σφάλμα ελέγχει το token.cancelled και αναφέρει CANCELLED.
+"""
+import contextlib
+import socket
+import threading
+
+
+class CancelToken:
+    """Thread-safe σημαία ακύρωσης με callbacks που τρέχουν μία φορά, στο cancel()."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._next_key = 0
+        self.reason = ''
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason=''):
+        """Ακυρώνει (μία φορά). Returns: False αν είχε ήδη ακυρωθεί."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f'Cancel: σφάλμα στο callback: {e}')
+        return True
+
+    def on_cancel(self, callback):
+        """
+        Καλεί το callback() στο cancel(), ή αμέσως αν έχει ήδη γίνει.
+        Returns: συνάρτηση που αφαιρεί το callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                key = self._next_key
+                self._next_key += 1
+                self._callbacks[key] = callback
+
+                def remove():
+                    with self._lock:
+                        self._callbacks.pop(key, None)
+                return remove
+        callback()
+        return lambda: None
+
+    def wait(self, timeout=None):
+        """Όπως το time.sleep(timeout), αλλά επιστρέφει αμέσως στο cancel(). Returns: cancelled."""
+        return self._event.wait(timeout)
+
+
+def abort(resource):
+    """Διακόπτει το blocking I/O ενός socket, paramiko Channel ή SSHClient από άλλο thread."""
+    try:
+        if isinstance(resource, socket.socket):
+            # shutdown και όχι close: το fd μένει δικό του thread (δεν ξαναδίνεται σε άλλο
+            # socket όσο αυτό είναι ακόμα μέσα σε connect/recv), που το κλείνει όπως πάντα
+            resource.shutdown(socket.SHUT_RDWR)
+        else:
+            resource.close()
+    except OSError:
+        pass
+
+
+def closing(token, resource):
+    """
+    Context manager: αν το token ακυρωθεί μέσα στο block, το resource διακόπτεται
+    (βλ. abort). Χωρίς token (None) δεν κάνει τίποτα.
+    """
+    if token is None:
+        return contextlib.nullcontext(resource)
+    return _Guard(token, resource)
+
+
+class _Guard:
+    def __init__(self, token, resource):
+        self.token = token
+        self.resource = resource
+        self.remove = None
+
+    def __enter__(self):
+        self.remove = self.token.on_cancel(lambda: abort(self.resource))
+        return self.resource
+
+    def __exit__(self, *exc):
+        self.remove()
+        return False
@@ -0,0 +1,399 @@
+# voicessh/cli.py
+"""
+Headless CLI: εκτέλεση εντολών του καταλόγου χωρίς το Kivy (desktop, cron, scripts).
+
+Χρήση:
+    voicessh run σημειώσεις
+    voicessh run --all-servers --json ένταση τριάντα
+    voicessh run --fresh δίκτυο
+    voicessh list [--json]
+    voicessh scenes [--json]
+    voicessh outbox [--json] [--deliver] [--cancel [--server ALIAS]]
+    voicessh history [--json] [--server ALIAS] [--limit N] [--show ID]
+    voicessh export [αρχείο.json]
+    voicessh import αρχείο.json [--replace]
+    voicessh daemon [--port 8765]
+    voicessh calibrate [--json]
+    voicessh metrics [--json] [--local]   (του daemon, ή το αρχείο δίπλα στη βάση, βλ. metrics.py)
+    voicessh --profile [--profile-output αρχείο.folded] run ...   (sampling profiler, βλ. profiler.py)
+
+Αν τρέχει το daemon, το run εκτελείται μέσα από αυτό (κοινές, ήδη ανοιχτές
+συνδέσεις)· με --local ή --db η εκτέλεση γίνεται πάντα τοπικά.
+Αν το κείμενο είναι όνομα σκηνής, εκτελούνται τα βήματά της (βλ. scenes.py).
+
+Exit codes: 0 επιτυχία, 1 αποτυχία σε κάποιον server, 2 άγνωστη εντολή/λάθος χρήση.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from voicessh import database
+from voicessh import dispatch
+from voicessh import history
+from voicessh import metrics
+from voicessh import result_cache
+from voicessh import retry
+from voicessh import scenes
+from voicessh.client import DaemonClient, DaemonError
+from voicessh.results import ExecResult, format_label
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def _print_json(data):
+    json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write('\n')
+
+
+def _run_local(text, args):
+    """Returns: (εντολή, iterator από (alias, ExecResult)) ή (None, μήνυμα σφάλματος)."""
+    cmd = database.match_command(text)
+    if cmd is None:
+        return None, f'Άγνωστη εντολή: "{text}"'
+
+    if args.all_servers:
+        aliases = database.get_connection_aliases()
+    elif args.server:
+        aliases = args.server
+    else:
+        aliases = cmd['aliases']
+    if not aliases:
+        return None, f'Η εντολή "{cmd["name"]}" δεν έχει servers'
+    if args.fresh:
+        for alias in aliases:
+            result_cache.default_cache.invalidate(cmd['executable'], alias)
+    return cmd, dispatch.iter_results(cmd['executable'], aliases, cache_ttl=cmd['cache_ttl'],
+                                      outbox_ttl=cmd['outbox_ttl'], command_name=cmd['name'],
+                                      retry=retry.policy_for(cmd), max_parallel=args.max_parallel)
+
+
+def _run_daemon(text, args, client):
+    """Όπως το _run_local, αλλά η εκτέλεση γίνεται από το daemon."""
+    try:
+        events = client.run(text=text, servers=args.server, all_servers=args.all_servers,
+                            fresh=args.fresh)
+        start = next(events)
+    except DaemonError as e:
+        return None, str(e)
+    cmd = {'name': start['command'], 'executable': start['executable'], 'slots': start['slots']}
+    results = ((event['server'], ExecResult.from_dict(event['result']))
+               for event in events if event['event'] == 'result')
+    return cmd, results
+
+
+def _run_scene(scene, args, use_daemon):
+    """Εκτέλεση σκηνής: τα βήματα τυπώνονται όπως ολοκληρώνονται."""
+    if args.server or args.all_servers:
+        print(f'Η σκηνή "{scene["name"]}" ορίζει τους δικούς της servers', file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        outcomes = scenes.iter_scene(scene, use_daemon=use_daemon)
+        entries = []
+        for step, results in outcomes:
+            ok = results is not None and scenes.step_ok(results)
+            entries.append({
+                'step': step['key'],
+                'command': step['command'],
+                'ok': ok,
+                'skipped': results is None,
+                'results': [result.to_dict() for result in (results or {}).values()],
+            })
+            if not args.json:
+                print(scenes.format_step(step, results), end='', flush=True)
+    except scenes.SceneError as e:
+        print(f'Σφάλμα σκηνής: {e}', file=sys.stderr)
+        return EXIT_USAGE
+    failed = [entry for entry in entries if not entry['ok']]
+
+    if args.json:
+        _print_json({'scene': scene['name'], 'ok': not failed, 'steps': entries})
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_run(args):
+    text = ' '.join(args.text)
+    client = None if args.local or args.db else DaemonClient()
+    scene = database.match_scene(text)
+    if scene is not None:
+        return _run_scene(scene, args, use_daemon=client is not None)
+    if client is not None and client.available():
+        cmd, results = _run_daemon(text, args, client)
+    else:
+        cmd, results = _run_local(text, args)
+    if cmd is None:
+        print(results, file=sys.stderr)
+        return EXIT_USAGE
+
+    # Τα αποτελέσματα τυπώνονται όπως ολοκληρώνεται κάθε server
+    entries = []
+    for alias, result in results:
+        entries.append(result.to_dict())
+        if not args.json:
+            print(f'─── Server: {alias} ───')
+            print(format_label(result), flush=True)
+    failed = [entry for entry in entries if not entry['ok']]
+
+    if args.json:
+        _print_json({
+            'command': cmd['name'],
+            'executable': cmd['executable'],
+            'slots': cmd['slots'],
+            'ok': not failed,
+            'results': entries,
+        })
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_list(args):
+    commands = database.get_all_commands()
+    if args.json:
+        _print_json(commands)
+        return EXIT_OK
+    for cmd in commands:
+        print(f"{cmd['name']}\t{cmd['executable']}\t{', '.join(cmd['aliases'])}")
+    return EXIT_OK
+
+
+def cmd_scenes(args):
+    all_scenes = database.get_scenes()
+    if args.json:
+        _print_json(all_scenes)
+        return EXIT_OK
+    for scene in all_scenes:
+        print(scene['name'])
+        for step in scene['steps']:
+            servers = ', '.join(step['aliases']) or '(servers της εντολής)'
+            after = f"  μετά από: {', '.join(step['after'])}" if step['after'] else ''
+            print(f"  {step['key']}\t{step['command']}\t{servers}{after}")
+    return EXIT_OK
+
+
+def cmd_outbox(args):
+    from voicessh.outbox import OutboxWorker
+
+    if args.cancel:
+        count = database.outbox_cancel(args.server)
+        print(f'Ακυρώθηκαν {count} εντολές σε αναμονή', file=sys.stderr)
+        return EXIT_OK
+    if args.deliver:
+        # Ένα πέρασμα τώρα (π.χ. από cron), χωρίς να περιμένει το backoff
+        worker = OutboxWorker()
+        worker.wake()
+        delivered = worker.run_once()
+        worker.pool.close_all()
+        print(f'Παραδόθηκαν {delivered} εντολές', file=sys.stderr)
+
+    entries = database.outbox_entries(args.limit)
+    if args.json:
+        _print_json(entries)
+        return EXIT_OK
+    for entry in entries:
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created_at']))
+        expires = time.strftime('%H:%M', time.localtime(entry['expires_at']))
+        name = entry['command_name'] or entry['executable']
+        error = f"\t{entry['error']}" if entry['error'] else ''
+        print(f"{entry['status']}\t{entry['alias']}\t{name}\t{created} (λήξη {expires}){error}")
+    return EXIT_OK
+
+
+def cmd_history(args):
+    if args.show is not None:
+        entry = history.get(args.show)
+        if entry is None:
+            print(f'Δεν υπάρχει εκτέλεση {args.show}', file=sys.stderr)
+            return EXIT_USAGE
+        if args.json:
+            _print_json(entry)
+            return EXIT_OK
+        for key in ('executable', 'alias', 'status', 'exit_status', 'pid', 'message', 'timings'):
+            if entry[key] not in (None, '', {}):
+                print(f'{key}: {entry[key]}')
+        for stream in ('stdout', 'stderr'):
+            if entry[stream]:
+                print(f'--- {stream} ({entry[stream + "_bytes"]} bytes) ---\n{entry[stream]}')
+        return EXIT_OK
+
+    entries, _ = history.page(alias=args.server, limit=args.limit)
+    if args.json:
+        _print_json(entries)
+        return EXIT_OK
+    for entry in entries:
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['started_at']))
+        duration = (entry['finished_at'] - entry['started_at']) * 1000
+        name = entry['command_name'] or entry['executable']
+        print(f"{entry['id']}\t{started}\t{entry['alias']}\t{name}\t{entry['status']}\t{duration:.0f} ms")
+    return EXIT_OK
+
+
+def cmd_export(args):
+    data = database.export_db_data()
+    if args.file == '-':
+        _print_json(data)
+    else:
+        with open(args.file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+    return EXIT_OK
+
+
+def cmd_import(args):
+    try:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f'Σφάλμα ανάγνωσης: {e}', file=sys.stderr)
+        return EXIT_USAGE
+    with contextlib.redirect_stdout(sys.stderr):
+        success = database.import_db_data(data, 'replace' if args.replace else 'merge')
+    return EXIT_OK if success else EXIT_FAILED
+
+
+def cmd_daemon(args):
+    from voicessh import daemon
+    from voicessh.client import daemon_address
+
+    host, port = daemon_address()
+    daemon.serve(args.host or host, args.port or port,
+                 args.max_parallel or daemon.DEFAULT_MAX_PARALLEL)
+    return EXIT_OK
+
+
+def cmd_calibrate(args):
+    from voicessh import calibrate
+
+    def progress(message):
+        print(f'… {message}', file=sys.stderr)
+
+    run = calibrate.calibrate if args.no_save else calibrate.calibrate_and_save
+    profile = run(rounds=args.rounds, progress=progress)
+    if args.json:
+        _print_json(profile)
+    else:
+        print(calibrate.format_summary(profile))
+    return EXIT_OK
+
+
+def cmd_metrics(args):
+    """Οι μετρήσεις του daemon αν τρέχει, αλλιώς το αρχείο που γράφουν περιοδικά η εφαρμογή και το daemon."""
+    client = DaemonClient()
+    text = None
+    if not (args.local or args.db) and client.available():
+        try:
+            text = client.metrics()
+            print(f'Μετρήσεις του daemon ({client.host}:{client.port})', file=sys.stderr)
+        except DaemonError as e:
+            print(f'Σφάλμα daemon: {e}', file=sys.stderr)
+    if text is None:
+        path = metrics.metrics_path()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as e:
+            print(f'Δεν υπάρχουν μετρήσεις: {e}', file=sys.stderr)
+            return EXIT_FAILED
+        updated = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(path)))
+        print(f'Μετρήσεις από {path} (ενημέρωση {updated})', file=sys.stderr)
+    if args.json:
+        _print_json(metrics.parse(text))
+    else:
+        sys.stdout.write(text)
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='voicessh', description='VoiceSSH χωρίς γραφικό περιβάλλον')
+    parser.add_argument('--db', help='Αρχείο βάσης (default: VOICESSH_DB ή το commands.db της εφαρμογής)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Sampling profiler σε όλα τα threads (collapsed stacks για flamegraph)')
+    parser.add_argument('--profile-output', metavar='ΑΡΧΕΙΟ',
+                        help='Αρχείο του profile (default: profiles/ δίπλα στη βάση)')
+    sub = parser.add_subparsers(dest='action', required=True)
+
+    p = sub.add_parser('run', help='Εκτέλεση εντολής (όνομα, φράση ή παραμετρική)')
+    p.add_argument('text', nargs='+', help='Το κείμενο της εντολής, π.χ. "ένταση τριάντα"')
+    target = p.add_mutually_exclusive_group()
+    target.add_argument('--server', action='append', metavar='ALIAS', help='Server (επαναλαμβανόμενο)')
+    target.add_argument('--all-servers', action='store_true', help='Σε όλους τους αποθηκευμένους servers')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.add_argument('--local', action='store_true', help='Τοπική εκτέλεση ακόμα κι αν τρέχει το daemon')
+    p.add_argument('--fresh', action='store_true', help='Χωρίς απάντηση από την cache αποτελεσμάτων')
+    p.add_argument('--max-parallel', type=int, default=None,
+                   help='Μέγιστες ταυτόχρονες εκτελέσεις στην τοπική εκτέλεση (default: ρύθμιση max_parallel ή 16)')
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('list', help='Λίστα εντολών')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser('scenes', help='Λίστα σκηνών με τα βήματά τους')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.set_defaults(func=cmd_scenes)
+
+    p = sub.add_parser('outbox', help='Εντολές σε αναμονή για hosts που δεν ήταν διαθέσιμοι')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.add_argument('--limit', type=int, default=50, help='Πόσες εγγραφές (οι πιο πρόσφατες)')
+    p.add_argument('--deliver', action='store_true', help='Προσπάθεια παράδοσης τώρα')
+    p.add_argument('--cancel', action='store_true', help='Ακύρωση των εντολών σε αναμονή')
+    p.add_argument('--server', metavar='ALIAS', help='Μόνο για αυτόν τον server (με --cancel)')
+    p.set_defaults(func=cmd_outbox)
+
+    p = sub.add_parser('history', help='Ιστορικό εκτελέσεων (νεότερες πρώτα)')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.add_argument('--limit', type=int, default=history.PAGE_SIZE, help='Πόσες εκτελέσεις')
+    p.add_argument('--server', metavar='ALIAS', help='Μόνο για αυτόν τον server')
+    p.add_argument('--show', type=int, metavar='ID', help='Μια εκτέλεση με την έξοδό της')
+    p.set_defaults(func=cmd_history)
+
+    p = sub.add_parser('export', help='Εξαγωγή δεδομένων σε JSON')
+    p.add_argument('file', nargs='?', default='-', help='Αρχείο εξόδου (default: stdout)')
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('import', help='Εισαγωγή δεδομένων από JSON')
+    p.add_argument('file', help='Αρχείο JSON (όπως το παράγει το export)')
+    p.add_argument('--replace', action='store_true', help='Διαγραφή όλων πριν την εισαγωγή')
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser('daemon', help='Τοπικό daemon εκτέλεσης με κοινό pool συνδέσεων')
+    p.add_argument('--host', default=None, help='Διεύθυνση (default: 127.0.0.1)')
+    p.add_argument('--port', type=int, default=None, help='Θύρα (default: 8765 ή VOICESSH_DAEMON)')
+    p.add_argument('--max-parallel', type=int, default=None, help='Μέγιστες ταυτόχρονες εκτελέσεις')
+    p.set_defaults(func=cmd_daemon)
+
+    p = sub.add_parser('calibrate', help='Βαθμονόμηση SSH αλγορίθμων για αυτή τη συσκευή')
+    p.add_argument('--rounds', type=int, default=3, help='Μετρήσεις ανά αλγόριθμο')
+    p.add_argument('--no-save', action='store_true', help='Μόνο μέτρηση, χωρίς αποθήκευση του profile')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser('metrics', help='Μετρήσεις (εκτελέσεις, σφάλματα, χρόνοι, cache) σε format Prometheus')
+    p.add_argument('--json', action='store_true', help='Έξοδος σε JSON')
+    p.add_argument('--local', action='store_true', help='Το αρχείο δίπλα στη βάση ακόμα κι αν τρέχει το daemon')
+    p.set_defaults(func=cmd_metrics)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database.DB_PATH = args.db
+    # Τα μηνύματα migration πάνε στο stderr, ώστε το stdout να μένει καθαρό για JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        database.init_db()
+    if not args.profile:
+        return args.func(args)
+
+    from voicessh import profiler
+    profiler.start()
+    try:
+        return args.func(args)
+    finally:
+        path, samples = profiler.stop_and_save(args.profile_output)
+        print(f'Profile: {path} ({samples} δείγματα)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# voicessh/client.py
+"""
+Client για το τοπικό daemon (βλ. daemon.py).
+
+Η διεύθυνση του daemon ορίζεται με τη μεταβλητή περιβάλλοντος VOICESSH_DAEMON
+("host:port", default 127.0.0.1:8765). Το token είναι το VOICESSH_DAEMON_TOKEN
+αν έχει οριστεί, αλλιώς αυτό που έγραψε το daemon δίπλα στη βάση.
+"""
+import http.client
+import json
+import os
+import socket
+
+from voicessh import cancel as cancellation
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Timeout για τον έλεγχο αν τρέχει το daemon (localhost: απαντά αμέσως ή καθόλου)
+PROBE_TIMEOUT = 0.5
+
+# Timeout για μια εκτέλεση: οι SSH συνδέσεις έχουν δικά τους timeouts (10 sec ανά φάση)
+RUN_TIMEOUT = 120
+
+
+class DaemonError(Exception):
+    """Σφάλμα επικοινωνίας με το daemon ή απάντηση με σφάλμα."""
+
+
+def daemon_address():
+    """Returns: (host, port) από το VOICESSH_DAEMON ή τα defaults."""
+    value = os.environ.get('VOICESSH_DAEMON')
+    if not value:
+        return DEFAULT_HOST, DEFAULT_PORT
+    host, _, port = value.rpartition(':')
+    return host or DEFAULT_HOST, int(port)
+
+
+def daemon_token():
+    """Returns: το token του daemon (VOICESSH_DAEMON_TOKEN ή το αρχείο του daemon) ή None."""
+    from voicessh import database
+
+    token = os.environ.get('VOICESSH_DAEMON_TOKEN')
+    if token:
+        return token
+    try:
+        with open(database.daemon_token_path()) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+class DaemonClient:
+    def __init__(self, address=None, token=None):
+        self.host, self.port = address or daemon_address()
+        self.token = token if token is not None else daemon_token()
+
+    def _request(self, method, path, body=None, timeout=RUN_TIMEOUT):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['X-VoiceSSH-Token'] = self.token
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+        except OSError as e:
+            conn.close()
+            raise DaemonError(f'Το daemon δεν απαντά ({self.host}:{self.port}): {e}') from e
+        if response.status != 200:
+            try:
+                message = json.loads(response.read()).get('error', response.reason)
+            except ValueError:
+                message = response.reason
+            conn.close()
+            raise DaemonError(f'{response.status}: {message}')
+        return conn, response
+
+    def _get_json(self, path, timeout=RUN_TIMEOUT):
+        conn, response = self._request('GET', path, timeout=timeout)
+        try:
+            return json.loads(response.read())
+        finally:
+            conn.close()
+
+    def available(self):
+        """True αν το daemon τρέχει και απαντά."""
+        try:
+            self._get_json('/health', timeout=PROBE_TIMEOUT)
+            return True
+        except (DaemonError, ValueError):
+            return False
+
+    def health(self):
+        return self._get_json('/health')
+
+    def commands(self):
+        return self._get_json('/commands')
+
+    def metrics(self):
+        """Returns: οι μετρήσεις του daemon σε text format του Prometheus."""
+        conn, response = self._request('GET', '/metrics')
+        try:
+            return response.read().decode('utf-8')
+        finally:
+            conn.close()
+
+    def run(self, text=None, executable=None, servers=None, all_servers=False,
+            cache_ttl=None, fresh=False, outbox_ttl=None, command_name=None, retry=None, cancel=None):
+        """
+        Υποβάλλει μια εκτέλεση. Δίνεται είτε text (αναγνώριση όπως στο match_command)
+        είτε executable με servers.
+        cache_ttl: δευτερόλεπτα cache (None = το cache_ttl της εντολής για text, 0 για executable)
+        fresh: ακύρωση της cache πριν την εκτέλεση
+        outbox_ttl: όπως το cache_ttl, για την ουρά hosts που δεν είναι διαθέσιμοι (βλ. outbox.py)
+        command_name: το όνομα της εντολής για το outbox, όταν δίνεται executable
+        retry: πολιτική επανάληψης ως dict (RetryPolicy.to_dict()· None = της εντολής για
+        text, χωρίς επαναλήψεις για executable)
+        cancel: CancelToken· η ακύρωση κλείνει τη σύνδεση και το daemon σταματά τις εκτελέσεις
+        του αιτήματος (η ροή τελειώνει χωρίς τα υπόλοιπα events)
+        Yields: τα events του daemon όπως φτάνουν ('start', 'result' ανά server, 'done').
+        """
+        body = {'text': text, 'executable': executable,
+                'servers': servers, 'all_servers': all_servers,
+                'cache_ttl': cache_ttl, 'fresh': fresh,
+                'outbox_ttl': outbox_ttl, 'command_name': command_name, 'retry': retry}
+        conn, response = self._request('POST', '/run', body={k: v for k, v in body.items() if v})
+        # Αντίγραφο του socket της απάντησης, για το shutdown από το thread που ακυρώνει
+        sock = socket.socket(fileno=os.dup(response.fileno())) if cancel is not None else None
+        try:
+            with cancellation.closing(cancel, sock):
+                for line in response:
+                    if line.strip():
+                        yield json.loads(line)
+        except (OSError, http.client.HTTPException) as e:
+            if cancel is not None and cancel.cancelled:
+                return
+            raise DaemonError(f'Η σύνδεση με το daemon διακόπηκε: {e}') from e
+        finally:
+            if sock is not None:
+                sock.close()
+            conn.close()
+
+
+def run_via_daemon(executable, aliases, cache_ttl=0, fresh=False, outbox_ttl=0, command_name=None,
+                   retry=None, cancel=None):
+    """
+    Εκτέλεση μέσω του daemon, αν τρέχει (με την cache του daemon αν cache_ttl > 0).
+    retry: RetryPolicy· οι επαναλήψεις γίνονται στο daemon, με τις pooled συνδέσεις του.
+    cancel: CancelToken· οι servers που δεν απάντησαν ως την ακύρωση είναι CANCELLED.
+    Returns: {alias: ExecResult} ή None αν το daemon δεν είναι διαθέσιμο.
+    """
+    from voicessh import results as exec_results
+    from voicessh.results import ExecResult
+
+    client = DaemonClient()
+    if not client.available():
+        return None
+    results = {}
+    try:
+        for event in client.run(executable=executable, servers=list(aliases),
+                                cache_ttl=cache_ttl, fresh=fresh,
+                                outbox_ttl=outbox_ttl, command_name=command_name,
+                                retry=retry.to_dict() if retry is not None else None, cancel=cancel):
+            if event.get('event') == 'result':
+                results[event['server']] = ExecResult.from_dict(event['result'])
+    except DaemonError as e:
+        for alias in aliases:
+            results.setdefault(alias, ExecResult(alias).fail(exec_results.NETWORK, f'daemon: {e}'))
+    if cancel is not None and cancel.cancelled:
+        for alias in aliases:
+            results.setdefault(alias, ExecResult(alias).fail(exec_results.CANCELLED, cancel.reason))
+    return results
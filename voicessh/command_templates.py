@@ -0,0 +1,284 @@
+# voicessh/command_templates.py
+"""
+Παραμετρικές φωνητικές εντολές (slot templates).
+
+Το όνομα μιας εντολής μπορεί να περιέχει slots, π.χ. "ένταση {n:int}",
+και το executable τα χρησιμοποιεί με το όνομά τους: "nircmd setsysvolume {n}".
+
+Τύποι slots:
+    {n:int}        ακέραιος (ψηφία ή ελληνικά αριθμητικά, π.χ. "τριάντα πέντε")
+    {x:text}       ελεύθερο κείμενο (default όταν δεν δίνεται τύπος: {x})
+    {x:πάνω|κάτω}  απαρίθμηση επιτρεπτών τιμών
+
+Τα templates γίνονται compile μία φορά σε regex matchers (βλ. database.py)
+και οι τιμές των slots γίνονται quote πριν μπουν στην εντολή του remote shell.
+"""
+import re
+import unicodedata
+
+# {όνομα} ή {όνομα:τύπος}
+SLOT_RE = re.compile(r'\{(\w+)(?::([^{}]*))?\}')
+
+# Placeholders μέσα στο executable: μόνο {όνομα}
+PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+SLOT_TYPES = ('int', 'text')
+
+
+class TemplateError(ValueError):
+    """Μη έγκυρο template εντολής (μήνυμα κατάλληλο για εμφάνιση στο UI)."""
+
+
+# ---------- Κανονικοποίηση κειμένου ----------
+
+def _fold_char(ch):
+    """Αφαίρεση τόνων/διαλυτικών και πεζά, χωρίς αλλαγή μήκους (1 char -> 1 char)."""
+    base = unicodedata.normalize('NFD', ch)[0]
+    low = base.lower()
+    if len(low) != 1:
+        low = base
+    if low == 'ς':
+        low = 'σ'
+    return low
+
+
+def fold(text):
+    """
+    Κανονικοποίηση για συγκρίσεις: πεζά, χωρίς τόνους, τελικό σίγμα -> σ.
+    Το αποτέλεσμα έχει το ίδιο μήκος με το NFC κείμενο εισόδου,
+    ώστε οι θέσεις ενός regex match να αντιστοιχούν στο αρχικό κείμενο.
+    """
+    text = unicodedata.normalize('NFC', text)
+    return ''.join(_fold_char(ch) for ch in text)
+
+
+# ---------- Ελληνικά αριθμητικά ----------
+
+_NUMBER_WORDS = {
+    'μηδεν': 0,
+    'ενα': 1, 'ενασ': 1, 'μια': 1,
+    'δυο': 2,
+    'τρια': 3, 'τρεισ': 3,
+    'τεσσερα': 4, 'τεσσερισ': 4,
+    'πεντε': 5,
+    'εξι': 6,
+    'επτα': 7, 'εφτα': 7,
+    'οκτω': 8, 'οχτω': 8,
+    'εννεα': 9, 'εννια': 9,
+    'δεκα': 10,
+    'εντεκα': 11,
+    'δωδεκα': 12,
+    'δεκατρια': 13, 'δεκατρεισ': 13,
+    'δεκατεσσερα': 14, 'δεκατεσσερισ': 14,
+    'δεκαπεντε': 15,
+    'δεκαεξι': 16, 'δεκαξι': 16,
+    'δεκαεπτα': 17, 'δεκαεφτα': 17,
+    'δεκαοκτω': 18, 'δεκαοχτω': 18,
+    'δεκαεννεα': 19, 'δεκαεννια': 19,
+    'εικοσι': 20,
+    'τριαντα': 30,
+    'σαραντα': 40,
+    'πενηντα': 50,
+    'εξηντα': 60,
+    'εβδομηντα': 70,
+    'ογδοντα': 80,
+    'ενενηντα': 90,
+    'εκατο': 100, 'εκατον': 100,
+    'διακοσια': 200, 'διακοσιεσ': 200, 'διακοσιοι': 200,
+    'τριακοσια': 300, 'τριακοσιεσ': 300, 'τριακοσιοι': 300,
+    'τετρακοσια': 400, 'τετρακοσιεσ': 400, 'τετρακοσιοι': 400,
+    'πεντακοσια': 500, 'πεντακοσιεσ': 500, 'πεντακοσιοι': 500,
+    'εξακοσια': 600, 'εξακοσιεσ': 600, 'εξακοσιοι': 600,
+    'επτακοσια': 700, 'εφτακοσια': 700, 'επτακοσιεσ': 700, 'εφτακοσιεσ': 700,
+    'οκτακοσια': 800, 'οχτακοσια': 800, 'οκτακοσιεσ': 800, 'οχτακοσιεσ': 800,
+    'εννιακοσια': 900, 'εννεακοσια': 900, 'εννιακοσιεσ': 900, 'εννεακοσιεσ': 900,
+}
+
+_THOUSAND_WORDS = {'χιλια', 'χιλιοι', 'χιλιεσ'}
+_THOUSANDS_MULTIPLIER = 'χιλιαδεσ'
+
+
+def parse_int(text):
+    """
+    Μετατρέπει ψηφία ή ελληνικά αριθμητικά σε ακέραιο.
+    π.χ. "30", "30%", "τριάντα", "εκατόν είκοσι πέντε", "δύο χιλιάδες".
+    Returns: int ή None αν το κείμενο δεν είναι αριθμός.
+    """
+    words = fold(text).replace('%', ' ').split()
+    if not words:
+        return None
+    if len(words) == 1 and words[0].isdigit():
+        return int(words[0])
+
+    total = 0
+    current = 0
+    limit = None  # Άνω όριο για την επόμενη λέξη ("τριάντα πέντε" ναι, "πέντε τριάντα" όχι)
+    for word in words:
+        if word == 'και':
+            continue
+        if word in _THOUSAND_WORDS:
+            if current or total:
+                return None
+            total, current, limit = 1000, 0, None
+        elif word == _THOUSANDS_MULTIPLIER:
+            if not current or total:
+                return None
+            total, current, limit = current * 1000, 0, None
+        elif word in _NUMBER_WORDS:
+            value = _NUMBER_WORDS[word]
+            if limit is not None and value >= limit:
+                return None
+            current += value
+            # Μετά από εκατοντάδες ακολουθούν δεκάδες/μονάδες, μετά από δεκάδες μόνο μονάδες
+            limit = 100 if value >= 100 else 10 if value >= 20 else 0
+        else:
+            return None
+    return total + current
+
+
+# ---------- Quoting ----------
+
+# Τιμές που δεν χρειάζονται quoting στο cmd.exe
+_SAFE_VALUE_RE = re.compile(r'^[\w.,:+\-/\\]+$')
+
+# Χαρακτήρες που δεν μπορούν να γίνουν escape με ασφάλεια μέσα σε "..." στο cmd.exe
+_UNSAFE_CHARS = set('"%!^`\r\n\t\x00')
+
+
+def quote_value(value):
+    """
+    Ασφαλές quoting μιας τιμής slot για το remote shell (cmd.exe μέσω psexec).
+    Απλές τιμές (αριθμοί, λέξεις, paths) περνάνε όπως είναι. Οι υπόλοιπες
+    μπαίνουν σε διπλά εισαγωγικά, όπου τα & | < > ( ) είναι απλό κείμενο·
+    οι χαρακτήρες που δεν γίνονται escape με ασφάλεια (" % ! ^ κλπ) αφαιρούνται.
+    """
+    value = str(value)
+    if _SAFE_VALUE_RE.match(value):
+        return value
+    cleaned = ''.join(ch for ch in value if ch not in _UNSAFE_CHARS and ch.isprintable())
+    # Ένα τελικό backslash θα έκανε escape το κλειστό εισαγωγικό
+    cleaned = cleaned.rstrip('\\')
+    return f'"{cleaned}"'
+
+
+# ---------- Templates ----------
+
+def is_template(name):
+    """True αν το όνομα εντολής περιέχει slots."""
+    return bool(name) and SLOT_RE.search(name) is not None
+
+
+class CommandTemplate:
+    """Ένα compiled template: regex matcher και renderer για το executable."""
+
+    def __init__(self, name):
+        self.name = name
+        self.slots = {}  # {όνομα: (τύπος, {folded_τιμή: τιμή} για enums)}
+        self.literal_length = 0  # Μήκος σταθερού κειμένου (για προτεραιότητα matching)
+
+        pattern = ['^\\s*']
+        pos = 0
+        for m in SLOT_RE.finditer(name):
+            pattern.append(self._literal_pattern(name[pos:m.start()]))
+            pattern.append(self._slot_pattern(m.group(1), m.group(2)))
+            pos = m.end()
+        pattern.append(self._literal_pattern(name[pos:]))
+        pattern.append('\\s*$')
+
+        if not self.slots:
+            raise TemplateError('Το πρότυπο δεν περιέχει slots')
+        if self.literal_length == 0:
+            raise TemplateError('Το πρότυπο πρέπει να περιέχει και σταθερό κείμενο')
+
+        self.regex = re.compile(''.join(pattern))
+
+    def _literal_pattern(self, literal):
+        words = fold(literal).split()
+        self.literal_length += sum(len(w) for w in words)
+        parts = []
+        if literal[:1].isspace():
+            parts.append('\\s+')
+        parts.append('\\s+'.join(re.escape(w) for w in words))
+        if words and literal[-1:].isspace():
+            parts.append('\\s+')
+        return ''.join(parts)
+
+    def _slot_pattern(self, slot_name, spec):
+        if slot_name in self.slots:
+            raise TemplateError(f'Διπλό slot: {{{slot_name}}}')
+        spec = (spec or 'text').strip()
+
+        if '|' in spec:
+            choices = {}
+            for choice in spec.split('|'):
+                choice = choice.strip()
+                if choice:
+                    choices[' '.join(fold(choice).split())] = choice
+            if not choices:
+                raise TemplateError(f'Κενή απαρίθμηση στο slot {{{slot_name}}}')
+            self.slots[slot_name] = ('enum', choices)
+            # Μεγαλύτερες τιμές πρώτα, ώστε το "πολύ δυνατά" να μη γίνει match ως "πολύ"
+            alternatives = sorted(choices, key=len, reverse=True)
+            body = '|'.join('\\s+'.join(re.escape(w) for w in alt.split()) for alt in alternatives)
+            return f'(?P<{slot_name}>{body})'
+
+        if spec not in SLOT_TYPES:
+            raise TemplateError(f'Άγνωστος τύπος slot: {spec}')
+        self.slots[slot_name] = (spec, None)
+        return f'(?P<{slot_name}>.+?)'
+
+    def match(self, text):
+        """
+        Ελέγχει αν το αναγνωρισμένο κείμενο ταιριάζει στο template.
+        Returns: {slot: τιμή} ή None.
+        """
+        text = unicodedata.normalize('NFC', text)
+        m = self.regex.match(fold(text))
+        if not m:
+            return None
+
+        values = {}
+        for slot_name, (slot_type, choices) in self.slots.items():
+            start, end = m.span(slot_name)
+            raw = text[start:end].strip()
+            if slot_type == 'int':
+                number = parse_int(raw)
+                if number is None:
+                    return None
+                values[slot_name] = number
+            elif slot_type == 'enum':
+                values[slot_name] = choices[' '.join(fold(raw).split())]
+            else:
+                values[slot_name] = raw
+        return values
+
+    def render(self, executable, values):
+        """Αντικαθιστά τα {slot} του executable με τις (quoted) τιμές."""
+        def replace(m):
+            slot_name = m.group(1)
+            if slot_name not in values:
+                return m.group(0)
+            return quote_value(values[slot_name])
+        return PLACEHOLDER_RE.sub(replace, executable)
+
+
+def compile_template(name):
+    """Compile ενός template ονόματος εντολής. Raises TemplateError."""
+    return CommandTemplate(name)
+
+
+def validate_template(name, executable):
+    """
+    Έλεγχος ενός template πριν την αποθήκευση.
+    Returns: None αν είναι έγκυρο (ή δεν είναι template), αλλιώς μήνυμα σφάλματος.
+    """
+    if not is_template(name):
+        return None
+    try:
+        template = compile_template(name)
+    except TemplateError as e:
+        return str(e)
+    for slot_name in PLACEHOLDER_RE.findall(executable):
+        if slot_name not in template.slots:
+            return f'Το executable χρησιμοποιεί άγνωστο slot: {{{slot_name}}}'
+    return None
@@ -0,0 +1,341 @@
+# voicessh/daemon.py
+"""
+Τοπικό daemon εκτέλεσης: κρατάει ανοιχτές (pooled) τις SSH συνδέσεις και τον
+κατάλογο εντολών, και δέχεται αιτήματα από την εφαρμογή, το CLI και scripts
+μέσω HTTP στο localhost.
+
+API (JSON):
+    GET  /health    {"ok": true, "pool": {...}, "cache": {...}, "outbox": {alias: n},
+                     "running": n, "max_parallel": m}
+    GET  /commands  [{"id", "name", "executable", "aliases", "phrases"}, ...]
+    GET  /metrics   οι μετρήσεις του daemon σε text format του Prometheus (βλ. metrics.py)
+    POST /run       {"text": "..."} ή {"executable": "...", "servers": [...]},
+                    προαιρετικά "all_servers": true.
+                    Απάντηση NDJSON, μία γραμμή ανά event όπως ολοκληρώνεται:
+                    {"event": "start", ...}, {"event": "result", "server", "ok", "result"}, ...,
+                    {"event": "done", "ok": ...}
+                    Προαιρετικά "cache_ttl" και "outbox_ttl" (default: της εντολής για "text"),
+                    "fresh": true για ακύρωση της cache πριν την εκτέλεση, και
+                    "command_name" για τις εγγραφές του outbox όταν δίνεται "executable".
+                    Προαιρετικά "retry": πολιτική επανάληψης (βλ. retry.py· default: της
+                    εντολής για "text", χωρίς επαναλήψεις για "executable").
+                    Κάθε επανάληψη παίρνει ξανά σύνδεση από το pool.
+                    Αν ο client κλείσει τη σύνδεση, οι εκτελέσεις του αιτήματος ακυρώνονται
+                    (βλ. cancel.py): όσες περιμένουν στην ουρά δεν ξεκινούν και οι υπόλοιπες
+                    κλείνουν αμέσως τα channels τους.
+
+Κάθε αίτημα πρέπει να έχει header X-VoiceSSH-Token με το token του daemon: το
+VOICESSH_DAEMON_TOKEN αν έχει οριστεί, αλλιώς ένα τυχαίο που δημιουργείται σε
+κάθε εκκίνηση και γράφεται δίπλα στη βάση (βλ. database.daemon_token_path), από
+όπου το διαβάζει ο client. Επιπλέον, το Host πρέπει να είναι η διεύθυνση του
+daemon ή localhost (DNS rebinding) και το POST να έχει Content-Type
+application/json (ώστε μια ιστοσελίδα να μην μπορεί να στείλει "απλό" αίτημα).
+"""
+import hmac
+import json
+import os
+import secrets
+import select
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from voicessh import cancel as cancellation
+from voicessh import database
+from voicessh import dispatch
+from voicessh import history
+from voicessh import metrics
+from voicessh import results as exec_results
+from voicessh import retry
+from voicessh.client import DEFAULT_HOST, DEFAULT_PORT
+from voicessh.outbox import OutboxWorker
+from voicessh.pool import ConnectionPool
+from voicessh.result_cache import ResultCache
+from voicessh.results import ExecResult
+from voicessh.transport import run_remote
+
+# Πόσες εκτελέσεις τρέχουν ταυτόχρονα (σε όλους τους hosts)· οι υπόλοιπες περιμένουν στην ουρά
+DEFAULT_MAX_PARALLEL = 16
+
+# Κάθε πόσα δευτερόλεπτα κλείνουν οι αδρανείς συνδέσεις του pool
+REAP_INTERVAL = 60
+
+# Μέγιστο μέγεθος σώματος αιτήματος
+MAX_BODY = 64 * 1024
+
+# Κάθε πόσα δευτερόλεπτα ελέγχεται αν ο client έκλεισε τη σύνδεση ή ακυρώθηκε μια εκτέλεση στην ουρά
+CANCEL_POLL = 0.05
+
+# Τα ονόματα του header Host που δέχεται πάντα το daemon (εκτός από τη διεύθυνση όπου ακούει)
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+
+class ExecutionDaemon:
+    """Ο πυρήνας του daemon: pool συνδέσεων και ουρά εκτελέσεων, ανεξάρτητα από το HTTP."""
+
+    def __init__(self, max_parallel=DEFAULT_MAX_PARALLEL, pool=None):
+        self.pool = pool or ConnectionPool()
+        self.cache = ResultCache()
+        self.outbox = None  # OutboxWorker, βλ. start_outbox
+        self.max_parallel = max_parallel
+        self._slots = threading.BoundedSemaphore(max_parallel)
+        self._lock = threading.Lock()
+        self.running = 0
+        self._stop = threading.Event()
+        metrics.gauge('voicessh_daemon_running', 'Εκτελέσεις που τρέχουν τώρα στο daemon').set_function(
+            lambda: self.running)
+        metrics.gauge('voicessh_pool_open_connections', 'Ανοιχτές SSH συνδέσεις στο pool').set_function(
+            lambda: self.pool.stats()['open'])
+        metrics.gauge('voicessh_outbox_pending', 'Εντολές σε αναμονή στο outbox ανά server',
+                      ('alias',)).set_function(database.outbox_pending)
+
+    def _run(self, executable, alias, conn_details, cancel=None):
+        """Εκτέλεση σε έναν server μέσα από την ουρά, με pooled σύνδεση."""
+        if cancel is None:
+            self._slots.acquire()
+        else:
+            # Μια εκτέλεση που ακυρώνεται όσο περιμένει στην ουρά δεν ξεκινά ποτέ
+            while not self._slots.acquire(timeout=CANCEL_POLL):
+                if cancel.cancelled:
+                    return ExecResult(alias).fail(exec_results.CANCELLED, cancel.reason)
+        try:
+            with self._lock:
+                self.running += 1
+            try:
+                return run_remote(executable, alias, conn_details, pool=self.pool, cancel=cancel)
+            finally:
+                with self._lock:
+                    self.running -= 1
+        finally:
+            self._slots.release()
+
+    def execute(self, request, cancel=None):
+        """
+        Επεξεργάζεται ένα αίτημα /run.
+        cancel: CancelToken για τις εκτελέσεις του αιτήματος (βλ. dispatch.iter_results).
+        Yields: events (dicts) για streaming.
+        Raises: ValueError με μήνυμα για τον client αν το αίτημα δεν είναι έγκυρο.
+        """
+        if not isinstance(request, dict):
+            raise ValueError('Το αίτημα πρέπει να είναι JSON object')
+        text = request.get('text')
+        executable = request.get('executable')
+        if not all(isinstance(value, (str, type(None))) for value in (text, executable)):
+            raise ValueError('Τα "text" και "executable" πρέπει να είναι κείμενο')
+        if text:
+            cmd = database.match_command(text)
+            if cmd is None:
+                raise ValueError(f'Άγνωστη εντολή: "{text}"')
+            name, executable, aliases, slots = cmd['name'], cmd['executable'], cmd['aliases'], cmd['slots']
+            ttls = {'cache_ttl': cmd['cache_ttl'], 'outbox_ttl': cmd['outbox_ttl']}
+            policy = retry.policy_for(cmd)
+        elif executable:
+            name, aliases, slots = request.get('command_name'), [], {}
+            ttls = {'cache_ttl': 0, 'outbox_ttl': 0}
+            policy = None
+        else:
+            raise ValueError('Απαιτείται "text" ή "executable"')
+        for key in ttls:
+            if request.get(key) is not None:
+                ttls[key] = request[key]
+            if not isinstance(ttls[key], (int, float)) or ttls[key] < 0:
+                raise ValueError(f'Το "{key}" πρέπει να είναι μη αρνητικός αριθμός')
+        if request.get('retry') is not None:
+            policy = retry.RetryPolicy.from_dict(request['retry'])
+
+        if request.get('all_servers'):
+            aliases = database.get_connection_aliases()
+        elif request.get('servers'):
+            aliases = request['servers']
+            if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+                raise ValueError('Το "servers" πρέπει να είναι λίστα από aliases')
+        if not aliases:
+            raise ValueError('Δεν ορίστηκαν servers')
+        if request.get('fresh'):
+            for alias in aliases:
+                self.cache.invalidate(executable, alias)
+
+        yield {'event': 'start', 'command': name, 'executable': executable,
+               'slots': slots, 'servers': aliases}
+        all_ok = True
+        for alias, result in dispatch.iter_results(executable, aliases, run=self._run, cache=self.cache,
+                                                   command_name=name, retry=policy, cancel=cancel,
+                                                   max_parallel=self.max_parallel, **ttls):
+            all_ok = all_ok and result.ok
+            yield {'event': 'result', 'server': alias, 'ok': result.ok, 'result': result.to_dict()}
+        yield {'event': 'done', 'ok': all_ok}
+
+    def health(self):
+        return {'ok': True, 'pool': self.pool.stats(), 'cache': self.cache.stats(),
+                'outbox': database.outbox_pending(),
+                'running': self.running, 'max_parallel': self.max_parallel}
+
+    def start_outbox(self):
+        """Ξεκινά την παράδοση του outbox, με το ίδιο pool συνδέσεων."""
+        self.outbox = OutboxWorker(pool=self.pool).start()
+        return self.outbox
+
+    def reap_forever(self):
+        while not self._stop.wait(REAP_INTERVAL):
+            self.pool.close_idle()
+
+    def close(self):
+        self._stop.set()
+        if self.outbox is not None:
+            self.outbox.stop()
+        self.pool.close_all()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'VoiceSSH'
+
+    @property
+    def daemon(self):
+        return self.server.execution_daemon
+
+    def log_message(self, format, *args):
+        pass  # Χωρίς log για κάθε αίτημα
+
+    def _authorized(self):
+        token = self.server.token
+        if not token:
+            return True
+        return hmac.compare_digest(self.headers.get('X-VoiceSSH-Token', ''), token)
+
+    def _local_host(self):
+        """True αν το header Host είναι η διεύθυνση του daemon ή localhost (όχι DNS rebinding)."""
+        host = self.headers.get('Host', '')
+        if host.startswith('['):
+            host = host[1:].partition(']')[0]  # IPv6: [::1]:8765
+        else:
+            host = host.partition(':')[0]
+        return host.lower() in LOCAL_HOSTS + (self.server.server_address[0],)
+
+    def _check_request(self):
+        """Returns: (status, μήνυμα) αν το αίτημα απορρίπτεται, αλλιώς None."""
+        if not self._local_host():
+            return 403, 'Μη επιτρεπτό Host'
+        if not self._authorized():
+            return 403, 'Λάθος token'
+        return None
+
+    def _send_json(self, status, data):
+        self._send_body(status, json.dumps(data, ensure_ascii=False).encode('utf-8'),
+                        'application/json; charset=utf-8')
+
+    def _send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        rejected = self._check_request()
+        if rejected:
+            return self._send_json(rejected[0], {'error': rejected[1]})
+        if self.path == '/health':
+            self._send_json(200, self.daemon.health())
+        elif self.path == '/commands':
+            self._send_json(200, database.get_all_commands())
+        elif self.path == '/metrics':
+            self._send_body(200, metrics.render().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        rejected = self._check_request()
+        if rejected:
+            return self._send_json(rejected[0], {'error': rejected[1]})
+        if self.path != '/run':
+            return self._send_json(404, {'error': 'Not found'})
+        if self.headers.get_content_type() != 'application/json':
+            return self._send_json(415, {'error': 'Απαιτείται Content-Type: application/json'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_BODY:
+                raise ValueError('Πολύ μεγάλο αίτημα')
+            request = json.loads(self.rfile.read(length) or b'{}')
+            token = cancellation.CancelToken()
+            events = self.daemon.execute(request, token)
+            first = next(events)  # Ο έλεγχος του αιτήματος γίνεται πριν το πρώτο event
+        except (TypeError, ValueError) as e:
+            return self._send_json(400, {'error': str(e)})
+
+        # HTTP/1.0: το τέλος της απάντησης σημαίνεται με το κλείσιμο της σύνδεσης
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.end_headers()
+        finished = threading.Event()
+        threading.Thread(target=self._watch_client, args=(token, finished),
+                         name='voicessh-daemon-watch', daemon=True).start()
+        try:
+            self._write_event(first)
+            for event in events:
+                self._write_event(event)
+        except (BrokenPipeError, ConnectionResetError):
+            token.cancel('Ο client αποσυνδέθηκε')
+        finally:
+            finished.set()
+
+    def _watch_client(self, token, finished):
+        """Ακυρώνει τις εκτελέσεις του αιτήματος μόλις ο client κλείσει τη σύνδεση (π.χ. διακοπή)."""
+        try:
+            while not finished.is_set():
+                readable, _, _ = select.select([self.connection], [], [], CANCEL_POLL)
+                if not readable:
+                    continue
+                # Ο client δεν στέλνει τίποτα μετά το αίτημα: readable σημαίνει EOF/reset
+                if not self.connection.recv(1, socket.MSG_PEEK):
+                    token.cancel('Ο client αποσυνδέθηκε')
+                return
+        except (OSError, ValueError):
+            token.cancel('Ο client αποσυνδέθηκε')
+
+    def _write_event(self, event):
+        self.wfile.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+def _write_token():
+    """Δημιουργεί ένα νέο τυχαίο token και το γράφει (μόνο για τον χρήστη) δίπλα στη βάση."""
+    token = secrets.token_urlsafe(32)
+    path = database.daemon_token_path()
+    tmp = path + '.tmp'
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+    os.replace(tmp, path)
+    return token
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, max_parallel=DEFAULT_MAX_PARALLEL, token=None):
+    """
+    Δημιουργεί (χωρίς να ξεκινά) τον HTTP server του daemon. port=0: τυχαία ελεύθερη θύρα.
+    token: None = το VOICESSH_DAEMON_TOKEN ή ένα νέο τυχαίο (βλ. _write_token)
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.execution_daemon = ExecutionDaemon(max_parallel)
+    if token is None:
+        token = os.environ.get('VOICESSH_DAEMON_TOKEN') or _write_token()
+    server.token = token
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_parallel=DEFAULT_MAX_PARALLEL):
+    """Τρέχει το daemon μέχρι Ctrl+C."""
+    server = make_server(host, port, max_parallel)
+    threading.Thread(target=server.execution_daemon.reap_forever, daemon=True).start()
+    server.execution_daemon.start_outbox()
+    history.prune_async()
+    flusher = metrics.MetricsFlusher().start()
+    print(f'VoiceSSH daemon: http://{server.server_address[0]}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.execution_daemon.close()
+        flusher.stop()
@@ -0,0 +1,2029 @@
+# voicessh/database.py
+"""
+SQLite database module για διαχείριση προσταγμάτων (commands) και πολλαπλών SSH servers.
+Δεν εξαρτάται από το Kivy, ώστε να χρησιμοποιείται και από το CLI.
+"""
+import sqlite3
+import os
+import re
+import json
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from types import MappingProxyType
+from voicessh import command_templates
+from voicessh import metrics
+
+# Ορισμός path για τη βάση δεδομένων
+# Το VOICESSH_DB έχει προτεραιότητα (π.χ. για scripts/cron με άλλη βάση).
+# Το ANDROID_ARGUMENT ορίζεται από το python-for-android (ο ίδιος έλεγχος που κάνει το kivy.utils.platform).
+if os.environ.get('VOICESSH_DB'):
+    DB_PATH = os.environ['VOICESSH_DB']
+elif 'ANDROID_ARGUMENT' in os.environ:
+    from android.storage import app_storage_path
+    DB_PATH = os.path.join(app_storage_path(), 'commands.db')
+else:
+    DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'commands.db')
+
+# Default commands - θα χρησιμοποιηθούν για αρχικοποίηση
+DEFAULT_COMMANDS = {
+    "σημειώσεις": "notepad.exe",
+    "δίκτυο": "ipconfig.exe",
+    "μουσική": r"C:\Program Files\Audacity\Audacity.exe",
+    "κείμενο": r"C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE",
+    "εξέταση": "explorer.exe",
+}
+
+DEFAULT_ALIAS = "Primary"
+
+# Έκδοση σχήματος (PRAGMA user_version)
+# 2: command_servers με server_id INTEGER αντί για ssh_alias TEXT
+# 3: transport profile ανά σύνδεση (ciphers, macs, kex, compression) και πίνακας app_settings
+# 4: ssh_connections.via_id (jump host / bastion)
+# 5: σκηνές (scenes, scene_steps, scene_step_servers, scene_step_deps)
+# 6: commands.cache_ttl (cache αποτελεσμάτων για εντολές που μόνο διαβάζουν)
+# 7: commands.outbox_ttl (παράδοση όταν ο host γίνει διαθέσιμος)
+# 8: commands.idempotent, commands.retry_policy (επαναλήψεις, βλ. retry.py)
+SCHEMA_VERSION = 8
+
+# Στήλες του commands που προστέθηκαν μετά την αρχική έκδοση: (όνομα, ορισμός)
+# cache_ttl: για πόσα δευτερόλεπτα ένα επιτυχημένο αποτέλεσμα απαντιέται από
+# την cache (βλ. result_cache.py)· 0 = χωρίς cache (π.χ. εντολές που ανοίγουν προγράμματα)
+# outbox_ttl: αν ο host δεν είναι διαθέσιμος, η εντολή μπαίνει στην ουρά (βλ. outbox.py)
+# και παραδίδεται όταν επανέλθει, αν δεν έχουν περάσει τόσα δευτερόλεπτα· 0 = χωρίς ουρά
+# idempotent: 1 αν η εντολή μπορεί να εκτελεστεί δύο φορές χωρίς παρενέργεια· αλλιώς
+# επαναλαμβάνεται μόνο αν δεν στάλθηκε (βλ. retry.py)
+# retry_policy: JSON με την πολιτική επανάληψης· NULL = η default πολιτική
+COMMAND_COLUMNS = (
+    ('cache_ttl', 'INTEGER NOT NULL DEFAULT 0'),
+    ('outbox_ttl', 'INTEGER NOT NULL DEFAULT 0'),
+    ('idempotent', 'INTEGER NOT NULL DEFAULT 0'),
+    ('retry_policy', 'TEXT'),
+)
+
+
+def _command_column_value(column, value):
+    """Κανονικοποιεί την τιμή μιας στήλης του COMMAND_COLUMNS (π.χ. από import)."""
+    if column == 'retry_policy':
+        return value or None
+    if column == 'idempotent':
+        return 1 if value else 0
+    return max(0, int(value or 0))
+
+# Στήλες του ssh_connections που προστέθηκαν μετά την αρχική έκδοση: (όνομα, ορισμός)
+# ciphers/macs/kex: λίστες αλγορίθμων χωρισμένες με κόμμα, με σειρά προτίμησης.
+# NULL = το profile της συσκευής (βλ. calibrate.py) ή τα defaults του paramiko.
+SSH_CONNECTION_COLUMNS = (
+    ('ciphers', 'TEXT'),
+    ('macs', 'TEXT'),
+    ('kex', 'TEXT'),
+    ('compression', 'INTEGER NOT NULL DEFAULT 0'),
+    # Η σύνδεση γίνεται μέσω αυτού του server (direct-tcpip)· NULL = απευθείας
+    ('via_id', 'INTEGER REFERENCES ssh_connections(id) ON DELETE SET NULL'),
+)
+
+# Οι συνδέσεις όπως τις βλέπουν οι callers: το via_id γίνεται το alias του bastion ('via')
+_CONNECTIONS_QUERY = '''
+    SELECT s.id, s.alias, s.host, s.port, s.username, s.password,
+           s.ciphers, s.macs, s.kex, s.compression, v.alias AS via
+    FROM ssh_connections s LEFT JOIN ssh_connections v ON v.id = s.via_id
+    ORDER BY s.alias
+'''
+
+
+# Βάρη bm25 για τις στήλες του command_search: name, phrases, executable
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Πόσα matches (τα καλύτερα κατά bm25) ενώνονται το πολύ με τον πίνακα εντολών ανά
+# αναζήτηση: ένα query ενός γράμματος σε 50k εντολές δεν διαβάζει χιλιάδες γραμμές.
+SEARCH_CANDIDATES = 500
+
+DB_SECONDS = metrics.histogram('voicessh_db_seconds', 'Χρόνος των κλήσεων του database.py', ('op',))
+DB_ERRORS = metrics.counter('voicessh_db_errors_total', 'Κλήσεις του database.py που απέτυχαν με sqlite3.Error',
+                            ('op',))
+DB_CONNECTIONS = metrics.counter('voicessh_db_connections_total', 'Συνδέσεις SQLite που άνοιξαν', ('db',))
+
+
+def _timed(func):
+    """Decorator: χρόνος της κλήσης στο voicessh_db_seconds{op="όνομα"} και σφάλματα SQLite."""
+    op = func.__name__
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.Error:
+            DB_ERRORS.inc(op=op)
+            raise
+        finally:
+            DB_SECONDS.observe(time.perf_counter() - start, op=op)
+    return timed
+
+
+def _fold_sql(text):
+    """SQL function vs_fold(): πεζά και χωρίς τόνους (βλ. command_templates.fold)."""
+    return command_templates.fold(text) if text else ''
+
+
+def get_connection():
+    """
+    Επιστρέφει σύνδεση στη βάση δεδομένων.
+    Μέσα σε write_batch (στο thread του batch) επιστρέφει savepoint της κοινής σύνδεσης.
+    """
+    batch = getattr(_batch, 'current', None)
+    if batch is not None:
+        return batch.connection()
+    _wait_for_writes()
+    return _connect()
+
+
+def _connect():
+    # Η κατάσταση του αρχείου πριν από τις εγγραφές αυτής της σύνδεσης (βλ. _publish_snapshot)
+    _local.stat_before = _db_stat()
+    conn = sqlite3.connect(DB_PATH)
+    DB_CONNECTIONS.inc(db='config')
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    # Χρησιμοποιείται από τα triggers του command_search (FTS5)
+    conn.create_function('vs_fold', 1, _fold_sql, deterministic=True)
+    return conn
+
+
+# --- Ομαδικές εγγραφές (βλ. db_writer.py) ---
+
+_batch = threading.local()
+
+# Ανά thread: _local.stat_before = το _db_stat() όταν άνοιξε η τελευταία σύνδεση
+_local = threading.local()
+
+# Καλείται πριν από κάθε ανάγνωση: επιστρέφει όταν έχουν γραφτεί οι εγγραφές που
+# υπέβαλε στον writer το thread που διαβάζει (read-your-writes)· None όταν δεν τρέχει writer
+_write_barrier = None
+
+
+def set_write_barrier(barrier):
+    global _write_barrier
+    _write_barrier = barrier
+
+
+def _wait_for_writes():
+    barrier = _write_barrier
+    if barrier is not None:
+        barrier()
+
+
+class _SavepointConnection:
+    """
+    Η "σύνδεση" μιας συνάρτησης του module μέσα σε write_batch: savepoint της
+    κοινής σύνδεσης. Το commit() κρατάει τις αλλαγές ως εκεί και το close()
+    αναιρεί όσες έγιναν μετά το τελευταίο commit, όπως μια ξεχωριστή σύνδεση
+    που κλείνει χωρίς commit.
+    """
+
+    def __init__(self, batch, name):
+        self._batch = batch
+        self._conn = batch.conn
+        self.name = name
+        self._conn.execute(f'SAVEPOINT {name}')
+
+    def __getattr__(self, attr):
+        return getattr(self._conn, attr)
+
+    def commit(self):
+        self._conn.execute(f'RELEASE {self.name}')
+        self._conn.execute(f'SAVEPOINT {self.name}')
+
+    def rollback(self):
+        self._conn.execute(f'ROLLBACK TO {self.name}')
+
+    def close(self):
+        if self not in self._batch.open:
+            return
+        self._conn.execute(f'ROLLBACK TO {self.name}')
+        self._conn.execute(f'RELEASE {self.name}')
+        # Το RELEASE κλείνει και όσα savepoints άνοιξαν μετά από αυτό
+        del self._batch.open[self._batch.open.index(self):]
+
+
+class _WriteBatch:
+    def __init__(self, conn):
+        self.conn = conn
+        self.open = []       # Savepoints των συναρτήσεων που δεν έχουν κλείσει
+        self.changes = None  # Τι άλλαξε στο snapshot (βλ. _Changes)· None = τίποτα
+        self._counter = 0
+
+    def connection(self):
+        self._counter += 1
+        savepoint = _SavepointConnection(self, f'vs_write_{self._counter}')
+        self.open.append(savepoint)
+        return savepoint
+
+    @contextmanager
+    def job(self):
+        """
+        Μια εργασία του batch: αν αποτύχει, αναιρείται μόνο αυτή. Savepoints που
+        έμειναν ανοιχτά (π.χ. return μέσα σε except χωρίς close) αναιρούνται.
+        """
+        self._counter += 1
+        name = f'vs_job_{self._counter}'
+        depth = len(self.open)
+        self.conn.execute(f'SAVEPOINT {name}')
+        try:
+            yield
+        except BaseException:
+            # Το ROLLBACK TO ακυρώνει και τα savepoints των συναρτήσεων της εργασίας
+            del self.open[depth:]
+            self.conn.execute(f'ROLLBACK TO {name}')
+            self.conn.execute(f'RELEASE {name}')
+            raise
+        for savepoint in reversed(self.open[depth:]):
+            savepoint.close()
+        self.conn.execute(f'RELEASE {name}')
+
+
+@contextmanager
+def write_batch():
+    """
+    Οι εγγραφές που κάνουν οι συναρτήσεις του module μέσα στο block (από αυτό το
+    thread) γίνονται σε ένα transaction, με ένα commit και ένα νέο snapshot στο
+    τέλος αντί για ένα ανά συνάρτηση. Μέσα στο block το snapshot είναι αυτό πριν
+    από το batch.
+    Yields: batch με job() για κάθε εργασία (αποτυχία = rollback μόνο της εργασίας).
+    Raises: ό,τι το commit (τότε δεν γράφεται τίποτα).
+    """
+    conn = _connect()
+    conn.isolation_level = None  # Τα BEGIN/SAVEPOINT/COMMIT γίνονται ρητά
+    batch = _WriteBatch(conn)
+    conn.execute('BEGIN IMMEDIATE')
+    _batch.current = batch
+    try:
+        yield batch
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        _batch.current = None
+        conn.close()
+    if batch.changes is not None:
+        _publish_snapshot(changes=batch.changes)
+
+
+@_timed
+def init_db():
+    """
+    Αρχικοποίηση της βάσης δεδομένων.
+    Δημιουργεί τους πίνακες και κάνει migrations αν χρειαστεί.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    # Τα migrations ξαναχτίζουν πίνακες (DROP/RENAME): χωρίς αυτό, το DROP TABLE commands
+    # θα έσβηνε με CASCADE όλες τις συσχετίσεις. Ελέγχονται ξανά στο τέλος.
+    cursor.execute('PRAGMA foreign_keys = OFF')
+    
+    # 1. Πίνακας commands (χωρίς alias column πια)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS commands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            executable TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            cache_ttl INTEGER NOT NULL DEFAULT 0,
+            outbox_ttl INTEGER NOT NULL DEFAULT 0,
+            idempotent INTEGER NOT NULL DEFAULT 0,
+            retry_policy TEXT
+        )
+    ''')
+    
+
+    # 2. Πίνακας ssh_connections (Settings)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ssh_connections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alias TEXT UNIQUE NOT NULL,
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            password TEXT,
+            ciphers TEXT,
+            macs TEXT,
+            kex TEXT,
+            compression INTEGER NOT NULL DEFAULT 0,
+            via_id INTEGER REFERENCES ssh_connections(id) ON DELETE SET NULL
+        )
+    ''')
+    # Βάσεις πριν το schema v3: προσθήκη των στηλών του transport profile
+    cursor.execute("PRAGMA table_info(ssh_connections)")
+    connection_columns = {info[1] for info in cursor.fetchall()}
+    for column, definition in SSH_CONNECTION_COLUMNS:
+        if column not in connection_columns:
+            cursor.execute(f'ALTER TABLE ssh_connections ADD COLUMN {column} {definition}')
+
+    # 2b. Ρυθμίσεις της εφαρμογής (key/value, τιμές σε JSON).
+    # Όχι "settings": το όνομα χρησιμοποιείται από το παλιό σχήμα (βλ. migration παρακάτω)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS app_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+
+    # 3. Migration από παλιά settings (key/value) αν υπάρχουν
+    # Αν το table settings υπάρχει, βλέπουμε αν έχει data
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='settings'")
+    if cursor.fetchone():
+        # Διαβάζουμε τα παλιά settings
+        old_settings = {}
+        try:
+            cursor.execute("SELECT key, value FROM settings")
+            rows = cursor.fetchall()
+            if rows:
+                for row in rows:
+                    old_settings[row['key']] = row['value']
+                
+                # Αν έχουμε host, τα μεταφέρουμε στο ssh_connections ως 'Primary'
+                if 'host' in old_settings:
+                    try:
+                        cursor.execute(
+                            '''INSERT INTO ssh_connections (alias, host, port, username, password) 
+                               VALUES (?, ?, ?, ?, ?)''',
+                            (
+                                DEFAULT_ALIAS,
+                                old_settings.get('host', ''),
+                                int(old_settings.get('port', 22)),
+                                old_settings.get('username', ''),
+                                old_settings.get('password', '')
+                            )
+                        )
+                    except sqlite3.IntegrityError:
+                        pass # Ήδη υπάρχει
+        except Exception as e:
+            print(f"Migration error: {e}")
+
+    # 4. Πίνακας command_servers (many-to-many σχέση, schema v2)
+    # Το primary key (command_id, server_id) σε WITHOUT ROWID πίνακα καλύπτει την
+    # αναζήτηση "servers μιας εντολής" και το index (server_id, command_id) την
+    # αντίστροφη "εντολές ενός server", χωρίς πρόσβαση σε άλλες σελίδες.
+    cursor.execute("PRAGMA table_info(command_servers)")
+    server_columns = [info[1] for info in cursor.fetchall()]
+    if 'ssh_alias' in server_columns:
+        _migrate_command_servers_v2(cursor)
+    else:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS command_servers (
+                command_id INTEGER NOT NULL,
+                server_id INTEGER NOT NULL,
+                PRIMARY KEY (command_id, server_id),
+                FOREIGN KEY (command_id) REFERENCES commands(id) ON DELETE CASCADE,
+                FOREIGN KEY (server_id) REFERENCES ssh_connections(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        ''')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_command_servers_server ON command_servers (server_id, command_id)'
+    )
+    
+    # 4b. Πίνακας command_phrases (εναλλακτικές φράσεις ενεργοποίησης ανά εντολή)
+    # learned = 1 για φράσεις που καταγράφηκαν αυτόματα από λάθη αναγνώρισης
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS command_phrases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            command_id INTEGER NOT NULL,
+            phrase TEXT UNIQUE NOT NULL,
+            learned INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (command_id) REFERENCES commands(id) ON DELETE CASCADE
+        )
+    ''')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_command_phrases_command ON command_phrases (command_id)'
+    )
+
+    # 4c. Σκηνές: πολλά βήματα (εντολή @ servers) με εξαρτήσεις, με μία φράση (βλ. scenes.py)
+    # Κάθε βήμα αναφέρεται στην εντολή με id, ώστε η μετονομασία της να μη χαλάει τη σκηνή.
+    # Servers και εξαρτήσεις σε ξεχωριστούς πίνακες, όπως το command_servers.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scenes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scene_steps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scene_id INTEGER NOT NULL,
+            step_key TEXT NOT NULL,
+            command_id INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (scene_id, step_key),
+            FOREIGN KEY (scene_id) REFERENCES scenes(id) ON DELETE CASCADE,
+            FOREIGN KEY (command_id) REFERENCES commands(id) ON DELETE CASCADE
+        )
+    ''')
+    # Χωρίς γραμμές = οι servers της εντολής
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scene_step_servers (
+            step_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            PRIMARY KEY (step_id, server_id),
+            FOREIGN KEY (step_id) REFERENCES scene_steps(id) ON DELETE CASCADE,
+            FOREIGN KEY (server_id) REFERENCES ssh_connections(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scene_step_deps (
+            step_id INTEGER NOT NULL,
+            depends_on INTEGER NOT NULL,
+            PRIMARY KEY (step_id, depends_on),
+            FOREIGN KEY (step_id) REFERENCES scene_steps(id) ON DELETE CASCADE,
+            FOREIGN KEY (depends_on) REFERENCES scene_steps(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_scene_steps_command ON scene_steps (command_id)'
+    )
+
+    # 5. Migration: Μεταφορά δεδομένων από commands.alias → command_servers
+    # Ελέγχουμε αν υπάρχει ακόμα η στήλη alias στον πίνακα commands
+    cursor.execute("PRAGMA table_info(commands)")
+    columns = [info[1] for info in cursor.fetchall()]
+    
+    if 'alias' in columns:
+        # Έχουμε παλιά δομή, πρέπει να μεταφέρουμε τα δεδομένα
+        print("Migrating command-server relationships to command_servers table...")
+        
+        # Διαβάζουμε όλα τα commands με το alias τους
+        cursor.execute('SELECT id, alias FROM commands')
+        old_commands = cursor.fetchall()
+        
+        for cmd in old_commands:
+            cmd_id = cmd[0]
+            alias = cmd[1] or DEFAULT_ALIAS
+            
+            # Προσθέτουμε στον command_servers πίνακα
+            try:
+                _insert_command_server(cursor, cmd_id, alias)
+            except Exception as e:
+                print(f"Warning: Could not migrate command {cmd_id}: {e}")
+        
+        # Τώρα αφαιρούμε τη στήλη alias από τον πίνακα commands
+        # Στο SQLite δεν μπορούμε να κάνουμε DROP COLUMN απευθείας,
+        # πρέπει να δημιουργήσουμε νέο πίνακα και να αντιγράψουμε τα δεδομένα
+        cursor.execute('''
+            CREATE TABLE commands_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                executable TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Αντιγραφή δεδομένων
+        cursor.execute('INSERT INTO commands_new (id, name, executable, created_at) SELECT id, name, executable, created_at FROM commands')
+        
+        # Διαγραφή παλιού πίνακα και μετονομασία του νέου
+        cursor.execute('DROP TABLE commands')
+        cursor.execute('ALTER TABLE commands_new RENAME TO commands')
+        
+        print("Migration completed successfully!")
+    
+    # 5b. Βάσεις πριν το schema v6 (και ο πίνακας που μόλις ξαναχτίστηκε): νέες στήλες
+    cursor.execute("PRAGMA table_info(commands)")
+    columns = {info[1] for info in cursor.fetchall()}
+    for column, definition in COMMAND_COLUMNS:
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE commands ADD COLUMN {column} {definition}')
+    
+    # 6. Default SSH connection αν ο πίνακας είναι κενός
+    # (πριν τις default εντολές, ώστε να υπάρχει ο server στον οποίο αναφέρονται)
+    cursor.execute('SELECT COUNT(*) FROM ssh_connections')
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(
+            '''INSERT INTO ssh_connections (alias, host, port, username, password) 
+               VALUES (?, ?, ?, ?, ?)''',
+            (DEFAULT_ALIAS, '192.168.0.8', 22, 'alekos', 'alekos')
+        )
+
+    # 7. Default commands αν ο πίνακας commands είναι κενός
+    cursor.execute('SELECT COUNT(*) FROM commands')
+    if cursor.fetchone()[0] == 0:
+        for name, executable in DEFAULT_COMMANDS.items():
+            cursor.execute(
+                'INSERT INTO commands (name, executable) VALUES (?, ?)',
+                (name, executable)
+            )
+            cmd_id = cursor.lastrowid
+            # Προσθήκη στον command_servers με το default alias
+            _insert_command_server(cursor, cmd_id, DEFAULT_ALIAS)
+    
+    # 8. Full-text index (FTS5) για αναζήτηση εντολών
+    _init_search_index(cursor)
+    
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    conn.commit()
+    
+    for violation in cursor.execute('PRAGMA foreign_key_check').fetchall():
+        print(f"Warning: Foreign key violation after migration: {tuple(violation)}")
+    conn.close()
+    _publish_snapshot()
+
+
+def _migrate_command_servers_v2(cursor):
+    """
+    Migration σε schema v2: command_servers(command_id, ssh_alias TEXT) →
+    command_servers(command_id, server_id INTEGER). Συσχετίσεις με aliases ή
+    εντολές που δεν υπάρχουν πια (π.χ. μετά από μετονομασία alias) παραλείπονται.
+    """
+    print("Migrating command_servers to schema v2 (server_id)...")
+    cursor.execute('''
+        CREATE TABLE command_servers_v2 (
+            command_id INTEGER NOT NULL,
+            server_id INTEGER NOT NULL,
+            PRIMARY KEY (command_id, server_id),
+            FOREIGN KEY (command_id) REFERENCES commands(id) ON DELETE CASCADE,
+            FOREIGN KEY (server_id) REFERENCES ssh_connections(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO command_servers_v2 (command_id, server_id)
+        SELECT cs.command_id, s.id
+        FROM command_servers cs
+        JOIN ssh_connections s ON s.alias = cs.ssh_alias
+        JOIN commands c ON c.id = cs.command_id
+    ''')
+    cursor.execute('SELECT COUNT(*) FROM command_servers')
+    old_count = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM command_servers_v2')
+    new_count = cursor.fetchone()[0]
+    if new_count != old_count:
+        print(f"Dropped {old_count - new_count} dangling command-server associations")
+    cursor.execute('DROP TABLE command_servers')
+    cursor.execute('ALTER TABLE command_servers_v2 RENAME TO command_servers')
+
+
+def _insert_command_server(cursor, command_id, alias):
+    """Συσχέτιση εντολής με server μέσα σε υπάρχον transaction (άγνωστα aliases αγνοούνται)."""
+    cursor.execute(
+        'INSERT OR IGNORE INTO command_servers (command_id, server_id) '
+        'SELECT ?, id FROM ssh_connections WHERE alias = ?',
+        (command_id, alias.strip())
+    )
+
+
+def _init_search_index(cursor):
+    """
+    Δημιουργεί τον πίνακα command_search (FTS5) και τα triggers που τον κρατούν
+    συγχρονισμένο με τους commands/command_phrases.
+    Το rowid κάθε εγγραφής είναι το id της εντολής. Το κείμενο αποθηκεύεται ήδη
+    κανονικοποιημένο από τη vs_fold() (πεζά, χωρίς τόνους), γιατί ο unicode61
+    tokenizer του SQLite δεν αφαιρεί τους ελληνικούς τόνους και το Python sqlite3
+    δεν μπορεί να καταχωρήσει δικό του FTS5 tokenizer.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='command_search'")
+    exists = cursor.fetchone() is not None
+
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS command_search USING fts5(
+            name, phrases, executable,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '1 2 3'
+        )
+    ''')
+
+    phrases_sql = "(SELECT group_concat(phrase, ' ') FROM command_phrases WHERE command_id = {id})"
+    cursor.executescript(f'''
+        CREATE TRIGGER IF NOT EXISTS commands_search_insert AFTER INSERT ON commands BEGIN
+            INSERT INTO command_search (rowid, name, phrases, executable)
+            VALUES (new.id, vs_fold(new.name), vs_fold({phrases_sql.format(id='new.id')}), vs_fold(new.executable));
+        END;
+        CREATE TRIGGER IF NOT EXISTS commands_search_update AFTER UPDATE ON commands BEGIN
+            DELETE FROM command_search WHERE rowid = old.id;
+            INSERT INTO command_search (rowid, name, phrases, executable)
+            VALUES (new.id, vs_fold(new.name), vs_fold({phrases_sql.format(id='new.id')}), vs_fold(new.executable));
+        END;
+        CREATE TRIGGER IF NOT EXISTS commands_search_delete AFTER DELETE ON commands BEGIN
+            DELETE FROM command_search WHERE rowid = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS phrases_search_insert AFTER INSERT ON command_phrases BEGIN
+            UPDATE command_search SET phrases = vs_fold({phrases_sql.format(id='new.command_id')})
+            WHERE rowid = new.command_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS phrases_search_delete AFTER DELETE ON command_phrases BEGIN
+            UPDATE command_search SET phrases = vs_fold({phrases_sql.format(id='old.command_id')})
+            WHERE rowid = old.command_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS phrases_search_update AFTER UPDATE ON command_phrases BEGIN
+            UPDATE command_search SET phrases = vs_fold({phrases_sql.format(id='old.command_id')})
+            WHERE rowid = old.command_id;
+            UPDATE command_search SET phrases = vs_fold({phrases_sql.format(id='new.command_id')})
+            WHERE rowid = new.command_id;
+        END;
+    ''')
+
+    if not exists:
+        # Πρώτη δημιουργία: γέμισμα από τα υπάρχοντα δεδομένα
+        cursor.execute(f'''
+            INSERT INTO command_search (rowid, name, phrases, executable)
+            SELECT c.id, vs_fold(c.name), vs_fold({phrases_sql.format(id='c.id')}), vs_fold(c.executable)
+            FROM commands c
+        ''')
+
+
+# --- Configuration snapshot ---
+
+def _name_position(commands, name):
+    """Η θέση του name στη λίστα εντολών ταξινομημένων κατά όνομα (δυαδική αναζήτηση)."""
+    lo, hi = 0, len(commands)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if commands[mid]['name'] < name:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class ConfigSnapshot:
+    """
+    Αμετάβλητη εικόνα των εντολών, των SSH συνδέσεων, των σκηνών και των συσχετίσεών τους.
+
+    Φορτώνεται μία φορά από τη βάση και αντικαθίσταται (copy-on-write) μετά από
+    κάθε εγγραφή μέσω του database.py: το νέο snapshot είναι αντίγραφο του
+    προηγούμενου με μόνο τις εγγραφές που άλλαξαν φορτωμένες ξανά (βλ. patched).
+    Τα worker threads τη διαβάζουν
+    χωρίς locks και χωρίς δικές τους συνδέσεις SQLite: ένα snapshot δεν αλλάζει
+    ποτέ, οπότε όποιος κρατάει αναφορά σε αυτό βλέπει μια συνεπή εικόνα.
+    Οι εγγραφές είναι read-only mappings, με tuples για 'aliases' και 'phrases'.
+    Οι σκηνές έχουν 'steps': tuple από βήματα {'key', 'command_id', 'command', 'aliases', 'after'}.
+    """
+
+    def __init__(self, commands, connections, version, db_stat=None, settings=None, scenes=()):
+        self.version = version
+        self.settings = MappingProxyType(dict(settings or {}))  # app_settings, με τιμές από JSON
+        self.db_stat = db_stat  # (path, mtime_ns, size) του αρχείου κατά τη φόρτωση
+        self.commands = tuple(commands)  # Ταξινομημένες κατά όνομα
+        self.connections = tuple(connections)  # Ταξινομημένες κατά alias
+        self.scenes = tuple(scenes)  # Ταξινομημένες κατά όνομα
+
+        self._by_id = {}
+        self._by_name = {}
+        self._by_phrase = {}
+        self._templates_by_id = {}  # id εντολής -> [(id, CommandTemplate), ...]
+        for cmd in self.commands:
+            self._index(cmd)
+        self._sort_templates()
+        self._by_alias = {conn['alias']: conn for conn in self.connections}
+        self._scenes_by_name = {scene['name']: scene for scene in self.scenes}
+
+    def _index(self, cmd):
+        self._by_id[cmd['id']] = cmd
+        self._by_name[cmd['name']] = cmd
+        # Templates μπορεί να είναι και οι εναλλακτικές φράσεις μιας εντολής
+        templates = []
+        for text in (cmd['name'],) + cmd['phrases']:
+            if text != cmd['name']:
+                self._by_phrase[text] = cmd
+            if not command_templates.is_template(text):
+                continue
+            try:
+                templates.append((cmd['id'], command_templates.compile_template(text)))
+            except command_templates.TemplateError as e:
+                print(f"Warning: Invalid command template {text!r}: {e}")
+        if templates:
+            self._templates_by_id[cmd['id']] = templates
+
+    def _unindex(self, cmd):
+        del self._by_id[cmd['id']]
+        if self._by_name.get(cmd['name']) is cmd:
+            del self._by_name[cmd['name']]
+        for text in cmd['phrases']:
+            if self._by_phrase.get(text) is cmd:
+                del self._by_phrase[text]
+        self._templates_by_id.pop(cmd['id'], None)
+
+    def _sort_templates(self):
+        # Με τη σειρά των εντολών (κατά όνομα), όπως και στην πλήρη φόρτωση
+        templates = [m for cmd in self.commands for m in self._templates_by_id.get(cmd['id'], ())]
+        # Περισσότερο σταθερό κείμενο = πιο συγκεκριμένο template
+        templates.sort(key=lambda m: m[1].literal_length, reverse=True)
+        self.templates = tuple(templates)
+
+    def patched(self, version, db_stat, commands=(), removed=(), scenes=None, settings=None):
+        """
+        Νέο snapshot ίδιο με αυτό εκτός από τις εντολές που άλλαξαν, χωρίς να
+        ξαναφορτωθούν οι υπόλοιπες (και να ξαναγίνουν compile τα templates τους).
+        commands: οι νέες εκδοχές εντολών (νέων ή αλλαγμένων)· removed: ids που διαγράφηκαν
+        scenes, settings: οι νέες σκηνές/ρυθμίσεις, ή None αν δεν άλλαξαν
+        """
+        new = object.__new__(ConfigSnapshot)
+        new.version = version
+        new.db_stat = db_stat
+        new.settings = self.settings if settings is None else MappingProxyType(dict(settings))
+        new.connections = self.connections
+        new._by_alias = self._by_alias
+        if scenes is None:
+            new.scenes, new._scenes_by_name = self.scenes, self._scenes_by_name
+        else:
+            new.scenes = tuple(scenes)
+            new._scenes_by_name = {scene['name']: scene for scene in new.scenes}
+
+        new._by_id = dict(self._by_id)
+        new._by_name = dict(self._by_name)
+        new._by_phrase = dict(self._by_phrase)
+        new._templates_by_id = dict(self._templates_by_id)
+        changed = set(removed) | {cmd['id'] for cmd in commands}
+        kept = list(self.commands)
+        for command_id in changed:
+            old = new._by_id.get(command_id)
+            if old is not None:
+                new._unindex(old)
+                del kept[_name_position(kept, old['name'])]
+        for cmd in commands:
+            new._index(cmd)
+            kept.insert(_name_position(kept, cmd['name']), cmd)
+        new.commands = tuple(kept)
+        if any(command_id in self._templates_by_id or command_id in new._templates_by_id
+               for command_id in changed):
+            new._sort_templates()
+        else:
+            new.templates = self.templates
+        return new
+
+    def command_by_id(self, command_id):
+        return self._by_id.get(command_id)
+
+    def command_by_name(self, name):
+        return self._by_name.get(name)
+
+    def command_by_phrase(self, phrase):
+        return self._by_phrase.get(phrase)
+
+    def connection(self, alias):
+        return self._by_alias.get(alias)
+
+    def scene_by_name(self, name):
+        return self._scenes_by_name.get(name)
+
+    def resolve(self, aliases):
+        """
+        Επιλύει τα στοιχεία σύνδεσης όλων των targets με ένα πέρασμα.
+        Returns: {alias: σύνδεση ή None αν δεν υπάρχει}
+        """
+        return {alias: self._by_alias.get(alias) for alias in aliases}
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()  # Σειριοποιεί μόνο τη φόρτωση/δημοσίευση, όχι τις αναγνώσεις
+
+# Κάθε πόσα δευτερόλεπτα το get_snapshot ελέγχει αν το αρχείο άλλαξε από άλλη διεργασία
+SNAPSHOT_CHECK_INTERVAL = 1.0
+_snapshot_checked_at = 0.0
+
+
+class _Changes:
+    """Τι άλλαξε από μια εγγραφή (ή ένα write_batch), για το επόμενο snapshot."""
+
+    def __init__(self, commands=(), scenes=False, settings=False, full=False):
+        self.commands = set(commands)  # ids εντολών (νέων, αλλαγμένων ή διαγραμμένων)
+        self.scenes = scenes
+        self.settings = settings
+        self.full = full               # Πλήρης φόρτωση (π.χ. συνδέσεις, import)
+
+    def update(self, other):
+        self.commands |= other.commands
+        self.scenes = self.scenes or other.scenes
+        self.settings = self.settings or other.settings
+        self.full = self.full or other.full
+
+
+def _db_stat():
+    try:
+        st = os.stat(DB_PATH)
+        return (DB_PATH, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _load_commands(cursor, ids=None):
+    """
+    Οι εντολές ταξινομημένες κατά όνομα, ως read-only mappings με aliases και phrases.
+    ids: μόνο αυτές (None = όλες)
+    """
+    where = ''
+    params = ()
+    if ids is not None:
+        params = tuple(ids)
+        where = 'WHERE {column} IN (%s)' % ','.join('?' * len(params))
+    cursor.execute('SELECT id, name, executable, cache_ttl, outbox_ttl, idempotent, retry_policy '
+                   f'FROM commands {where.format(column="id")} ORDER BY name', params)
+    rows = cursor.fetchall()
+    
+    # Όλοι οι servers με ένα query (αντί για ένα ανά εντολή)
+    cursor.execute(f'''
+        SELECT cs.command_id, s.alias
+        FROM command_servers cs JOIN ssh_connections s ON s.id = cs.server_id
+        {where.format(column="cs.command_id")}
+        ORDER BY s.alias
+    ''', params)
+    aliases = {}
+    for alias_row in cursor.fetchall():
+        aliases.setdefault(alias_row[0], []).append(alias_row[1])
+    
+    # Όλες οι φράσεις με ένα query (αντί για ένα ανά εντολή)
+    cursor.execute(f'SELECT command_id, phrase FROM command_phrases {where.format(column="command_id")} '
+                   'ORDER BY phrase', params)
+    phrases = {}
+    for phrase_row in cursor.fetchall():
+        phrases.setdefault(phrase_row[0], []).append(phrase_row[1])
+    
+    commands = []
+    for row in rows:
+        cmd = dict(row)
+        cmd['aliases'] = tuple(aliases.get(cmd['id'], ()))
+        cmd['phrases'] = tuple(phrases.get(cmd['id'], ()))
+        commands.append(MappingProxyType(cmd))
+    return commands
+
+
+def _load_settings(cursor):
+    cursor.execute('SELECT key, value FROM app_settings')
+    return {row['key']: json.loads(row['value']) for row in cursor.fetchall()}
+
+
+@_timed
+def _load_snapshot(version):
+    """Διαβάζει όλη τη ρύθμιση με μία σύνδεση και χτίζει ένα ConfigSnapshot."""
+    db_stat = _db_stat()
+    conn = get_connection()
+    cursor = conn.cursor()
+    commands = _load_commands(cursor)
+    cursor.execute(_CONNECTIONS_QUERY)
+    connections = [MappingProxyType(dict(row)) for row in cursor.fetchall()]
+    settings = _load_settings(cursor)
+    scenes = _load_scenes(cursor)
+    conn.close()
+    return ConfigSnapshot(commands, connections, version, db_stat, settings, scenes)
+
+
+@_timed
+def _patch_snapshot(snapshot, version, changes):
+    """Το snapshot με ξαναφορτωμένες μόνο τις εγγραφές που άλλαξαν (βλ. ConfigSnapshot.patched)."""
+    db_stat = _db_stat()
+    conn = get_connection()
+    cursor = conn.cursor()
+    commands = _load_commands(cursor, changes.commands) if changes.commands else []
+    removed = changes.commands - {cmd['id'] for cmd in commands}
+    # Οι σκηνές αναφέρουν εντολές με το όνομά τους (και σβήνονται μαζί τους): λίγες γραμμές
+    scenes = _load_scenes(cursor) if changes.scenes or changes.commands else None
+    settings = _load_settings(cursor) if changes.settings else None
+    conn.close()
+    return snapshot.patched(version, db_stat, commands, removed, scenes, settings)
+
+
+def _load_scenes(cursor):
+    """Οι σκηνές με τα βήματά τους, με ένα query ανά πίνακα."""
+    cursor.execute('''
+        SELECT st.id, st.scene_id, st.step_key, st.command_id, c.name AS command
+        FROM scene_steps st JOIN commands c ON c.id = st.command_id
+        ORDER BY st.scene_id, st.position, st.id
+    ''')
+    step_rows = cursor.fetchall()
+
+    cursor.execute('''
+        SELECT ss.step_id, s.alias
+        FROM scene_step_servers ss JOIN ssh_connections s ON s.id = ss.server_id
+        ORDER BY s.alias
+    ''')
+    aliases = {}
+    for row in cursor.fetchall():
+        aliases.setdefault(row[0], []).append(row[1])
+
+    cursor.execute('''
+        SELECT d.step_id, p.step_key
+        FROM scene_step_deps d JOIN scene_steps p ON p.id = d.depends_on
+        ORDER BY p.position, p.id
+    ''')
+    after = {}
+    for row in cursor.fetchall():
+        after.setdefault(row[0], []).append(row[1])
+
+    steps = {}
+    for row in step_rows:
+        steps.setdefault(row['scene_id'], []).append(MappingProxyType({
+            'key': row['step_key'],
+            'command_id': row['command_id'],
+            'command': row['command'],
+            'aliases': tuple(aliases.get(row['id'], ())),
+            'after': tuple(after.get(row['id'], ())),
+        }))
+
+    cursor.execute('SELECT id, name FROM scenes ORDER BY name')
+    return [MappingProxyType({'id': row['id'], 'name': row['name'],
+                              'steps': tuple(steps.get(row['id'], ()))})
+            for row in cursor.fetchall()]
+
+
+def _publish_snapshot(commands=None, scenes=False, settings=False, changes=None):
+    """
+    Δημοσιεύει νέο snapshot (καλείται μετά από κάθε commit). Η αντικατάσταση
+    της αναφοράς είναι ατομική· όσοι διαβάζουν ήδη το παλιό snapshot συνεχίζουν με αυτό.
+    commands: ids εντολών που άλλαξαν· scenes/settings: άλλαξαν οι σκηνές/ρυθμίσεις.
+    Τότε ξαναφορτώνονται μόνο αυτά. Χωρίς ορίσματα (π.χ. συνδέσεις, import): όλα.
+    changes: _Changes αντί για τα παραπάνω (βλ. write_batch)
+    """
+    global _snapshot, _snapshot_checked_at
+    if changes is None:
+        changes = _Changes(commands or (), scenes, settings,
+                           full=commands is None and not scenes and not settings)
+    batch = getattr(_batch, 'current', None)
+    if batch is not None and _snapshot is not None:
+        # Δημοσιεύεται μετά το commit του batch
+        if batch.changes is None:
+            batch.changes = _Changes()
+        batch.changes.update(changes)
+        return _snapshot
+    with _snapshot_lock:
+        old = _snapshot
+        version = old.version + 1 if old else 1
+        # Αν το αρχείο άλλαξε και από άλλη διεργασία πριν από αυτή την εγγραφή,
+        # το snapshot δεν αρκεί να διορθωθεί μόνο για τις δικές μας αλλαγές
+        stat_before = getattr(_local, 'stat_before', None)
+        if changes.full or old is None or old.db_stat is None or old.db_stat != stat_before:
+            _snapshot = _load_snapshot(version)
+        else:
+            _snapshot = _patch_snapshot(old, version, changes)
+        _snapshot_checked_at = time.monotonic()
+    return _snapshot
+
+
+def get_snapshot():
+    """
+    Επιστρέφει το τρέχον ConfigSnapshot (lock-free).
+    Αν η βάση άλλαξε από άλλη διεργασία (π.χ. import από άλλο εργαλείο),
+    φορτώνεται ξανά· ο έλεγχος του αρχείου γίνεται το πολύ μία φορά ανά
+    SNAPSHOT_CHECK_INTERVAL.
+    """
+    global _snapshot_checked_at
+    _wait_for_writes()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.db_stat is None or snapshot.db_stat[0] != DB_PATH:
+        return _publish_snapshot()
+    now = time.monotonic()
+    if now - _snapshot_checked_at >= SNAPSHOT_CHECK_INTERVAL:
+        _snapshot_checked_at = now
+        if snapshot.db_stat != _db_stat():
+            snapshot = _publish_snapshot()
+    return snapshot
+
+
+def _command_copy(cmd):
+    """Μεταβλητό αντίγραφο μιας εγγραφής του snapshot για τους callers."""
+    return dict(cmd, aliases=list(cmd['aliases']), phrases=list(cmd['phrases']))
+
+
+def get_template_matchers():
+    """
+    Επιστρέφει τους compiled matchers για τις παραμετρικές εντολές.
+    Τα templates γίνονται compile μία φορά ανά snapshot.
+    Returns: [(command_id, CommandTemplate), ...] με τα πιο συγκεκριμένα πρώτα.
+    """
+    return get_snapshot().templates
+
+
+@_timed
+def match_command(text):
+    """
+    Βρίσκει την εντολή για ένα αναγνωρισμένο κείμενο.
+    Πρώτα ακριβές match στο όνομα ή σε εναλλακτική φράση, μετά τα παραμετρικά templates.
+    Returns: {'id', 'name', 'executable', 'aliases', 'slots'} ή None.
+    Για templates το 'executable' έχει ήδη τις (quoted) τιμές των slots.
+    """
+    text = text.strip().lower()
+    snapshot = get_snapshot()
+    cmd = snapshot.command_by_name(text) or snapshot.command_by_phrase(text)
+    if cmd:
+        cmd = _command_copy(cmd)
+        cmd['slots'] = {}
+        return cmd
+
+    for command_id, template in snapshot.templates:
+        values = template.match(text)
+        if values is None:
+            continue
+        cmd = snapshot.command_by_id(command_id)
+        if cmd is None:
+            continue
+        cmd = _command_copy(cmd)
+        cmd['executable'] = template.render(cmd['executable'], values)
+        cmd['slots'] = values
+        return cmd
+    return None
+
+
+def get_all_commands():
+    """
+    Επιστρέφει όλα τα προστάγματα με τους servers τους.
+    Returns: [{'id': 1, 'name': 'foo', 'executable': 'bar', 'aliases': ['Primary', 'Secondary']}, ...]
+    """
+    return [_command_copy(cmd) for cmd in get_snapshot().commands]
+
+
+def get_command_details(name):
+    """
+    Επιστρέφει τις λεπτομέρειες ενός προστάγματος με τη λίστα των servers του.
+    Returns: {'id': 1, 'name': 'foo', 'executable': 'bar', 'aliases': ['Primary', 'Secondary']}
+    """
+    cmd = get_snapshot().command_by_name(name)
+    return _command_copy(cmd) if cmd else None
+
+
+def get_command_by_phrase(phrase):
+    """
+    Επιστρέφει την εντολή στην οποία ανήκει μια εναλλακτική φράση.
+    Returns: {'id', 'name', 'executable', 'aliases'} ή None
+    """
+    cmd = get_snapshot().command_by_phrase(phrase)
+    return _command_copy(cmd) if cmd else None
+
+
+def _search_query(text, columns=None):
+    """
+    Μετατρέπει κείμενο χρήστη σε ασφαλές FTS5 query: κάθε λέξη ως prefix (AND).
+    Returns: query string ή None αν δεν υπάρχουν λέξεις.
+    """
+    tokens = re.findall(r'\w+', command_templates.fold(text))
+    if not tokens:
+        return None
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    if columns:
+        query = '{%s} : (%s)' % (' '.join(columns), query)
+    return query
+
+
+def _run_search(query, limit):
+    """Εκτελεί ένα FTS5 query με κατάταξη bm25 και επιστρέφει τις εντολές με τους servers τους."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f'''SELECT c.id, c.name, c.executable
+            FROM (
+                SELECT rowid, bm25(command_search, {', '.join(str(w) for w in SEARCH_WEIGHTS)}) AS score
+                FROM command_search WHERE command_search MATCH ?
+                ORDER BY score
+                LIMIT {SEARCH_CANDIDATES}
+            ) s JOIN commands c ON c.id = s.rowid
+            ORDER BY s.score
+            LIMIT ?''',
+        (query, limit)
+    )
+    commands = [dict(row) for row in cursor.fetchall()]
+    
+    # Servers όλων των αποτελεσμάτων με ένα query
+    aliases = {}
+    if commands:
+        placeholders = ','.join('?' * len(commands))
+        cursor.execute(
+            f'''SELECT cs.command_id, s.alias
+                FROM command_servers cs JOIN ssh_connections s ON s.id = cs.server_id
+                WHERE cs.command_id IN ({placeholders}) ORDER BY s.alias''',
+            [cmd['id'] for cmd in commands]
+        )
+        for row in cursor.fetchall():
+            aliases.setdefault(row[0], []).append(row[1])
+    conn.close()
+    
+    for cmd in commands:
+        cmd['aliases'] = aliases.get(cmd['id'], [])
+    return commands
+
+
+@_timed
+def search_commands(text, limit=50):
+    """
+    Αναζήτηση εντολών σε όνομα, φράσεις και executable (χωρίς τόνους, case-insensitive).
+    Κάθε λέξη ταιριάζει ως prefix και τα αποτελέσματα κατατάσσονται με bm25
+    (το όνομα μετράει περισσότερο από τις φράσεις και αυτές από το executable).
+    Returns: [{'id', 'name', 'executable', 'aliases'}, ...]
+    """
+    query = _search_query(text)
+    if query is None:
+        return []
+    return _run_search(query, limit)
+
+
+@_timed
+def search_commands_prefix(text, limit=10):
+    """
+    Type-ahead: εντολές των οποίων το όνομα ή κάποια φράση ξεκινά με τις λέξεις που
+    πληκτρολογήθηκαν (η τελευταία μπορεί να είναι μισή).
+    Returns: [{'id', 'name', 'executable', 'aliases'}, ...]
+    """
+    query = _search_query(text, columns=('name', 'phrases'))
+    if query is None:
+        return []
+    return _run_search(query, limit)
+
+
+def get_commands_dict():
+    """
+    Διατήρηση συμβατότητας, αλλά τώρα επιστρέφει όλο το αντικείμενο αν χρειαστεί,
+    ή αν θέλουμε απλά το exec:
+    Αλλά για το main.py χρειάζεται και το alias.
+    Οπότε καλύτερα να μην το χρησιμοποιούμε ή να το αναβαθμίσουμε.
+    Για την ώρα επιστρέφει {name: executable} για απλότητα όπου χρειάζεται,
+    αλλά το handle_command πρέπει να αλλάξει.
+    """
+    commands = get_all_commands()
+    return {cmd['name']: cmd['executable'] for cmd in commands}
+
+
+def get_command(command_id):
+    """Επιστρέφει ένα πρόσταγμα με βάση το ID."""
+    cmd = get_snapshot().command_by_id(command_id)
+    return _command_copy(cmd) if cmd else None
+
+
+@_timed
+def add_command(name, executable, aliases, phrases=None, cache_ttl=0, outbox_ttl=0,
+                idempotent=False, retry_policy=None):
+    """
+    Προσθέτει νέο πρόσταγμα.
+    aliases: λίστα από alias strings, π.χ. ['Primary', 'Secondary']
+    phrases: προαιρετική λίστα από εναλλακτικές φράσεις ενεργοποίησης
+    cache_ttl: δευτερόλεπτα cache για εντολές που μόνο διαβάζουν (0 = χωρίς cache)
+    outbox_ttl: δευτερόλεπτα αναμονής στην ουρά αν ο host δεν απαντά (0 = χωρίς ουρά)
+    idempotent: True αν η εντολή επαναλαμβάνεται άφοβα μετά από σφάλμα (βλ. retry.py)
+    retry_policy: JSON της πολιτικής επανάληψης (None = η default)
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO commands (name, executable, cache_ttl, outbox_ttl, idempotent, retry_policy) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (name.strip().lower(), executable.strip(),
+             max(0, int(cache_ttl or 0)), max(0, int(outbox_ttl or 0)),
+             1 if idempotent else 0, retry_policy or None)
+        )
+        new_id = cursor.lastrowid
+        
+        # Προσθήκη των server associations
+        for alias in aliases:
+            _insert_command_server(cursor, new_id, alias)
+        
+        if phrases:
+            _replace_command_phrases(cursor, new_id, phrases)
+        
+        conn.commit()
+        conn.close()
+        _publish_snapshot(commands=[new_id])
+        return new_id
+    except sqlite3.IntegrityError:
+        return None
+
+
+@_timed
+def update_command(command_id, name, executable, aliases, phrases=None, cache_ttl=None, outbox_ttl=None,
+                   idempotent=None, retry_policy=None):
+    """
+    Ενημερώνει υπάρχον πρόσταγμα.
+    aliases: λίστα από alias strings
+    phrases: λίστα εναλλακτικών φράσεων (None = οι φράσεις μένουν ως έχουν)
+    cache_ttl, outbox_ttl, idempotent: βλ. add_command (None = μένει ως έχει)
+    retry_policy: βλ. add_command (None = μένει ως έχει, '' = η default)
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commands SET name = ?, executable = ? WHERE id = ?',
+            (name.strip().lower(), executable.strip(), command_id)
+        )
+        affected = cursor.rowcount
+        for column, value in (('cache_ttl', cache_ttl), ('outbox_ttl', outbox_ttl),
+                              ('idempotent', idempotent), ('retry_policy', retry_policy)):
+            if value is not None:
+                cursor.execute(
+                    f'UPDATE commands SET {column} = ? WHERE id = ?',
+                    (_command_column_value(column, value), command_id)
+                )
+        
+        # Ενημέρωση των server associations (inline για να μοιραστούν το ίδιο transaction)
+        # Διαγραφή υφιστάμενων associations
+        cursor.execute('DELETE FROM command_servers WHERE command_id = ?', (command_id,))
+        
+        # Προσθήκη νέων associations
+        for alias in aliases:
+            _insert_command_server(cursor, command_id, alias)
+        
+        if phrases is not None:
+            _replace_command_phrases(cursor, command_id, phrases)
+        
+        conn.commit()
+        conn.close()
+        _publish_snapshot(commands=[command_id])
+        return affected > 0
+    except sqlite3.IntegrityError:
+        return False
+
+
+@_timed
+def delete_command(command_id):
+    """Διαγράφει πρόσταγμα."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    # Το ON DELETE CASCADE θα διαγράψει αυτόματα τα command_servers και command_phrases records
+    cursor.execute('DELETE FROM commands WHERE id = ?', (command_id,))
+    conn.commit()
+    affected = cursor.rowcount
+    conn.close()
+    _publish_snapshot(commands=[command_id])
+    return affected > 0
+
+
+def get_command_servers(command_id):
+    """
+    Επιστρέφει λίστα με τα aliases των SSH servers για μια συγκεκριμένη εντολή.
+    Returns: ['Primary', 'Secondary', ...]
+    """
+    cmd = get_snapshot().command_by_id(command_id)
+    return list(cmd['aliases']) if cmd else []
+
+
+def get_server_commands(alias):
+    """
+    Αντίστροφη αναζήτηση: οι εντολές που εκτελούνται σε έναν server.
+    Returns: [{'id': 1, 'name': 'foo', 'executable': 'bar'}, ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''SELECT c.id, c.name, c.executable
+           FROM ssh_connections s
+           JOIN command_servers cs ON cs.server_id = s.id
+           JOIN commands c ON c.id = cs.command_id
+           WHERE s.alias = ? ORDER BY c.name''',
+        (alias,)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def update_command_servers(conn, cursor, command_id, aliases):
+    """
+    Ενημερώνει τους SSH servers για μια εντολή.
+    Χρησιμοποιεί υπάρχον connection και cursor για transaction safety.
+    aliases: λίστα από alias strings
+    """
+    # Διαγραφή υφιστάμενων associations
+    cursor.execute('DELETE FROM command_servers WHERE command_id = ?', (command_id,))
+    
+    # Προσθήκη νέων associations
+    for alias in aliases:
+        _insert_command_server(cursor, command_id, alias)
+
+
+
+# --- Εναλλακτικές φράσεις ---
+
+def get_command_phrases(command_id):
+    """
+    Επιστρέφει τις εναλλακτικές φράσεις μιας εντολής.
+    Returns: ['φράση 1', 'φράση 2', ...]
+    """
+    cmd = get_snapshot().command_by_id(command_id)
+    return list(cmd['phrases']) if cmd else []
+
+
+def _replace_command_phrases(cursor, command_id, phrases):
+    """
+    Αντικαθιστά τις φράσεις μιας εντολής μέσα σε υπάρχον transaction.
+    Φράσεις που ανήκουν ήδη σε άλλη εντολή ή ταυτίζονται με όνομα εντολής αγνοούνται.
+    """
+    cursor.execute('DELETE FROM command_phrases WHERE command_id = ?', (command_id,))
+    for phrase in phrases:
+        phrase = phrase.strip().lower()
+        if not phrase:
+            continue
+        cursor.execute('SELECT 1 FROM commands WHERE name = ?', (phrase,))
+        if cursor.fetchone():
+            continue
+        cursor.execute(
+            'INSERT OR IGNORE INTO command_phrases (command_id, phrase) VALUES (?, ?)',
+            (command_id, phrase)
+        )
+
+
+@_timed
+def add_command_phrase(command_id, phrase, learned=False):
+    """
+    Προσθέτει μια εναλλακτική φράση σε εντολή.
+    learned=True για φράσεις που μαθεύτηκαν από διόρθωση αποτυχημένης αναγνώρισης.
+    Returns: True αν προστέθηκε, False αν υπάρχει ήδη (ως φράση ή ως όνομα εντολής).
+    """
+    phrase = phrase.strip().lower()
+    if not phrase:
+        return False
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT 1 FROM commands WHERE name = ?', (phrase,))
+        if cursor.fetchone():
+            return False
+        cursor.execute(
+            'INSERT INTO command_phrases (command_id, phrase, learned) VALUES (?, ?, ?)',
+            (command_id, phrase, 1 if learned else 0)
+        )
+        conn.commit()
+        _publish_snapshot(commands=[command_id])
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+
+# --- Σκηνές ---
+
+def _scene_copy(scene):
+    """Μεταβλητό αντίγραφο μιας σκηνής του snapshot (και η μορφή του export)."""
+    return {
+        'id': scene['id'],
+        'name': scene['name'],
+        'steps': [dict(step, aliases=list(step['aliases']), after=list(step['after']))
+                  for step in scene['steps']],
+    }
+
+
+def get_scenes():
+    """
+    Επιστρέφει όλες τις σκηνές με τα βήματά τους.
+    Returns: [{'id', 'name', 'steps': [{'key', 'command_id', 'command', 'aliases', 'after'}, ...]}, ...]
+    aliases κενό = οι servers της εντολής· after = τα keys των βημάτων που πρέπει να πετύχουν πρώτα.
+    """
+    return [_scene_copy(scene) for scene in get_snapshot().scenes]
+
+
+def get_scene(name):
+    """Επιστρέφει μια σκηνή με βάση το όνομα (φράση ενεργοποίησης) ή None."""
+    scene = get_snapshot().scene_by_name(name)
+    return _scene_copy(scene) if scene else None
+
+
+@_timed
+def match_scene(text):
+    """Η σκηνή για ένα αναγνωρισμένο κείμενο (ακριβές όνομα) ή None."""
+    return get_scene(text.strip().lower())
+
+
+def _replace_scene_steps(cursor, scene_id, steps):
+    """
+    Αντικαθιστά τα βήματα μιας σκηνής μέσα σε υπάρχον transaction.
+    steps: [{'key', 'command' (όνομα εντολής), 'aliases', 'after'}, ...]
+    Βήματα με εντολή που δεν υπάρχει παραλείπονται (π.χ. import από άλλη βάση),
+    όπως και οι εξαρτήσεις από αυτά.
+    """
+    cursor.execute('DELETE FROM scene_steps WHERE scene_id = ?', (scene_id,))
+    step_ids = {}
+    for position, step in enumerate(steps):
+        key = step.get('key') or step['command']
+        cursor.execute(
+            '''INSERT INTO scene_steps (scene_id, step_key, command_id, position)
+               SELECT ?, ?, id, ? FROM commands WHERE name = ?''',
+            (scene_id, key, position, step['command'])
+        )
+        if cursor.rowcount:
+            step_ids[key] = cursor.lastrowid
+        else:
+            print(f"Warning: Scene step {key!r} refers to unknown command {step['command']!r}")
+
+    for step in steps:
+        step_id = step_ids.get(step.get('key') or step['command'])
+        if step_id is None:
+            continue
+        for alias in step.get('aliases') or ():
+            cursor.execute(
+                '''INSERT OR IGNORE INTO scene_step_servers (step_id, server_id)
+                   SELECT ?, id FROM ssh_connections WHERE alias = ?''',
+                (step_id, alias)
+            )
+        for key in step.get('after') or ():
+            if key in step_ids:
+                cursor.execute(
+                    'INSERT OR IGNORE INTO scene_step_deps (step_id, depends_on) VALUES (?, ?)',
+                    (step_id, step_ids[key])
+                )
+
+
+@_timed
+def save_scene(name, steps, old_name=None):
+    """
+    Αποθηκεύει (insert ή update) μια σκηνή με τα βήματά της.
+    Δεν ελέγχει το γράφημα (κύκλους, άγνωστες εντολές)· βλ. scenes.save_scene.
+    Returns: το id της σκηνής ή None αν το όνομα υπάρχει ήδη.
+    """
+    name = name.strip().lower()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if old_name:
+            cursor.execute('UPDATE scenes SET name = ? WHERE name = ?', (name, old_name))
+            cursor.execute('SELECT id FROM scenes WHERE name = ?', (name,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            scene_id = row[0]
+        else:
+            cursor.execute('INSERT INTO scenes (name) VALUES (?)', (name,))
+            scene_id = cursor.lastrowid
+        _replace_scene_steps(cursor, scene_id, steps)
+        conn.commit()
+    except sqlite3.IntegrityError:
+        return None
+    finally:
+        conn.close()
+    _publish_snapshot(scenes=True)
+    return scene_id
+
+
+@_timed
+def delete_scene(name):
+    """Διαγράφει μια σκηνή (τα βήματά της σβήνονται με CASCADE)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM scenes WHERE name = ?', (name,))
+    conn.commit()
+    affected = cursor.rowcount
+    conn.close()
+    _publish_snapshot(scenes=True)
+    return affected > 0
+
+
+# --- SSH Connection Managment ---
+
+def get_ssh_connections():
+    """Επιστρέφει όλες τις αποθηκευμένες συνδέσεις."""
+    return [dict(c) for c in get_snapshot().connections]
+
+@_timed
+def get_ssh_connection(alias):
+    """Επιστρέφει μια σύνδεση με βάση το alias."""
+    conn = get_snapshot().connection(alias)
+    return dict(conn) if conn else None
+
+@_timed
+def save_ssh_connection(alias, host, port, username, password, old_alias=None, compression=False, via=None):
+    """
+    Αποθηκεύει (insert ή update) μια σύνδεση.
+    Αν δοθεί old_alias, κάνουμε update το record που είχε αυτό το alias.
+    Αλλιώς κάνουμε insert ή replace.
+    via: alias του jump host (bastion) ή None για απευθείας σύνδεση.
+    Οι αλγόριθμοι (ciphers/macs/kex) δεν αλλάζουν εδώ· βλ. set_connection_algorithms.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if old_alias:
+            cursor.execute(
+                '''UPDATE ssh_connections SET alias=?, host=?, port=?, username=?, password=?, compression=?,
+                       via_id=(SELECT id FROM ssh_connections WHERE alias = ?)
+                   WHERE alias=?''',
+                (alias, host, port, username, password, int(bool(compression)), via, old_alias)
+            )
+        else:
+            cursor.execute(
+                '''INSERT INTO ssh_connections (alias, host, port, username, password, compression, via_id)
+                   VALUES (?, ?, ?, ?, ?, ?, (SELECT id FROM ssh_connections WHERE alias = ?))''',
+                (alias, host, port, username, password, int(bool(compression)), via)
+            )
+        conn.commit()
+    except sqlite3.IntegrityError:
+        return False  # Duplicate alias
+    finally:
+        conn.close()
+    _publish_snapshot()
+    return True
+
+@_timed
+def delete_ssh_connection(alias):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM ssh_connections WHERE alias = ?', (alias,))
+    conn.commit()
+    affected = cursor.rowcount
+    conn.close()
+    _publish_snapshot()
+    return affected > 0
+
+def set_connection_algorithms(alias, ciphers=None, macs=None, kex=None):
+    """
+    Ορίζει τους προτιμώμενους αλγορίθμους μιας σύνδεσης (λίστες, με σειρά προτίμησης).
+    None = το profile της συσκευής.
+    """
+    def joined(names):
+        return ','.join(names) if names else None
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'UPDATE ssh_connections SET ciphers=?, macs=?, kex=? WHERE alias=?',
+        (joined(ciphers), joined(macs), joined(kex), alias)
+    )
+    conn.commit()
+    affected = cursor.rowcount
+    conn.close()
+    _publish_snapshot()
+    return affected > 0
+
+
+def get_app_setting(key, default=None):
+    """Τιμή από τον πίνακα app_settings (από το snapshot)."""
+    return get_snapshot().settings.get(key, default)
+
+
+def set_app_setting(key, value):
+    """Αποθηκεύει μια ρύθμιση της εφαρμογής (οποιαδήποτε τιμή σειριοποιείται σε JSON)."""
+    conn = get_connection()
+    conn.execute(
+        'INSERT INTO app_settings (key, value) VALUES (?, ?) '
+        'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+        (key, json.dumps(value, ensure_ascii=False))
+    )
+    conn.commit()
+    conn.close()
+    _publish_snapshot(settings=True)
+
+
+def get_connection_aliases():
+    """Επιστρέφει λίστα με τα ονόματα των aliases."""
+    return [c['alias'] for c in get_snapshot().connections]
+
+# Helper for database.get_setting compatibility if needed
+def get_setting(key):
+    # This is deprecated but main.py calls it.
+    # We should map 'host', 'port', etc to the 'Primary' connection
+    # or just return None to force main.py to use new logic.
+    # But main.py lines 54-71 rely on this. 
+    # Better to update main.py. But for now return defaults from Primary.
+    conn = get_ssh_connection('Primary')
+    if conn and key in conn:
+        return conn[key]
+    return None
+
+
+@_timed
+def export_db_data():
+    """Εξάγει όλα τα δεδομένα της βάσης σε λεξικό."""
+    return {
+        "commands": get_all_commands(),
+        "ssh_connections": get_ssh_connections(),
+        "scenes": get_scenes()
+    }
+
+
+@_timed
+def import_db_data(data, mode='merge'):
+    """
+    Εισάγει δεδομένα στη βάση.
+    mode: 'merge' (προσθήκη/ενημέρωση) ή 'replace' (διαγραφή όλων πριν την εισαγωγή).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if mode == 'replace':
+            cursor.execute("DELETE FROM scenes")
+            cursor.execute("DELETE FROM command_servers")
+            cursor.execute("DELETE FROM command_phrases")
+            cursor.execute("DELETE FROM commands")
+            cursor.execute("DELETE FROM ssh_connections")
+        
+        if "ssh_connections" in data:
+            for ssh in data["ssh_connections"]:
+                # Upsert αντί για INSERT OR REPLACE: το REPLACE σβήνει τη γραμμή και, με
+                # ενεργά foreign keys, θα έσβηνε με CASCADE και τις συσχετίσεις της
+                cursor.execute(
+                    '''INSERT INTO ssh_connections
+                           (alias, host, port, username, password, ciphers, macs, kex, compression)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(alias) DO UPDATE SET
+                           host = excluded.host, port = excluded.port,
+                           username = excluded.username, password = excluded.password,
+                           ciphers = excluded.ciphers, macs = excluded.macs,
+                           kex = excluded.kex, compression = excluded.compression''',
+                    (ssh['alias'], ssh['host'], ssh['port'], ssh['username'], ssh['password'],
+                     ssh.get('ciphers'), ssh.get('macs'), ssh.get('kex'), int(bool(ssh.get('compression'))))
+                )
+            # Τα via σε δεύτερο πέρασμα: ο bastion μπορεί να είναι μετά στη λίστα
+            for ssh in data["ssh_connections"]:
+                cursor.execute(
+                    '''UPDATE ssh_connections SET via_id = (SELECT id FROM ssh_connections WHERE alias = ?)
+                       WHERE alias = ?''',
+                    (ssh.get('via'), ssh['alias'])
+                )
+        
+        if "commands" in data:
+            for cmd in data["commands"]:
+                # Έλεγχος αν υπάρχει ήδη το command (για merge mode)
+                cursor.execute("SELECT id FROM commands WHERE name = ?", (cmd['name'],))
+                existing = cursor.fetchone()
+                
+                if existing:
+                    cmd_id = existing[0]
+                    cursor.execute(
+                        "UPDATE commands SET executable = ? WHERE id = ?",
+                        (cmd['executable'], cmd_id)
+                    )
+                    for column, _ in COMMAND_COLUMNS:
+                        if column in cmd:
+                            cursor.execute(
+                                f"UPDATE commands SET {column} = ? WHERE id = ?",
+                                (_command_column_value(column, cmd[column]), cmd_id)
+                            )
+                else:
+                    columns = [column for column, _ in COMMAND_COLUMNS]
+                    cursor.execute(
+                        f"INSERT INTO commands (name, executable, {', '.join(columns)}) "
+                        f"VALUES (?, ?{', ?' * len(columns)})",
+                        (cmd['name'], cmd['executable'],
+                         *(_command_column_value(column, cmd.get(column)) for column in columns))
+                    )
+                    cmd_id = cursor.lastrowid
+                
+                # Ενημέρωση των server associations
+                # Υποστήριξη παλιάς δομής (με 'alias') και νέας (με 'aliases')
+                if 'aliases' in cmd and cmd['aliases']:
+                    # Νέα δομή
+                    aliases = cmd['aliases']
+                elif 'alias' in cmd:
+                    # Παλιά δομή - backward compatibility
+                    aliases = [cmd['alias']]
+                else:
+                    # Fallback στο default
+                    aliases = [DEFAULT_ALIAS]
+                
+                # Διαγραφή υφιστάμενων associations
+                cursor.execute('DELETE FROM command_servers WHERE command_id = ?', (cmd_id,))
+                
+                # Προσθήκη νέων associations
+                for alias in aliases:
+                    _insert_command_server(cursor, cmd_id, alias)
+                
+                # Εναλλακτικές φράσεις (μόνο αν υπάρχουν στο αρχείο)
+                if 'phrases' in cmd:
+                    _replace_command_phrases(cursor, cmd_id, cmd['phrases'])
+        
+        # Οι σκηνές μετά τις εντολές και τους servers στους οποίους αναφέρονται
+        for scene in data.get("scenes", ()):
+            cursor.execute(
+                '''INSERT INTO scenes (name) VALUES (?)
+                   ON CONFLICT(name) DO NOTHING''',
+                (scene['name'],)
+            )
+            cursor.execute("SELECT id FROM scenes WHERE name = ?", (scene['name'],))
+            _replace_scene_steps(cursor, cursor.fetchone()[0], scene.get('steps', ()))
+        
+        conn.commit()
+        _publish_snapshot()
+        return True
+    except Exception as e:
+        print(f"Import error: {e}")
+        import traceback
+        traceback.print_exc()
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+# --- Κατάσταση εκτέλεσης (outbox, ιστορικό) ---
+#
+# Σε ξεχωριστό αρχείο δίπλα στη βάση ρυθμίσεων (π.χ. commands_state.db): εδώ
+# γράφουμε σε κάθε εκτέλεση, και στο commands.db κάθε εγγραφή αλλάζει το mtime
+# του, οπότε θα ξαναφόρτωνε το config snapshot (και θα ακύρωνε την cache
+# αποτελεσμάτων) σε όλες τις διεργασίες. Δεν υπάρχουν foreign keys προς τις
+# ρυθμίσεις· οι servers αναφέρονται με το alias τους.
+
+# Ιστορικό εκδόσεων της βάσης κατάστασης (PRAGMA user_version):
+# 1: outbox
+# 2: executions (ιστορικό εκτελέσεων), auto_vacuum = INCREMENTAL
+STATE_SCHEMA_VERSION = 2
+
+# Καταστάσεις μιας εγγραφής του outbox
+OUTBOX_PENDING = 'pending'      # Περιμένει να γίνει διαθέσιμος ο host
+OUTBOX_SENDING = 'sending'      # Την έχει αναλάβει ένας worker
+OUTBOX_DELIVERED = 'delivered'  # Εκτελέστηκε
+OUTBOX_FAILED = 'failed'        # Ο host απάντησε αλλά η εκτέλεση απέτυχε
+OUTBOX_EXPIRED = 'expired'      # Πέρασε η προθεσμία πριν επανέλθει ο host
+
+_state_initialized = set()
+_state_init_lock = threading.Lock()
+
+
+def state_db_path():
+    """Το αρχείο κατάστασης για την τρέχουσα βάση (ακολουθεί το DB_PATH)."""
+    return os.path.splitext(DB_PATH)[0] + '_state.db'
+
+
+def daemon_token_path():
+    """Το αρχείο με το token του daemon (βλ. daemon.py), δίπλα στη βάση."""
+    return os.path.splitext(DB_PATH)[0] + '_daemon.token'
+
+
+def get_state_connection():
+    """Σύνδεση στη βάση κατάστασης· οι πίνακες δημιουργούνται την πρώτη φορά."""
+    path = state_db_path()
+    conn = sqlite3.connect(path, timeout=10)
+    DB_CONNECTIONS.inc(db='state')
+    conn.row_factory = sqlite3.Row
+    # Με WAL αρκεί: μια διακοπή ρεύματος χάνει το πολύ τις τελευταίες εγγραφές, όχι τη βάση
+    conn.execute('PRAGMA synchronous = NORMAL')
+    if path not in _state_initialized:
+        with _state_init_lock:
+            if path not in _state_initialized:
+                _init_state_db(conn)
+                _state_initialized.add(path)
+    return conn
+
+
+def _init_state_db(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    # Οι σελίδες που ελευθερώνει το κλάδεμα του ιστορικού επιστρέφονται στο σύστημα
+    # (βλ. history_prune). Σε υπάρχον αρχείο ισχύει μόνο μετά από VACUUM.
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    if 0 < version < 2:
+        conn.execute('VACUUM')
+    # WAL: η εφαρμογή και το daemon γράφουν ταυτόχρονα χωρίς να μπλοκάρουν τις αναγνώσεις
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alias TEXT NOT NULL,
+            executable TEXT NOT NULL,
+            command_name TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            claimed_at REAL,
+            finished_at REAL,
+            error TEXT
+        )
+    ''')
+    # Οι workers ψάχνουν πάντα "τις pending ενός host με σειρά"
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, alias, id)')
+    # Ιστορικό: μία γραμμή ανά εκτέλεση σε έναν server. Το stdout/stderr είναι
+    # TEXT, ή BLOB συμπιεσμένο με zlib όταν είναι μεγάλο (βλ. history.py).
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS executions (
+            id INTEGER PRIMARY KEY,
+            started_at REAL NOT NULL,
+            finished_at REAL NOT NULL,
+            command_name TEXT,
+            executable TEXT NOT NULL,
+            alias TEXT NOT NULL,
+            status TEXT NOT NULL,
+            exit_status INTEGER,
+            pid INTEGER,
+            timings TEXT,
+            message TEXT,
+            stdout_bytes INTEGER NOT NULL DEFAULT 0,
+            stderr_bytes INTEGER NOT NULL DEFAULT 0,
+            stdout,
+            stderr
+        )
+    ''')
+    # Σελιδοποίηση (νεότερες πρώτα) και κλάδεμα κατά χρόνο, όλες ή ανά server
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_executions_time ON executions (started_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_executions_alias ON executions (alias, started_at)')
+    conn.execute(f'PRAGMA user_version = {STATE_SCHEMA_VERSION}')
+    conn.commit()
+
+
+@_timed
+def outbox_enqueue(executable, alias, ttl, command_name=None):
+    """
+    Βάζει μια εντολή στην ουρά ενός host που δεν είναι διαθέσιμος.
+    ttl: δευτερόλεπτα μετά τα οποία η εντολή δεν εκτελείται πια.
+    Returns: το id της εγγραφής.
+    """
+    now = time.time()
+    conn = get_state_connection()
+    try:
+        cursor = conn.execute(
+            '''INSERT INTO outbox (alias, executable, command_name, created_at, expires_at)
+               VALUES (?, ?, ?, ?, ?)''',
+            (alias, executable, command_name, now, now + ttl)
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def outbox_pending():
+    """Returns: {alias: πλήθος εντολών που περιμένουν (και δεν έχουν λήξει)}"""
+    conn = get_state_connection()
+    try:
+        rows = conn.execute(
+            '''SELECT alias, COUNT(*) FROM outbox
+               WHERE status = ? AND expires_at >= ? GROUP BY alias''',
+            (OUTBOX_PENDING, time.time())
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
+    finally:
+        conn.close()
+
+
+@_timed
+def outbox_claim_next(alias):
+    """
+    Αναλαμβάνει (ατομικά, ανάμεσα σε διεργασίες) την παλαιότερη pending εντολή ενός host.
+    Returns: την εγγραφή ως dict ή None αν δεν υπάρχει.
+    """
+    now = time.time()
+    conn = get_state_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(
+            '''SELECT * FROM outbox WHERE status = ? AND alias = ? AND expires_at >= ?
+               ORDER BY id LIMIT 1''',
+            (OUTBOX_PENDING, alias, now)
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                'UPDATE outbox SET status = ?, claimed_at = ? WHERE id = ?',
+                (OUTBOX_SENDING, now, row['id'])
+            )
+        conn.commit()
+        return dict(row) if row is not None else None
+    finally:
+        conn.close()
+
+
+@_timed
+def outbox_finish(entry_id, status, error=None):
+    """Καταγράφει την έκβαση μιας εγγραφής (delivered/failed, ή pending για επανάληψη)."""
+    conn = get_state_connection()
+    try:
+        conn.execute(
+            '''UPDATE outbox SET status = ?, error = ?, claimed_at = NULL,
+                   finished_at = CASE WHEN ? = 'pending' THEN NULL ELSE ? END
+               WHERE id = ?''',
+            (status, error, status, time.time(), entry_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@_timed
+def outbox_housekeeping(keep_seconds=86400, stale_seconds=600):
+    """
+    Συντήρηση της ουράς: λήξη όσων πέρασε η προθεσμία, εγγραφές που έμειναν
+    "sending" (διεργασία που τερματίστηκε στη μέση) και διαγραφή παλιών.
+    Μια εγγραφή που έμεινε "sending" δεν ξαναστέλνεται: μπορεί να εκτελέστηκε ήδη.
+    Returns: {'expired', 'interrupted', 'deleted'}
+    """
+    now = time.time()
+    conn = get_state_connection()
+    try:
+        expired = conn.execute(
+            'UPDATE outbox SET status = ?, finished_at = ? WHERE status = ? AND expires_at < ?',
+            (OUTBOX_EXPIRED, now, OUTBOX_PENDING, now)
+        ).rowcount
+        interrupted = conn.execute(
+            '''UPDATE outbox SET status = ?, finished_at = ?, error = 'Διακοπή κατά την παράδοση'
+               WHERE status = ? AND claimed_at < ?''',
+            (OUTBOX_FAILED, now, OUTBOX_SENDING, now - stale_seconds)
+        ).rowcount
+        deleted = conn.execute(
+            'DELETE FROM outbox WHERE finished_at IS NOT NULL AND finished_at < ?',
+            (now - keep_seconds,)
+        ).rowcount
+        conn.commit()
+        return {'expired': expired, 'interrupted': interrupted, 'deleted': deleted}
+    finally:
+        conn.close()
+
+
+def outbox_entries(limit=50):
+    """Οι πιο πρόσφατες εγγραφές του outbox (όλες οι καταστάσεις), νεότερες πρώτα."""
+    conn = get_state_connection()
+    try:
+        rows = conn.execute('SELECT * FROM outbox ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def outbox_cancel(alias=None):
+    """Αφαιρεί τις pending εντολές (ενός host ή όλες). Returns: πόσες αφαιρέθηκαν."""
+    conn = get_state_connection()
+    try:
+        if alias is None:
+            cursor = conn.execute('DELETE FROM outbox WHERE status = ?', (OUTBOX_PENDING,))
+        else:
+            cursor = conn.execute('DELETE FROM outbox WHERE status = ? AND alias = ?', (OUTBOX_PENDING, alias))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+# Στήλες του ιστορικού χωρίς την έξοδο (για τις λίστες· η έξοδος φορτώνεται με history_get)
+_HISTORY_LIST_COLUMNS = ('id, started_at, finished_at, command_name, executable, alias, status, '
+                         'exit_status, pid, timings, message, stdout_bytes, stderr_bytes')
+
+
+@_timed
+def history_insert(entry):
+    """Καταγράφει μια εκτέλεση (dict με τις στήλες του executions). Returns: το id."""
+    columns = ', '.join(entry)
+    placeholders = ', '.join('?' * len(entry))
+    conn = get_state_connection()
+    try:
+        cursor = conn.execute(f'INSERT INTO executions ({columns}) VALUES ({placeholders})',
+                              tuple(entry.values()))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+@_timed
+def history_page(limit=30, before=None, alias=None):
+    """
+    Μια σελίδα του ιστορικού, νεότερες εκτελέσεις πρώτα, χωρίς την έξοδο.
+    Keyset pagination: before = (started_at, id) της τελευταίας γραμμής της
+    προηγούμενης σελίδας, οπότε κάθε σελίδα είναι ένα range scan στο index,
+    όσο βαθιά κι αν είναι (αντί για OFFSET που διαβάζει όλες τις προηγούμενες).
+    Returns: λίστα από dicts.
+    """
+    conditions, params = [], []
+    if alias is not None:
+        conditions.append('alias = ?')
+        params.append(alias)
+    if before is not None:
+        conditions.append('(started_at, id) < (?, ?)')
+        params.extend(before)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    conn = get_state_connection()
+    try:
+        rows = conn.execute(
+            f'SELECT {_HISTORY_LIST_COLUMNS} FROM executions {where} '
+            'ORDER BY started_at DESC, id DESC LIMIT ?',
+            (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+@_timed
+def history_get(entry_id):
+    """Μια εκτέλεση με την έξοδό της (όπως αποθηκεύτηκε), ή None."""
+    conn = get_state_connection()
+    try:
+        row = conn.execute('SELECT * FROM executions WHERE id = ?', (entry_id,)).fetchone()
+        return dict(row) if row is not None else None
+    finally:
+        conn.close()
+
+
+@_timed
+def history_prune(max_age_seconds, max_rows):
+    """
+    Διαγράφει εκτελέσεις παλαιότερες από max_age_seconds και όσες περισσεύουν
+    πέρα από τις max_rows πιο πρόσφατες, και επιστρέφει τον χώρο στο σύστημα.
+    Returns: πόσες διαγράφηκαν.
+    """
+    conn = get_state_connection()
+    try:
+        deleted = conn.execute(
+            'DELETE FROM executions WHERE started_at < ?', (time.time() - max_age_seconds,)
+        ).rowcount
+        row = conn.execute(
+            'SELECT started_at FROM executions ORDER BY started_at DESC LIMIT 1 OFFSET ?', (max_rows,)
+        ).fetchone()
+        if row is not None:
+            deleted += conn.execute(
+                'DELETE FROM executions WHERE started_at <= ?', (row[0],)
+            ).rowcount
+        conn.commit()
+        if deleted:
+            conn.execute('PRAGMA incremental_vacuum')
+        return deleted
+    finally:
+        conn.close()
+
+
+def history_count():
+    """Returns: πόσες εκτελέσεις υπάρχουν στο ιστορικό."""
+    conn = get_state_connection()
+    try:
+        return conn.execute('SELECT COUNT(*) FROM executions').fetchone()[0]
+    finally:
+        conn.close()
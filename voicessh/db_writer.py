@@ -0,0 +1,192 @@
+# voicessh/db_writer.py
+"""
+Write-behind για τη βάση ρυθμίσεων: ένα thread κάνει όλες τις εγγραφές, ώστε
+το UI thread να μην περιμένει το commit του SQLite (σε flash storage υπό
+φορτίο, από δεκάδες μέχρι εκατοντάδες ms).
+
+    writer = DatabaseWriter().start(schedule=...)
+    writer.submit(database.delete_command, cmd_id, callback=on_deleted)
+
+- submit() επιστρέφει αμέσως ένα concurrent.futures.Future. Το callback(future)
+  καλείται μετά το commit μέσω του schedule (στην εφαρμογή: Clock, δηλαδή στο
+  UI thread)· χωρίς schedule καλείται στο thread του writer.
+- Όσες εγγραφές μαζευτούν όσο γίνεται ένα commit εκτελούνται μαζί στο επόμενο,
+  σε ένα transaction (database.write_batch): ένα fsync και ένα νέο snapshot για
+  όλο το burst. Η αποτυχία μιας εγγραφής αναιρεί μόνο αυτή.
+- Read-your-writes: μια ανάγνωση της βάσης (get_snapshot, get_connection) από
+  thread που έχει υποβάλει εγγραφές περιμένει πρώτα τις δικές του (ως την
+  τελευταία που υπέβαλε)· τα υπόλοιπα threads διαβάζουν χωρίς αναμονή. Για τις
+  εγγραφές ενός άλλου thread: barrier(future.seq).
+
+Χωρίς start() (CLI, scripts) το submit εκτελεί την εγγραφή αμέσως, στο thread του caller.
+"""
+import collections
+import threading
+from concurrent.futures import Future
+
+from voicessh import database
+from voicessh import metrics
+
+# Μέγιστες εγγραφές ανά transaction
+MAX_BATCH = 64
+
+BATCH_SIZE = metrics.histogram('voicessh_db_writer_batch_size', 'Εγγραφές ανά transaction του writer',
+                               buckets=(1, 2, 4, 8, 16, 32, 64))
+COMMIT_SECONDS = metrics.histogram('voicessh_db_writer_commit_seconds',
+                                   'Χρόνος ενός batch του writer (εγγραφές και commit)')
+
+
+class _Job:
+    __slots__ = ('seq', 'future', 'func', 'args', 'kwargs', 'callback')
+
+    def __init__(self, seq, func, args, kwargs, callback):
+        self.seq = seq
+        self.future = Future()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback
+
+
+class DatabaseWriter:
+    """Ένα thread για όλες τις εγγραφές στη βάση ρυθμίσεων (βλ. docstring του module)."""
+
+    def __init__(self, max_batch=MAX_BATCH):
+        self.max_batch = max_batch
+        self.schedule = None
+        self._jobs = collections.deque()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._completed = 0
+        self._stopping = False
+        self._thread = None
+        self._local = threading.local()  # _local.seq: η τελευταία εγγραφή που υπέβαλε το thread
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, schedule=None):
+        """schedule(fn): πώς καλούνται τα callbacks (π.χ. στο UI thread)· None = στο thread του writer."""
+        if self.running:
+            return self
+        self.schedule = schedule
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='voicessh-db-writer', daemon=True)
+        self._thread.start()
+        database.set_write_barrier(self.barrier)
+        return self
+
+    def stop(self):
+        """Γράφει όσες εγγραφές περιμένουν και σταματά το thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        database.set_write_barrier(None)
+
+    def submit(self, func, *args, callback=None, **kwargs):
+        """
+        Υποβάλλει μια εγγραφή: func(*args, **kwargs), μια συνάρτηση του database.py.
+        callback(future): μετά το commit (βλ. schedule).
+        Returns: Future με την τιμή που επιστρέφει η func ή την εξαίρεσή της, και
+        .seq: ο αριθμός της εγγραφής για το barrier (0 όταν εκτελέστηκε ήδη).
+        """
+        with self._cond:
+            if self.running and not self._stopping:
+                self._submitted += 1
+                job = _Job(self._submitted, func, args, kwargs, callback)
+                job.future.seq = job.seq
+                self._local.seq = job.seq
+                self._jobs.append(job)
+                self._cond.notify_all()
+                return job.future
+        # Χωρίς writer: εκτέλεση τώρα
+        job = _Job(0, func, args, kwargs, callback)
+        job.future.seq = 0
+        try:
+            job.future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            job.future.set_exception(e)
+        self._notify(job)
+        return job.future
+
+    def barrier(self, seq=None, timeout=None):
+        """
+        Περιμένει ώσπου να γραφτεί η εγγραφή seq (βλ. submit) και όσες υποβλήθηκαν πριν από αυτή.
+        seq: None = η τελευταία που υπέβαλε το τρέχον thread (read-your-writes)
+        Στο thread του writer επιστρέφει αμέσως. Returns: True αν ολοκληρώθηκαν.
+        """
+        if seq is None:
+            seq = getattr(self._local, 'seq', 0)
+        if self._completed >= seq or threading.current_thread() is self._thread:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: self._completed >= seq or not self.running, timeout)
+
+    def pending(self):
+        with self._cond:
+            return self._submitted - self._completed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jobs or self._stopping)
+                if not self._jobs:
+                    return
+                count = min(len(self._jobs), self.max_batch)
+                jobs = [self._jobs.popleft() for _ in range(count)]
+            self._execute(jobs)
+            with self._cond:
+                self._completed = jobs[-1].seq
+                self._cond.notify_all()
+            for job in jobs:
+                self._notify(job)
+
+    def _execute(self, jobs):
+        outcomes = []
+        BATCH_SIZE.observe(len(jobs))
+        try:
+            with COMMIT_SECONDS.time(), database.write_batch() as batch:
+                for job in jobs:
+                    try:
+                        with batch.job():
+                            outcomes.append((job, job.func(*job.args, **job.kwargs), None))
+                    except Exception as e:
+                        outcomes.append((job, None, e))
+        except Exception as e:
+            # Το commit απέτυχε: καμία εγγραφή του batch δεν έγινε
+            print(f'DB writer: αποτυχία commit: {e}')
+            outcomes = [(job, None, e) for job in jobs]
+        for job, result, error in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    def _notify(self, job):
+        if job.callback is None:
+            return
+        callback = job.callback
+        future = job.future
+        if self.schedule is not None and job.seq:
+            self.schedule(lambda: self._call(callback, future))
+        else:
+            self._call(callback, future)
+
+    @staticmethod
+    def _call(callback, future):
+        try:
+            callback(future)
+        except Exception as e:
+            print(f'DB writer: σφάλμα στο callback: {e}')
+
+
+# Ο writer της εφαρμογής (ξεκινά στο on_start)
+default_writer = DatabaseWriter()
+
+
+def submit(func, *args, callback=None, **kwargs):
+    return default_writer.submit(func, *args, callback=callback, **kwargs)
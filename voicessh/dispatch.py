@@ -0,0 +1,186 @@
+# voicessh/dispatch.py
+"""
+Εκτέλεση μιας εντολής σε έναν ή περισσότερους SSH servers (parallel fan-out).
+Κοινό για την εφαρμογή, το CLI και το daemon.
+"""
+import functools
+import queue
+import threading
+import time
+
+from voicessh import database
+from voicessh import history
+from voicessh import outbox
+from voicessh import result_cache
+from voicessh import retry as exec_retry
+from voicessh import results as exec_results
+from voicessh.results import ExecResult
+from voicessh.transport import run_remote
+
+# Μέγιστες ταυτόχρονες εκτελέσεις ενός fan-out (μαζί με τις ανανεώσεις της cache)·
+# αλλάζει με τη ρύθμιση 'max_parallel' (app_settings) ή με το max_parallel του iter_results
+DEFAULT_MAX_PARALLEL = 16
+MAX_PARALLEL_SETTING = 'max_parallel'
+
+
+def max_parallel_setting():
+    """Η ρύθμιση 'max_parallel' αν είναι θετικός ακέραιος, αλλιώς DEFAULT_MAX_PARALLEL."""
+    value = database.get_app_setting(MAX_PARALLEL_SETTING)
+    if value is None:
+        return DEFAULT_MAX_PARALLEL
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        print(f'Dispatch: άκυρη ρύθμιση {MAX_PARALLEL_SETTING}: {value!r}')
+        return DEFAULT_MAX_PARALLEL
+    return value
+
+
+def iter_results(executable, aliases, run=run_remote, cache_ttl=0, cache=None,
+                 outbox_ttl=0, command_name=None, retry=None, cancel=None, max_parallel=None):
+    """
+    Εκτελεί μια εντολή παράλληλα σε όλους τους servers και επιστρέφει τα
+    αποτελέσματα με τη σειρά που ολοκληρώνονται.
+    max_parallel: πόσα threads εκτελούν ταυτόχρονα (None = max_parallel_setting())·
+    οι υπόλοιποι servers περιμένουν στην ουρά, ώστε ένας μεγάλος στόλος να μην
+    ανοίγει εκατοντάδες threads και SSH συνδέσεις μαζί.
+    Τα στοιχεία σύνδεσης επιλύονται μία φορά από το ίδιο config snapshot·
+    τα threads δεν ανοίγουν δικές τους συνδέσεις στη βάση.
+    run: η συνάρτηση εκτέλεσης, run(executable, alias, conn_details) -> ExecResult
+    cache_ttl: αν > 0, οι servers με φρέσκο αποτέλεσμα στην cache απαντούν αμέσως
+    από αυτή και η εντολή ξανατρέχει εκεί στο παρασκήνιο (βλ. result_cache.py).
+    cache: ResultCache (default: η cache της διεργασίας)
+    outbox_ttl: αν > 0, οι servers που δεν ήταν διαθέσιμοι παίρνουν την εντολή στο
+    outbox (βλ. outbox.py) και το αποτέλεσμά τους είναι QUEUED.
+    retry: RetryPolicy (βλ. retry.py) για τα παροδικά σφάλματα· None = μία προσπάθεια.
+    Οι επαναλήψεις γίνονται πριν το outbox: στην ουρά μπαίνει μόνο ό,τι απέτυχε σε όλες.
+    cancel: CancelToken (βλ. cancel.py), που δίνεται και στο run ως cancel=. Στην ακύρωση οι
+    servers που δεν απάντησαν ακόμα επιστρέφονται αμέσως ως CANCELLED· τα threads τους
+    τελειώνουν μόλις κλείσουν οι συνδέσεις τους. Οι ανανεώσεις της cache στο παρασκήνιο
+    δεν ακυρώνονται (το αποτέλεσμά τους έχει ήδη δοθεί από την cache).
+    Κάθε εκτέλεση (και οι ανανεώσεις της cache, όχι οι απαντήσεις από αυτή) γράφεται
+    στο ιστορικό (βλ. history.py).
+    Yields: (alias, ExecResult)
+    """
+    aliases = list(dict.fromkeys(aliases))
+    snapshot = database.get_snapshot()
+    targets = snapshot.resolve(aliases)
+    if cache is None:
+        cache = result_cache.default_cache
+    done = queue.Queue()
+    run_uncancelled = run
+    sleep = time.sleep
+    if cancel is not None:
+        run = functools.partial(run, cancel=cancel)
+        sleep = cancel.wait
+
+    def execute(alias, conn_details, run=run, sleep=sleep):
+        try:
+            if retry is None:
+                result = run(executable, alias, conn_details)
+            else:
+                result = exec_retry.run_with_retry(run, executable, alias, conn_details, retry, sleep=sleep)
+        except Exception as e:
+            result = ExecResult(alias).fail(exec_results.UNEXPECTED, f'{type(e).__name__}: {e}')
+        if cache_ttl:
+            cache.put(executable, alias, result, conn_details)
+        return result
+
+    def execute_on_server(alias):
+        """Εκτέλεση σε έναν συγκεκριμένο server."""
+        started_at = time.time()
+        conn_details = targets[alias]
+        if conn_details is None:
+            result = ExecResult(alias).fail(exec_results.NOT_CONFIGURED)
+        else:
+            result = execute(alias, conn_details)
+            if outbox_ttl and result.unreachable:
+                outbox.enqueue(result, executable, outbox_ttl, command_name)
+        history.record(result, executable, started_at, command_name)
+        done.put((alias, result))
+
+    def refresh(alias):
+        """Ανανέωση της cache στο παρασκήνιο (το αποτέλεσμα έχει ήδη δοθεί)."""
+        started_at = time.time()
+        try:
+            # Χωρίς το cancel του αιτήματος: η διακοπή του δεν αφορά μια εκτέλεση που
+            # ο caller δεν περιμένει (και ένα CANCELLED δεν μπαίνει ποτέ στην cache)
+            result = execute(alias, targets[alias], run_uncancelled, time.sleep)
+            history.record(result, executable, started_at, command_name)
+        finally:
+            cache.end_refresh(executable, alias)
+
+    def worker():
+        while True:
+            try:
+                job, alias = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                job(alias)
+            except Exception as e:
+                print(f'Dispatch error [{alias}]: {type(e).__name__}: {e}')
+
+    # Πρώτα οι εκτελέσεις που περιμένει ο caller, μετά οι ανανεώσεις της cache
+    jobs = queue.Queue()
+    refreshes = []
+    for alias in aliases:
+        cached = None
+        if cache_ttl and targets[alias] is not None:
+            cached = cache.get(executable, alias, cache_ttl, targets[alias])
+        if cached is None:
+            jobs.put((execute_on_server, alias))
+            continue
+        done.put((alias, cached))
+        if cache.begin_refresh(executable, alias):
+            refreshes.append((refresh, alias))
+    for job in refreshes:
+        jobs.put(job)
+    for _ in range(min(max_parallel or max_parallel_setting(), jobs.qsize())):
+        threading.Thread(target=worker, name='voicessh-run', daemon=True).start()
+
+    pending = set(aliases)
+    remove = cancel.on_cancel(lambda: done.put(None)) if cancel is not None else None
+    try:
+        while pending:
+            item = done.get()
+            if item is None:
+                break
+            pending.discard(item[0])
+            yield item
+    finally:
+        if remove is not None:
+            remove()
+    for alias in aliases:
+        if alias in pending:
+            yield alias, ExecResult(alias).fail(exec_results.CANCELLED, cancel.reason)
+
+
+def run_on_servers(executable, aliases, use_daemon=True, cache_ttl=0, fresh=False,
+                   outbox_ttl=0, command_name=None, retry=None, cancel=None, max_parallel=None):
+    """
+    Εκτελεί μια εντολή σε όλους τους servers και περιμένει όλα τα αποτελέσματα.
+    Αν τρέχει το τοπικό daemon (βλ. daemon.py), η εκτέλεση γίνεται εκεί, με τις
+    ήδη ανοιχτές συνδέσεις του και τη δική του cache· αλλιώς τοπικά.
+    cache_ttl, outbox_ttl, retry, cancel: βλ. iter_results· fresh=True ακυρώνει πρώτα τις εγγραφές της cache.
+    max_parallel: βλ. iter_results (μόνο για την τοπική εκτέλεση· το daemon έχει το δικό του).
+    Returns: {alias: ExecResult} με τη σειρά των aliases.
+    """
+    # Αν είναι string αντί για λίστα (backward compatibility)
+    if isinstance(aliases, str):
+        aliases = [aliases]
+
+    results = None
+    if use_daemon:
+        from voicessh.client import run_via_daemon
+        results = run_via_daemon(executable, aliases, cache_ttl=cache_ttl, fresh=fresh,
+                                 outbox_ttl=outbox_ttl, command_name=command_name, retry=retry,
+                                 cancel=cancel)
+    if results is None:
+        if fresh:
+            for alias in aliases:
+                result_cache.default_cache.invalidate(executable, alias)
+        results = dict(iter_results(executable, aliases, cache_ttl=cache_ttl,
+                                    outbox_ttl=outbox_ttl, command_name=command_name, retry=retry,
+                                    cancel=cancel, max_parallel=max_parallel))
+
+    return {alias: results.get(alias) or ExecResult(alias).fail(exec_results.UNEXPECTED, 'Κανένα αποτέλεσμα')
+            for alias in aliases}
@@ -0,0 +1,140 @@
+# voicessh/history.py
+"""
+Ιστορικό εκτελέσεων: τι έτρεξε, πού, πότε, με τι αποτέλεσμα και έξοδο.
+
+Κάθε εκτέλεση σε έναν server (από την εφαρμογή, το CLI, το daemon ή το outbox)
+γράφεται στον πίνακα executions της βάσης κατάστασης (βλ.
+database.get_state_connection). Οι απαντήσεις από την cache δεν γράφονται:
+δεν εκτελέστηκε τίποτα.
+
+Για να μένει μικρή η βάση στο κινητό, η έξοδος πάνω από COMPRESS_THRESHOLD
+bytes αποθηκεύεται συμπιεσμένη (zlib) και το κλάδεμα (παλιές εγγραφές, όριο
+γραμμών) γίνεται σε thread στο παρασκήνιο, στην εκκίνηση και κάθε PRUNE_EVERY
+καταγραφές.
+"""
+import json
+import threading
+import time
+import zlib
+
+from voicessh import database
+
+# Κάτω από αυτό το μέγεθος η συμπίεση δεν αξίζει (header zlib, CPU)
+COMPRESS_THRESHOLD = 256
+
+# Διατήρηση: όσες είναι νεότερες από KEEP_DAYS, το πολύ MAX_ROWS
+KEEP_DAYS = 30
+MAX_ROWS = 2000
+
+# Κάθε πόσες καταγραφές ξεκινά κλάδεμα στο παρασκήνιο
+PRUNE_EVERY = 100
+
+PAGE_SIZE = 30
+
+_prune_lock = threading.Lock()
+_recorded = 0
+
+
+def pack(text):
+    """Κείμενο για αποθήκευση: ως έχει αν είναι μικρό, αλλιώς bytes συμπιεσμένα με zlib."""
+    data = text.encode('utf-8')
+    if len(data) < COMPRESS_THRESHOLD:
+        return text
+    compressed = zlib.compress(data, 6)
+    # Ήδη συμπιεσμένη ή τυχαία έξοδος μπορεί να μη μικραίνει
+    return compressed if len(compressed) < len(data) else text
+
+
+def unpack(value):
+    """Το αντίστροφο του pack (BLOB = συμπιεσμένο, TEXT = ως έχει)."""
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8', errors='replace')
+    return value
+
+
+def record(result, executable, started_at, command_name=None):
+    """
+    Καταγράφει μια εκτέλεση. Δεν σηκώνει ποτέ exception: το ιστορικό δεν πρέπει
+    να χαλάει την εκτέλεση.
+    started_at: time.time() πριν ξεκινήσει η εκτέλεση.
+    Returns: το id της εγγραφής ή None.
+    """
+    global _recorded
+    if result.cached is not None:
+        return None
+    entry = {
+        'started_at': started_at,
+        'finished_at': time.time(),
+        'command_name': command_name,
+        'executable': executable,
+        'alias': result.alias,
+        'status': result.error or 'ok',
+        'exit_status': result.exit_status,
+        'pid': result.pid,
+        'timings': json.dumps(result.timings) if result.timings else None,
+        'message': result.message or None,
+        'stdout_bytes': result.stdout_bytes,
+        'stderr_bytes': result.stderr_bytes,
+        'stdout': pack(result.stdout),
+        'stderr': pack(result.stderr),
+    }
+    try:
+        entry_id = database.history_insert(entry)
+    except Exception as e:
+        print(f'History error: {type(e).__name__}: {e}')
+        return None
+    _recorded += 1
+    if _recorded % PRUNE_EVERY == 0:
+        prune_async()
+    return entry_id
+
+
+def _decode(entry):
+    entry['timings'] = json.loads(entry['timings']) if entry['timings'] else {}
+    if 'stdout' in entry:
+        entry['stdout'] = unpack(entry['stdout'])
+        entry['stderr'] = unpack(entry['stderr'])
+    return entry
+
+
+def page(before=None, alias=None, limit=PAGE_SIZE):
+    """
+    Μια σελίδα του ιστορικού (νεότερες πρώτα, χωρίς έξοδο).
+    before: ο cursor που επέστρεψε η προηγούμενη σελίδα (None = από την αρχή).
+    Returns: (εγγραφές, cursor της επόμενης σελίδας ή None αν δεν υπάρχει άλλη)
+    """
+    entries = [_decode(entry) for entry in database.history_page(limit, before, alias)]
+    cursor = None
+    if len(entries) == limit:
+        cursor = (entries[-1]['started_at'], entries[-1]['id'])
+    return entries, cursor
+
+
+def get(entry_id):
+    """Μια εκτέλεση με την έξοδό της (αποσυμπιεσμένη), ή None."""
+    entry = database.history_get(entry_id)
+    return _decode(entry) if entry is not None else None
+
+
+def prune(keep_days=KEEP_DAYS, max_rows=MAX_ROWS):
+    """Κλάδεμα του ιστορικού τώρα. Returns: πόσες εγγραφές διαγράφηκαν."""
+    with _prune_lock:
+        return database.history_prune(keep_days * 86400, max_rows)
+
+
+def prune_async():
+    """Κλάδεμα σε thread στο παρασκήνιο (αν δεν τρέχει ήδη κάποιο)."""
+    if _prune_lock.locked():
+        return
+
+    def run():
+        try:
+            deleted = prune()
+            if deleted:
+                print(f'History: pruned {deleted} entries')
+        except Exception as e:
+            print(f'History prune error: {type(e).__name__}: {e}')
+
+    threading.Thread(target=run, name='voicessh-history-prune', daemon=True).start()
@@ -0,0 +1,307 @@
+# voicessh/memdiag.py
+"""
+Διαγνωστικά μνήμης για μακριές συνεδρίες (η εφαρμογή μένει ανοιχτή ώρες).
+
+Όσο τρέχει το MemoryMonitor, κάθε INTERVAL δευτερόλεπτα:
+- παίρνει snapshot του tracemalloc και το συγκρίνει με το προηγούμενο: όσα
+  σημεία του κώδικα μεγαλώνουν σε GROWTH_STREAK συνεχόμενα snapshots και
+  έχουν μεγαλώσει πάνω από MIN_GROWTH_BYTES από την αρχή σημειώνονται ως ύποπτα,
+- μετράει τα ζωντανά αντικείμενα που ξέρουμε ότι μπορεί να συσσωρεύονται:
+  JNI proxies (PythonJavaClass: listeners, runnables του recognizer/TTS),
+  SSH transports και συνδέσεις SQLite,
+- καταγράφει RSS και ό,τι έχει δηλωθεί με register_gauge (π.χ. γραμμές της κονσόλας).
+
+Το tracemalloc επιβαρύνει κάθε allocation, γι' αυτό ξεκινά μόνο με το
+start(). Οι μετρήσεις αντικειμένων και RSS (live_objects, rss_bytes) είναι
+διαθέσιμες πάντα. Η αναφορά εξάγεται σε JSON στον ίδιο φάκελο με τα
+profiles (βλ. profiler.py).
+"""
+import collections
+import gc
+import json
+import os
+import resource
+import sqlite3
+import threading
+import time
+import tracemalloc
+import weakref
+from datetime import datetime
+
+from voicessh import profiler
+
+# Κάθε πόσα δευτερόλεπτα παίρνεται snapshot
+INTERVAL = 60
+
+# Βάθος του traceback ανά allocation (περισσότερο = ακριβέστερο αλλά ακριβότερο)
+FRAMES = 8
+
+# Ύποπτο σημείο: μεγαλώνει σε τόσα συνεχόμενα snapshots...
+GROWTH_STREAK = 3
+# ...και έχει μεγαλώσει τουλάχιστον τόσο από το πρώτο snapshot
+MIN_GROWTH_BYTES = 16 * 1024
+
+# Πόσα σημεία με τη μεγαλύτερη αύξηση κρατιούνται στην αναφορά
+TOP_SITES = 15
+
+# Πόσα δείγματα (χρόνος, RSS, traced, αντικείμενα) κρατιούνται
+HISTORY = 240
+
+# Allocations των ίδιων των διαγνωστικών δεν μετράνε
+_IGNORED_FILES = (tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>',
+                  '<frozen importlib._bootstrap_external>', '<unknown>')
+
+# Το isinstance σε weakref proxy με νεκρό αντικείμενο σηκώνει ReferenceError
+_PROXY_TYPES = (weakref.ProxyType, weakref.CallableProxyType)
+
+_gauges = {}
+
+
+def register_gauge(name, fn):
+    """Δηλώνει μια μέτρηση για την αναφορά (fn() -> αριθμός), π.χ. γραμμές της κονσόλας."""
+    _gauges[name] = fn
+
+
+def rss_bytes():
+    """Τρέχον RSS της διεργασίας (Linux/Android: /proc), αλλιώς το μέγιστο από το getrusage."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _is_open(conn):
+    try:
+        conn.total_changes
+    except sqlite3.ProgrammingError:
+        return False
+    return True
+
+
+def live_objects():
+    """
+    Μετράει τα ζωντανά αντικείμενα που μπορεί να συσσωρεύονται (ένα πέρασμα του gc).
+    Returns: {'jni_proxies': {όνομα κλάσης: πλήθος}, 'jni_proxy_classes': {όνομα: πλήθος κλάσεων},
+              'ssh_transports', 'ssh_transports_active', 'sqlite_connections', 'sqlite_connections_open'}
+    Οι κλάσεις των proxies ορίζονται μέσα σε μεθόδους του main.py, οπότε κάθε κλήση
+    φτιάχνει και νέα κλάση· το jni_proxy_classes δείχνει πόσες ζουν ακόμα.
+    """
+    try:
+        from jnius import PythonJavaClass
+    except ImportError:
+        PythonJavaClass = None
+    try:
+        from paramiko import Transport
+    except ImportError:
+        Transport = None
+
+    proxies = collections.Counter()
+    proxy_classes = collections.Counter()
+    counts = {'ssh_transports': 0, 'ssh_transports_active': 0,
+              'sqlite_connections': 0, 'sqlite_connections_open': 0}
+    for obj in gc.get_objects():
+        if type(obj) in _PROXY_TYPES:
+            continue
+        if PythonJavaClass is not None:
+            if isinstance(obj, PythonJavaClass):
+                proxies[type(obj).__name__] += 1
+                continue
+            if isinstance(obj, type) and issubclass(obj, PythonJavaClass) and obj is not PythonJavaClass:
+                proxy_classes[obj.__name__] += 1
+                continue
+        if Transport is not None and isinstance(obj, Transport):
+            counts['ssh_transports'] += 1
+            counts['ssh_transports_active'] += obj.is_active()
+        elif isinstance(obj, sqlite3.Connection):
+            counts['sqlite_connections'] += 1
+            counts['sqlite_connections_open'] += _is_open(obj)
+    return dict(counts, jni_proxies=dict(proxies), jni_proxy_classes=dict(proxy_classes))
+
+
+def _site(stat):
+    frame = stat.traceback[0]
+    return f'{frame.filename}:{frame.lineno}'
+
+
+class MemoryMonitor:
+    """Περιοδικά snapshots του tracemalloc και μετρήσεις αντικειμένων (βλ. docstring του module)."""
+
+    def __init__(self, interval=INTERVAL, frames=FRAMES):
+        self.interval = interval
+        self.frames = frames
+        self.started_at = None
+        self.samples = collections.deque(maxlen=HISTORY)
+        self.growing = []     # Τα ύποπτα σημεία του τελευταίου snapshot
+        self.top = []         # Τα σημεία με τη μεγαλύτερη αύξηση από το πρώτο snapshot
+        self._baseline = None
+        self._previous = None
+        self._streaks = {}    # σημείο -> συνεχόμενα snapshots με αύξηση
+        self._started_tracing = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return self
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(self.frames)
+            self.started_at = time.time()
+            self.samples.clear()
+            self.growing, self.top = [], []
+            self._baseline = self._previous = None
+            self._streaks = {}
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='voicessh-memdiag', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Σταματά την παρακολούθηση (η τελευταία αναφορά μένει διαθέσιμη)."""
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._baseline = self._previous = None
+
+    def _run(self):
+        self.snapshot()
+        while not self._stop.wait(self.interval):
+            self.snapshot()
+
+    def _take(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES])
+
+    def snapshot(self):
+        """Παίρνει ένα snapshot τώρα (και από το UI, εκτός του περιοδικού). Returns: την αναφορά."""
+        sample = self._sample()
+        with self._lock:
+            if tracemalloc.is_tracing():
+                snapshot = self._take()
+                sample['traced'], sample['traced_peak'] = tracemalloc.get_traced_memory()
+                if self._baseline is None:
+                    self._baseline = snapshot
+                else:
+                    self._compare(snapshot)
+                self._previous = snapshot
+            self.samples.append(sample)
+        return self.report()
+
+    def _compare(self, snapshot):
+        # Αύξηση από το προηγούμενο snapshot: μετράει τις συνεχόμενες αυξήσεις
+        for stat in snapshot.compare_to(self._previous, 'lineno'):
+            site = _site(stat)
+            if stat.size_diff > 0:
+                self._streaks[site] = self._streaks.get(site, 0) + 1
+            else:
+                self._streaks.pop(site, None)
+
+        since_start = snapshot.compare_to(self._baseline, 'lineno')
+        self.top = [{'site': _site(stat), 'size': stat.size, 'growth': stat.size_diff,
+                     'count': stat.count, 'count_growth': stat.count_diff}
+                    for stat in since_start[:TOP_SITES] if stat.size_diff > 0]
+        self.growing = [
+            dict(site=_site(stat), size=stat.size, growth=stat.size_diff, count=stat.count,
+                 streak=self._streaks[_site(stat)])
+            for stat in since_start
+            if stat.size_diff >= MIN_GROWTH_BYTES and self._streaks.get(_site(stat), 0) >= GROWTH_STREAK
+        ]
+
+    def _sample(self):
+        return {'time': time.time(), 'rss': rss_bytes(), 'threads': threading.active_count(),
+                'objects': live_objects(), 'gauges': self._gauges()}
+
+    def _gauges(self):
+        values = {}
+        for name, fn in list(_gauges.items()):
+            try:
+                values[name] = fn()
+            except Exception as e:
+                values[name] = f'{type(e).__name__}: {e}'
+        return values
+
+    def report(self):
+        """Η τρέχουσα εικόνα (για το UI και το export)."""
+        with self._lock:
+            samples = list(self.samples)
+            growing, top = list(self.growing), list(self.top)
+        latest = samples[-1] if samples else self._sample()
+        return {
+            'running': self.running,
+            'tracing': tracemalloc.is_tracing(),
+            'started_at': self.started_at,
+            'interval': self.interval,
+            'latest': latest,
+            'first': samples[0] if samples else None,
+            'growing': growing,
+            'top': top,
+            'samples': samples,
+        }
+
+    def save(self, path=None):
+        """Γράφει την αναφορά σε JSON. Returns: το path του."""
+        if path is None:
+            directory = profiler.profiles_dir()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'memory-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+def _mb(value):
+    return f'{value / (1024 * 1024):.1f} MB'
+
+
+def format_report(report):
+    """Σύντομη περιγραφή της αναφοράς για το UI."""
+    latest, first = report['latest'], report['first']
+    lines = [f'RSS: {_mb(latest["rss"])}' + (f' (αρχή: {_mb(first["rss"])})' if first else '')]
+    if 'traced' in latest:
+        lines.append(f'Python heap (tracemalloc): {_mb(latest["traced"])}, μέγιστο {_mb(latest["traced_peak"])}')
+    if report['running']:
+        lines.append(f'Snapshots: {len(report["samples"])}, κάθε {report["interval"]} s')
+
+    objects = latest['objects']
+    lines.append('')
+    lines.append(f'Threads: {latest["threads"]}')
+    lines.append(f'SSH transports: {objects["ssh_transports_active"]} ενεργά / {objects["ssh_transports"]}')
+    lines.append(f'SQLite συνδέσεις: {objects["sqlite_connections_open"]} ανοιχτές / {objects["sqlite_connections"]}')
+    if objects['jni_proxies'] or objects['jni_proxy_classes']:
+        lines.append('JNI proxies (αντικείμενα / κλάσεις):')
+        for name in sorted(set(objects['jni_proxies']) | set(objects['jni_proxy_classes'])):
+            lines.append(f'  {name}: {objects["jni_proxies"].get(name, 0)} / '
+                         f'{objects["jni_proxy_classes"].get(name, 0)}')
+    for name, value in latest['gauges'].items():
+        lines.append(f'{name}: {value}')
+
+    if report['growing']:
+        lines.append('')
+        lines.append('Σημεία που μεγαλώνουν συνεχώς:')
+        for site in report['growing']:
+            lines.append(f'  +{site["growth"] / 1024:.0f} KB ({site["streak"]} snapshots) {site["site"]}')
+    elif report['top']:
+        lines.append('')
+        lines.append('Μεγαλύτερη αύξηση από την αρχή:')
+        for site in report['top'][:5]:
+            lines.append(f'  +{site["growth"] / 1024:.0f} KB {site["site"]}')
+    return '\n'.join(lines)
+
+
+# Ο monitor της διεργασίας
+default_monitor = MemoryMonitor()
@@ -0,0 +1,346 @@
+# voicessh/metrics.py
+"""
+Μετρήσεις της διεργασίας (counters, gauges, histograms) σε μορφή Prometheus.
+
+Τα instrumented modules δηλώνουν τις μετρήσεις τους μία φορά, στο επίπεδο του module:
+
+    RUNS = metrics.counter('voicessh_remote_runs_total', 'Εκτελέσεις', ('alias', 'status'))
+    RUNS.inc(alias='Primary', status='ok')
+
+Κάθε ενημέρωση είναι μια αναζήτηση σε dict κάτω από ένα lock (λίγα μs), ώστε
+να μπαίνει άφοβα σε κάθε εκτέλεση, ερώτημα στη βάση ή αναγνώριση.
+Τα histograms έχουν σταθερά buckets (δεν κρατάνε τις τιμές).
+
+Το render() δίνει το text exposition format του Prometheus· ο MetricsFlusher
+το γράφει περιοδικά στο αρχείο metrics_path() (δίπλα στη βάση), από όπου
+το διαβάζει το `voicessh metrics` όταν δεν τρέχει το daemon (GET /metrics).
+"""
+import bisect
+import math
+import os
+import threading
+import time
+
+# Buckets (s) για χρόνους: από ερωτήματα στη βάση (ms) μέχρι SSH handshakes (s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Κάθε πόσα δευτερόλεπτα γράφεται το αρχείο
+FLUSH_INTERVAL = 30
+
+
+def metrics_path():
+    """Το αρχείο των μετρήσεων για την τρέχουσα βάση (ακολουθεί το DB_PATH, όπως το _state.db)."""
+    from voicessh import database
+    return os.path.splitext(database.DB_PATH)[0] + '_metrics.prom'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name}: αναμένονται τα labels {self.labelnames}, δόθηκαν {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Returns: [(όνομα, labels string, τιμή), ...] για το render."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Τιμή που μόνο αυξάνεται (εκτελέσεις, σφάλματα, hits)."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Τρέχουσα τιμή (ουρές, ανοιχτές συνδέσεις). Με set_function η τιμή
+    υπολογίζεται τη στιγμή του render: η συνάρτηση επιστρέφει αριθμό ή,
+    με ένα label, dict {τιμή label: αριθμός}.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        self._function = function
+
+    def samples(self):
+        if self._function is None:
+            return super().samples()
+        try:
+            value = self._function()
+        except Exception as e:
+            print(f'Metrics: {self.name}: {e}')
+            return []
+        if isinstance(value, dict):
+            return [(self.name, _format_labels(self.labelnames, (key,)), count)
+                    for key, count in sorted(value.items())]
+        return [(self.name, '', value)]
+
+
+class Histogram(_Metric):
+    """Κατανομή τιμών σε σταθερά buckets (όπως το Prometheus: σωρευτικά, με _sum και _count)."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [πλήθος ανά bucket (+ ένα για το +Inf), άθροισμα]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, **labels):
+        """Context manager: with histogram.time(op='x'): ... (χρόνος σε s)."""
+        return _Timer(self, labels)
+
+    def snapshot(self, **labels):
+        """Returns: {'count', 'sum', 'buckets': [(όριο, σωρευτικό πλήθος), ...]} ή None."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return None
+            counts, total = list(state[0]), state[1]
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            cumulative.append((bound, running))
+        return {'count': running, 'sum': total, 'buckets': cumulative}
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state[0]), state[1]) for key, state in self._values.items())
+        lines = []
+        for key, counts, total in items:
+            running = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                running += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append((self.name + '_bucket', _format_labels(self.labelnames, key, le), running))
+            labels = _format_labels(self.labelnames, key)
+            lines.append((self.name + '_sum', labels, total))
+            lines.append((self.name + '_count', labels, running))
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry:
+    """Οι μετρήσεις της διεργασίας, με τη σειρά που δηλώθηκαν."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f'Η μέτρηση {name} έχει ήδη δηλωθεί διαφορετικά')
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Όλες οι μετρήσεις στο text exposition format του Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f'# HELP {metric.name} {_escape(metric.documentation)}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write(self, path=None):
+        """Γράφει το render() ατομικά (προσωρινό αρχείο + rename). Returns: το path."""
+        path = path or metrics_path()
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp, path)
+        return path
+
+    def clear(self):
+        """Μηδενίζει τις τιμές (οι δηλώσεις μένουν)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+def parse(text):
+    """
+    Διαβάζει text exposition format (π.χ. το αρχείο ή το GET /metrics).
+    Returns: {όνομα: [{'labels': {...}, 'value': float}, ...]}
+    """
+    parsed = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        head, _, value = line.rpartition(' ')
+        name, _, label_text = head.partition('{')
+        labels = {}
+        label_text = label_text.rstrip('}')
+        while label_text:
+            key, _, rest = label_text.partition('="')
+            chars, i = [], 0
+            while i < len(rest) and rest[i] != '"':
+                if rest[i] == '\\' and i + 1 < len(rest):
+                    i += 1
+                    chars.append('\n' if rest[i] == 'n' else rest[i])
+                else:
+                    chars.append(rest[i])
+                i += 1
+            labels[key] = ''.join(chars)
+            label_text = rest[i + 1:].lstrip(',')
+        parsed.setdefault(name, []).append({'labels': labels, 'value': float(value)})
+    return parsed
+
+
+class MetricsFlusher:
+    """Thread που γράφει τις μετρήσεις στο αρχείο κάθε interval δευτερόλεπτα (και στο stop)."""
+
+    def __init__(self, registry=None, interval=FLUSH_INTERVAL, path=None):
+        self.registry = registry or default_registry
+        self.interval = interval
+        self.path = path
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='voicessh-metrics', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        try:
+            return self.registry.write(self.path)
+        except OSError as e:
+            print(f'Metrics: αποτυχία εγγραφής: {e}')
+            return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+# Οι μετρήσεις της διεργασίας (εφαρμογή, daemon ή CLI)
+default_registry = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return default_registry.counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    return default_registry.gauge(name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return default_registry.histogram(name, documentation, labelnames, buckets)
+
+
+def render():
+    return default_registry.render()
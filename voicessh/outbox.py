@@ -0,0 +1,185 @@
+# voicessh/outbox.py
+"""
+Outbox: εντολές για hosts που δεν ήταν διαθέσιμοι παραδίδονται όταν επανέλθουν.
+
+Αν μια εντολή έχει outbox_ttl και ο host δεν απάντησε πριν σταλεί η εντολή
+(timeout, refused, δίκτυο), αντί να χαθεί γράφεται στον πίνακα outbox της
+βάσης κατάστασης (βλ. database.get_state_connection) με προθεσμία.
+
+Το OutboxWorker (ένα thread στην εφαρμογή ή στο daemon) ελέγχει τους hosts
+με ουρά με exponential backoff, και όταν ένας host απαντήσει εκτελεί τις
+εντολές του με τη σειρά που μπήκαν, όλες από την ίδια (pooled) σύνδεση.
+Κάθε εγγραφή αναλαμβάνεται ατομικά, οπότε πολλοί workers (εφαρμογή και
+daemon) δεν την εκτελούν δύο φορές.
+"""
+import random
+import socket
+import threading
+import time
+
+from voicessh import database
+from voicessh import history
+from voicessh import results as exec_results
+from voicessh.pool import ConnectionPool
+from voicessh.transport import close_idle_upstream, run_remote
+
+# Timeout του ελέγχου διαθεσιμότητας (απλό TCP connect, όχι SSH handshake)
+PROBE_TIMEOUT = 3
+
+# Αναμονή πριν τον επόμενο έλεγχο ενός host που δεν απαντά: διπλασιάζεται ως το μέγιστο
+BACKOFF_MIN = 5
+BACKOFF_MAX = 300
+
+# Κάθε πόσα δευτερόλεπτα ο worker ψάχνει για νέες εγγραφές (π.χ. από άλλη διεργασία)
+POLL_INTERVAL = 10
+
+# Κάθε πόσα δευτερόλεπτα γίνεται συντήρηση (λήξεις, παλιές εγγραφές, αδρανείς συνδέσεις)
+HOUSEKEEPING_INTERVAL = 60
+
+
+def enqueue(result, executable, ttl, command_name=None):
+    """
+    Βάζει στην ουρά μια εκτέλεση που απέτυχε επειδή ο host δεν ήταν διαθέσιμος
+    και σημειώνει το ExecResult ως QUEUED.
+    Returns: το id της εγγραφής.
+    """
+    entry_id = database.outbox_enqueue(executable, result.alias, ttl, command_name)
+    result.fail(exec_results.QUEUED, result.message or result.error)
+    return entry_id
+
+
+def probe(conn_details, timeout=PROBE_TIMEOUT):
+    """Ελέγχει αν ο host δέχεται συνδέσεις στη θύρα SSH."""
+    if conn_details.get('via'):
+        # Η διαδρομή μέσω jump host ελέγχεται με την ίδια την παράδοση
+        return True
+    try:
+        socket.create_connection((conn_details['host'], int(conn_details['port'])), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+class OutboxWorker:
+    """
+    Thread που παραδίδει τις εντολές του outbox.
+    on_change(entry, result): καλείται (από το thread του worker) μετά από κάθε
+    παράδοση, π.χ. για ενημέρωση του UI.
+    """
+
+    def __init__(self, pool=None, run=run_remote, probe=probe, on_change=None):
+        self.pool = pool or ConnectionPool()
+        self.run = run
+        self.probe = probe
+        self.on_change = on_change
+        self.delivered = 0
+        self.failed = 0
+        self._next_attempt = {}  # alias -> time.monotonic() του επόμενου ελέγχου
+        self._backoff = {}       # alias -> τρέχουσα αναμονή (s)
+        self._force = False      # Επόμενο πέρασμα χωρίς αναμονή (βλ. wake)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='voicessh-outbox', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.pool.close_all()
+
+    def wake(self):
+        """Έλεγχος όλων των hosts τώρα, χωρίς να περιμένει το backoff (π.χ. κουμπί "δοκιμή")."""
+        self._force = True
+        self._wake.set()
+
+    def _back_off(self, alias):
+        backoff = min(BACKOFF_MAX, self._backoff.get(alias, BACKOFF_MIN / 2) * 2)
+        self._backoff[alias] = backoff
+        # Jitter, ώστε πολλοί hosts που έπεσαν μαζί να μην ελέγχονται μαζί
+        self._next_attempt[alias] = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+
+    def run_once(self):
+        """Ένα πέρασμα σε όλους τους hosts με εντολές σε αναμονή. Returns: πόσες παραδόθηκαν."""
+        delivered = 0
+        now = time.monotonic()
+        force, self._force = self._force, False
+        pending = database.outbox_pending()
+        for alias in list(self._next_attempt):
+            if alias not in pending:  # Παραδόθηκαν, έληξαν ή ακυρώθηκαν
+                self._next_attempt.pop(alias)
+                self._backoff.pop(alias, None)
+        for alias in pending:
+            if force:
+                self._next_attempt[alias] = now
+            # Ένας host που μόλις απέτυχε δεν ελέγχεται αμέσως
+            next_attempt = self._next_attempt.setdefault(alias, now + BACKOFF_MIN)
+            if now >= next_attempt:
+                delivered += self._drain(alias)
+        return delivered
+
+    def _drain(self, alias):
+        """Εκτελεί με τη σειρά όλες τις εντολές ενός host. Returns: πόσες παραδόθηκαν."""
+        conn_details = database.get_snapshot().connection(alias)
+        if conn_details is None or not self.probe(conn_details):
+            self._back_off(alias)
+            return 0
+
+        delivered = 0
+        while not self._stop.is_set():
+            entry = database.outbox_claim_next(alias)
+            if entry is None:
+                break
+            started_at = time.time()
+            result = self.run(entry['executable'], alias, conn_details, pool=self.pool)
+            history.record(result, entry['executable'], started_at, entry['command_name'])
+            if result.unreachable:
+                # Δεν στάλθηκε: πίσω στην ουρά, με την ίδια σειρά
+                database.outbox_finish(entry['id'], database.OUTBOX_PENDING, result.message or result.error)
+                self._back_off(alias)
+                return delivered
+            if result.ok:
+                database.outbox_finish(entry['id'], database.OUTBOX_DELIVERED)
+                self.delivered += 1
+                delivered += 1
+            else:
+                database.outbox_finish(entry['id'], database.OUTBOX_FAILED,
+                                       exec_results.format_label(result))
+                self.failed += 1
+            if self.on_change is not None:
+                self.on_change(entry, result)
+
+        self._backoff.pop(alias, None)
+        self._next_attempt.pop(alias, None)
+        return delivered
+
+    def _loop(self):
+        last_housekeeping = 0
+        while not self._stop.is_set():
+            try:
+                now = time.monotonic()
+                if now - last_housekeeping >= HOUSEKEEPING_INTERVAL:
+                    last_housekeeping = now
+                    database.outbox_housekeeping()
+                    self.pool.close_idle()
+                    # Και οι bastions των εκτελέσεων χωρίς δικό τους pool (βλ. transport._get_upstream_pool)
+                    close_idle_upstream()
+                self.run_once()
+            except Exception as e:
+                print(f'Outbox error: {type(e).__name__}: {e}')
+
+            # Ύπνος ως τον επόμενο προγραμματισμένο έλεγχο (ή ως το POLL_INTERVAL)
+            timeout = POLL_INTERVAL
+            if self._next_attempt:
+                timeout = min(timeout, max(0.5, min(self._next_attempt.values()) - time.monotonic()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def stats(self):
+        return {'pending': database.outbox_pending(), 'delivered': self.delivered, 'failed': self.failed,
+                'backoff': dict(self._backoff)}
@@ -0,0 +1,122 @@
+# voicessh/pool.py
+"""
+Pool από ανοιχτές SSH συνδέσεις, μία ανά host/χρήστη.
+
+Ένα paramiko Transport πολυπλέκει πολλά channels, οπότε η ίδια σύνδεση
+εξυπηρετεί ταυτόχρονες εκτελέσεις. Το ίδιο ισχύει για τους jump hosts (via):
+όλες οι συνδέσεις που περνούν από έναν bastion μοιράζονται ένα transport του.
+Συνδέσεις που έμειναν αχρησιμοποίητες περισσότερο από idle_timeout κλείνουν
+από το close_idle(), εκτός από bastions που εξυπηρετούν ακόμα ενεργές συνδέσεις.
+"""
+import threading
+import time
+
+from voicessh.transport import open_client
+
+# Δευτερόλεπτα αδράνειας πριν κλείσει μια pooled σύνδεση
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+class _Entry:
+    def __init__(self):
+        self.client = None
+        self.lock = threading.Lock()  # Μία σύνδεση τη φορά ανά host (όχι thundering herd)
+        self.last_used = time.monotonic()
+        self.upstream = None  # Κλειδί του bastion μέσω του οποίου ανοίχτηκε
+
+
+class ConnectionPool:
+    """Thread-safe pool από paramiko.SSHClient, με κλειδί (host, port, username, password, via)."""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._keys_by_alias = {}  # Για να βρεθεί το entry του bastion από το 'via'
+        self.connects = 0  # Πόσες νέες συνδέσεις ανοίχτηκαν
+        self.reuses = 0    # Πόσες φορές δόθηκε υπάρχουσα σύνδεση
+
+    @staticmethod
+    def _key(conn_details):
+        return (conn_details['host'], int(conn_details['port']),
+                conn_details['username'], conn_details['password'], conn_details.get('via'))
+
+    def acquire(self, conn_details, timings=None, chain=(), cancel=None):
+        """
+        Επιστρέφει ενεργή σύνδεση για τον host, ανοίγοντας νέα αν χρειάζεται.
+        Η σύνδεση δεν επιστρέφεται στο pool: μένει κοινή μέχρι discard/close_idle.
+        timings: όπως στο transport.open_client (μένει κενό αν η σύνδεση υπήρχε ήδη).
+        chain: τα aliases της αλυσίδας via μέχρι εδώ (για εσωτερική χρήση από το open_client).
+        cancel: CancelToken για το άνοιγμα νέας σύνδεσης (βλ. transport.open_client).
+        Raises: ό,τι και το transport.open_client (auth, timeout, network, ConfigError).
+        """
+        key = self._key(conn_details)
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            if conn_details.get('alias'):
+                self._keys_by_alias[conn_details['alias']] = key
+
+        with entry.lock:
+            transport = entry.client.get_transport() if entry.client else None
+            if transport is not None and transport.is_active():
+                # Οι μετρητές είναι κοινοί για όλα τα entries: με το lock του pool
+                with self._lock:
+                    self.reuses += 1
+            else:
+                if entry.client is not None:
+                    entry.client.close()
+                    entry.client = None
+                entry.client = open_client(conn_details, timings, pool=self, chain=chain, cancel=cancel)
+                with self._lock:
+                    self.connects += 1
+                    entry.upstream = self._keys_by_alias.get(conn_details.get('via'))
+                    # Ένα discard/close_idle στο μεταξύ μπορεί να αφαίρεσε το entry
+                    self._entries.setdefault(key, entry)
+            entry.last_used = time.monotonic()
+            return entry.client
+
+    def discard(self, conn_details):
+        """Κλείνει και αφαιρεί τη σύνδεση ενός host (π.χ. μετά από σφάλμα)."""
+        with self._lock:
+            entry = self._entries.pop(self._key(conn_details), None)
+        if entry is not None:
+            self._close_entry(entry)
+
+    @staticmethod
+    def _close_entry(entry):
+        with entry.lock:
+            if entry.client is not None:
+                entry.client.close()
+                entry.client = None
+
+    def close_idle(self):
+        """Κλείνει τις συνδέσεις που δεν χρησιμοποιήθηκαν για idle_timeout. Returns: πόσες έκλεισαν."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            # Ένας bastion μένει ανοιχτός όσο χρησιμοποιούνται οι συνδέσεις που περνούν από αυτόν
+            keep = {key for key, entry in self._entries.items() if entry.last_used >= cutoff}
+            pending = list(keep)
+            while pending:
+                upstream = self._entries[pending.pop()].upstream
+                if upstream in self._entries and upstream not in keep:
+                    keep.add(upstream)
+                    pending.append(upstream)
+            idle = [key for key in self._entries if key not in keep]
+            entries = [self._entries.pop(key) for key in idle]
+        for entry in entries:
+            self._close_entry(entry)
+        return len(entries)
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._close_entry(entry)
+
+    def stats(self):
+        with self._lock:
+            hosts = [f'{key[2]}@{key[0]}:{key[1]}' + (f' via {key[4]}' if key[4] else '')
+                     for key, entry in self._entries.items() if entry.client is not None]
+        return {'open': len(hosts), 'hosts': sorted(hosts),
+                'connects': self.connects, 'reuses': self.reuses}
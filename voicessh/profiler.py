@@ -0,0 +1,145 @@
+# voicessh/profiler.py
+"""
+Sampling profiler για όλα τα threads, κατά παραγγελία (διαγνωστικά).
+
+Όσο τρέχει, ένα thread παίρνει κάθε INTERVAL δευτερόλεπτα τη στοίβα όλων των
+threads της διεργασίας (sys._current_frames): του UI, των workers του
+dispatch, του outbox κ.λπ. Τίποτα δεν αλλάζει στον κώδικα που μετριέται,
+και όσο δεν τρέχει το κόστος είναι μηδενικό.
+
+Το αποτέλεσμα γράφεται σε μορφή "collapsed stacks" (μία γραμμή ανά
+διαφορετική στοίβα: `thread;module:συνάρτηση;...;module:συνάρτηση πλήθος`),
+που διαβάζουν απευθείας τα flamegraph.pl, speedscope και inferno.
+Τα αρχεία μπαίνουν στον φάκελο profiles/ δίπλα στη βάση (στο κινητό: app storage).
+"""
+import collections
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from voicessh import database
+
+# Περίοδος δειγματοληψίας (s)· 5 ms = 200 δείγματα/s ανά thread
+INTERVAL = 0.005
+
+# Όριο διάρκειας, αν κανείς δεν το σταματήσει (για να μη μεγαλώνει επ' άπειρον)
+MAX_SECONDS = 600
+
+FILE_EXTENSION = '.folded'
+
+# "Thread-12 (execute)" -> "Thread (execute)": ίδια threads σε μία ρίζα του flamegraph
+_THREAD_NUMBER = re.compile(r'-\d+')
+
+
+def profiles_dir():
+    """Ο φάκελος των αρχείων profiling (δίπλα στη βάση)."""
+    return os.path.join(os.path.dirname(os.path.abspath(database.DB_PATH)), 'profiles')
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f'{module}:{code.co_name}'
+
+
+class SamplingProfiler:
+    """Δειγματοληψία των στοιβών όλων των threads σε ένα thread στο παρασκήνιο."""
+
+    def __init__(self, interval=INTERVAL, max_seconds=MAX_SECONDS):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return self
+            self.stacks.clear()
+            self.samples = 0
+            self.elapsed = 0.0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='voicessh-profiler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Σταματά τη δειγματοληψία. Returns: πόσα δείγματα (στοίβες) καταγράφηκαν."""
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+        return self.samples
+
+    def _run(self):
+        own = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + self.max_seconds
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {thread.ident: _THREAD_NUMBER.sub('', thread.name) for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, 'thread'))
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+            self._stop.wait(self.interval)
+        self.elapsed = time.perf_counter() - start
+
+    def collapsed(self):
+        """Οι στοίβες σε μορφή collapsed stacks (οι συχνότερες πρώτα)."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def top(self, n=10):
+        """Οι συναρτήσεις με τον περισσότερο δικό τους χρόνο. Returns: [(συνάρτηση, δείγματα), ...]"""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def save(self, path=None):
+        """Γράφει το collapsed-stack αρχείο. Returns: το path του."""
+        if path is None:
+            directory = profiles_dir()
+            os.makedirs(directory, exist_ok=True)
+            stamp = datetime.fromtimestamp(self.started_at or time.time()).strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(directory, f'profile-{stamp}{FILE_EXTENSION}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return path
+
+
+# Ο profiler της διεργασίας (η εφαρμογή και το CLI ελέγχουν αυτόν)
+default_profiler = SamplingProfiler()
+
+
+def start():
+    return default_profiler.start()
+
+
+def stop_and_save(path=None):
+    """Σταματά τον profiler της διεργασίας. Returns: (path του αρχείου, δείγματα)."""
+    samples = default_profiler.stop()
+    return default_profiler.save(path), samples
+
+
+def is_running():
+    return default_profiler.running
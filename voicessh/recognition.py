@@ -0,0 +1,88 @@
+# voicessh/recognition.py
+"""
+Από τις υποθέσεις του recognizer στην εντολή ή σκηνή που θα εκτελεστεί.
+
+Το Android (RecognitionListener.onResults) δίνει μια N-best λίστα κειμένων,
+τα πιθανότερα πρώτα, και προαιρετικά ένα confidence (0..1) για το καθένα.
+Η αναζήτηση εδώ είναι ίδια για την εφαρμογή (MainScreen.handle_command) και
+για το benchmarks/replay.py, που την τρέχει πάνω σε καταγεγραμμένες λίστες
+χωρίς Kivy/Android.
+
+Με MAX_ALTERNATIVES = 1 κοιτάζεται μόνο η πρώτη υπόθεση· αλλαγές εδώ
+μετριούνται με το replay.py πριν περάσουν στην εφαρμογή.
+"""
+import json
+import time
+
+from voicessh import database
+from voicessh import metrics
+
+# Πόσες υποθέσεις της N-best λίστας δοκιμάζονται, με τη σειρά τους
+MAX_ALTERNATIVES = 1
+
+# Πρόθεμα των γραμμών καταγραφής (logcat), που διαβάζει και το replay.py
+LOG_PREFIX = 'Recognition: '
+
+RESOLVES = metrics.counter('voicessh_recognition_resolves_total',
+                           'Αναζητήσεις N-best λίστας: scene, command ή miss, με τη θέση της υπόθεσης που ταίριαξε',
+                           ('result', 'rank'))
+RESOLVE_SECONDS = metrics.histogram('voicessh_recognition_resolve_seconds', 'Χρόνος του resolve')
+
+# Callbacks του RecognitionListener (main.py)
+RECOGNIZER_RESULTS = metrics.counter('voicessh_recognizer_results_total',
+                                     'onResults του recognizer: με κείμενο (text) ή χωρίς (empty)', ('result',))
+RECOGNIZER_ERRORS = metrics.counter('voicessh_recognizer_errors_total',
+                                    'onError του recognizer ανά κωδικό του SpeechRecognizer', ('code',))
+RECOGNIZER_LATENCY = metrics.histogram('voicessh_recognizer_latency_seconds',
+                                       'Από το onEndOfSpeech μέχρι το onResults')
+
+
+def normalize(text):
+    """Συνήθης προσαρμογή για ελληνική ορθογραφία (όπως στο handle_command)."""
+    return text.strip().lower()
+
+
+def resolve(texts, confidences=None, max_alternatives=None):
+    """
+    Βρίσκει τη σκηνή ή την εντολή για μια N-best λίστα.
+    Για κάθε υπόθεση (με τη σειρά): πρώτα σκηνή, μετά εντολή (database.match_command).
+    confidences: λίστα ίδιου μήκους ή None (δεν τα δίνουν όλοι οι recognizers).
+    Returns: {'kind': 'scene'|'command', 'name', 'text', 'rank', 'confidence',
+              'scene' ή 'command'} ή None.
+    """
+    if max_alternatives is None:
+        max_alternatives = MAX_ALTERNATIVES
+    start = time.perf_counter()
+    match = _resolve(texts, confidences, max_alternatives)
+    RESOLVE_SECONDS.observe(time.perf_counter() - start)
+    if match is None:
+        RESOLVES.inc(result='miss', rank='')
+    else:
+        RESOLVES.inc(result=match['kind'], rank=match['rank'])
+    return match
+
+
+def _resolve(texts, confidences, max_alternatives):
+    for rank, text in enumerate(texts[:max_alternatives]):
+        text = normalize(text)
+        if not text:
+            continue
+        confidence = confidences[rank] if confidences and rank < len(confidences) else None
+        match = {'text': text, 'rank': rank, 'confidence': confidence}
+
+        scene = database.match_scene(text)
+        if scene is not None:
+            return dict(match, kind='scene', name=scene['name'], scene=scene)
+
+        cmd = database.match_command(text)
+        if cmd is not None:
+            return dict(match, kind='command', name=cmd['name'], command=cmd)
+    return None
+
+
+def log_line(texts, confidences=None):
+    """Μια γραμμή καταγραφής της N-best λίστας, σε μορφή που διαβάζει το replay.py."""
+    entry = {'texts': list(texts)}
+    if confidences:
+        entry['confidences'] = [round(value, 4) for value in confidences]
+    return LOG_PREFIX + json.dumps(entry, ensure_ascii=False)
@@ -0,0 +1,145 @@
+# voicessh/result_cache.py
+"""
+Cache αποτελεσμάτων για εντολές που μόνο διαβάζουν (π.χ. ipconfig), με κλειδί
+(εκτελέσιμη εντολή, alias).
+
+Μέσα στο cache_ttl της εντολής η απάντηση δίνεται αμέσως από την cache
+(ExecResult.cached = ηλικία σε s) και η εντολή ξανατρέχει στο παρασκήνιο για
+να ανανεωθεί η εγγραφή (stale-while-revalidate). Κρατιούνται μόνο επιτυχημένα
+αποτελέσματα.
+
+Η μνήμη είναι φραγμένη σε πλήθος εγγραφών και σε bytes (LRU). Κάθε εγγραφή
+κρατάει τα στοιχεία σύνδεσης του server με τα οποία αποθηκεύτηκε, οπότε μια
+αλλαγή τους (host, χρήστης, jump host...) την ακυρώνει· οι υπόλοιπες αλλαγές
+ρυθμίσεων (π.χ. μια νέα φράση) δεν την αγγίζουν. Για ρητή ακύρωση υπάρχει το
+invalidate().
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from voicessh import metrics
+from voicessh.results import ExecResult
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 512 * 1024
+
+# Εκτίμηση για το ίδιο το ExecResult (slots, timings, strings) πέρα από την έξοδο
+_ENTRY_OVERHEAD = 512
+
+CACHE_LOOKUPS = metrics.counter('voicessh_cache_lookups_total', 'Αναζητήσεις στην cache αποτελεσμάτων',
+                                ('alias', 'result'))
+
+
+class _Entry:
+    __slots__ = ('result', 'stored_at', 'config', 'size')
+
+    def __init__(self, result, config, size):
+        self.result = result
+        self.stored_at = time.monotonic()
+        self.config = config
+        self.size = size
+
+
+class ResultCache:
+    """Thread-safe LRU cache από ExecResult."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (executable, alias) -> _Entry, τα πιο πρόσφατα στο τέλος
+        self._refreshing = set()       # Κλειδιά που ανανεώνονται ήδη στο παρασκήνιο
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(result):
+        return (_ENTRY_OVERHEAD + len(result.stdout.encode('utf-8'))
+                + len(result.stderr.encode('utf-8')))
+
+    def get(self, executable, alias, ttl, config=None):
+        """
+        config: τα τρέχοντα στοιχεία σύνδεσης του alias (βλ. put)
+        Returns: αντίγραφο του αποθηκευμένου ExecResult με .cached = ηλικία (s),
+        ή None αν δεν υπάρχει, έληξε (πάνω από ttl s) ή αποθηκεύτηκε με άλλα στοιχεία σύνδεσης.
+        """
+        key = (executable, alias)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry.stored_at if entry else None
+            if entry is None or age > ttl or entry.config != config:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(alias=alias, result='miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry.result
+        CACHE_LOOKUPS.inc(alias=alias, result='hit')
+        copy = ExecResult.from_dict(result.to_dict())
+        copy.timings = dict(result.timings)
+        copy.cached = age
+        return copy
+
+    def put(self, executable, alias, result, config=None):
+        """
+        Αποθηκεύει ένα επιτυχημένο αποτέλεσμα.
+        config: τα στοιχεία σύνδεσης του alias με τα οποία εκτελέστηκε (συγκρίνονται στο get)
+        Returns: True αν αποθηκεύτηκε.
+        """
+        if not result.ok or result.cached is not None:
+            return False
+        size = self._size(result)
+        if size > self.max_bytes:
+            return False
+        key = (executable, alias)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[key] = _Entry(result, config, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+        return True
+
+    def begin_refresh(self, executable, alias):
+        """Returns: True αν ο caller πρέπει να κάνει την ανανέωση (δεν τρέχει ήδη άλλη)."""
+        key = (executable, alias)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, executable, alias):
+        with self._lock:
+            self._refreshing.discard((executable, alias))
+
+    def invalidate(self, executable=None, alias=None):
+        """
+        Ακυρώνει εγγραφές: μιας εντολής, ενός server, ή ενός ζεύγους (None = όλες).
+        Returns: πόσες αφαιρέθηκαν.
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (executable is None or key[0] == executable) and (alias is None or key[1] == alias)]
+            for key in keys:
+                self.bytes -= self._entries.pop(key).size
+        return len(keys)
+
+    def clear(self):
+        return self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+# Η cache της διεργασίας (εφαρμογή ή CLI)· το daemon έχει τη δική του
+default_cache = ResultCache()
@@ -0,0 +1,168 @@
+# voicessh/results.py
+"""
+Δομημένο αποτέλεσμα μιας εκτέλεσης σε έναν server.
+
+Η επιτυχία κρίνεται από το exit status και την κατηγορία σφάλματος, όχι από
+αναζήτηση λέξεων στο κείμενο. Το κείμενο για το label και το TTS φτιάχνεται
+μόνο στις άκρες (format_label / format_speech).
+"""
+import re
+
+# Κατηγορίες σφαλμάτων (ExecResult.error). None = επιτυχία.
+NOT_CONFIGURED = 'not_configured'  # Δεν υπάρχει σύνδεση με αυτό το alias
+CONFIG = 'config'                  # Λάθος ρύθμιση σύνδεσης (π.χ. κυκλικό via)
+AUTH = 'auth'                      # Λάθος username/password
+TIMEOUT = 'timeout'                # Ο host δεν απάντησε εγκαίρως
+REFUSED = 'refused'                # Ο host αρνήθηκε τη σύνδεση
+NETWORK = 'network'                # Λοιπά σφάλματα δικτύου (DNS, unreachable, reset)
+SSH = 'ssh'                        # Σφάλμα πρωτοκόλλου SSH
+REMOTE = 'remote'                  # Η εντολή εκτελέστηκε αλλά απέτυχε στον host
+QUEUED = 'queued'                  # Ο host δεν ήταν διαθέσιμος· η εντολή μπήκε στο outbox
+CANCELLED = 'cancelled'            # Η εκτέλεση διακόπηκε (βλ. cancel.py)
+UNEXPECTED = 'unexpected'          # Οτιδήποτε άλλο (bug)
+
+# Φάσεις που χρονομετρούνται (ms). Το 'exec' καταγράφεται μόλις ζητηθεί η εκτέλεση,
+# και όταν αποτύχει (βλ. ExecResult.sent)
+PHASES = ('resolve', 'connect', 'auth', 'exec', 'read')
+
+# Πόσα bytes από stdout/stderr κρατιούνται για εμφάνιση· τα υπόλοιπα μόνο μετριούνται
+PREVIEW_BYTES = 2048
+
+# Το psexec -d επιστρέφει ως exit code το PID της νέας διεργασίας (όχι 0)
+# και γράφει στο stderr "... started on HOST with process ID 1234."
+_PSEXEC_STARTED_RE = re.compile(r'process ID (\d+)')
+
+_ERROR_LABELS = {
+    NOT_CONFIGURED: '❌ Σφάλμα: Δεν βρέθηκαν ρυθμίσεις για το alias "{alias}"',
+    CONFIG: '❌ Σφάλμα ρυθμίσεων: {message}',
+    AUTH: '❌ SSH Error: Λάθος username ή password για {host}',
+    TIMEOUT: '❌ Timeout: Δεν απαντά το {host} (SSH server offline;)',
+    REFUSED: '❌ Connection Refused: Το {host} αρνήθηκε τη σύνδεση',
+    NETWORK: '❌ Network Error: {message}',
+    SSH: '❌ SSH Error: {message}',
+    REMOTE: '⚠️ Σφάλμα psexec (exit {exit_status}):\n{stderr}',
+    QUEUED: '📬 Το {host} δεν είναι διαθέσιμο ({message})· η εντολή θα εκτελεστεί όταν επανέλθει',
+    CANCELLED: '⏹ Διακόπηκε: {message}',
+    UNEXPECTED: '❌ Unexpected Error: {message}',
+}
+
+
+class ExecResult:
+    """Αποτέλεσμα εκτέλεσης μιας εντολής σε έναν server."""
+
+    __slots__ = ('alias', 'host', 'command', 'exit_status', 'pid',
+                 'stdout_bytes', 'stderr_bytes', 'stdout', 'stderr',
+                 'timings', 'error', 'message', 'cached', 'retries')
+
+    def __init__(self, alias, host=None, command=None):
+        self.alias = alias
+        self.host = host          # "host:port"
+        self.command = command    # Η εντολή που στάλθηκε, χωρίς credentials
+        self.exit_status = None   # recv_exit_status(), None αν δεν έφτασε ως την εκτέλεση
+        self.pid = None           # PID της διεργασίας που ξεκίνησε το psexec -d
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.stdout = ''          # Preview (το πολύ PREVIEW_BYTES)
+        self.stderr = ''
+        self.timings = {}         # {φάση: ms}
+        self.error = None         # Κατηγορία σφάλματος ή None
+        self.message = ''         # Λεπτομέρεια σφάλματος
+        self.cached = None        # Ηλικία (s) αν η απάντηση ήρθε από την cache (βλ. result_cache.py)
+        self.retries = []         # Αποτυχημένες προσπάθειες πριν από αυτή (βλ. retry.py)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def total_ms(self):
+        return sum(self.timings.values())
+
+    def fail(self, error, message=''):
+        self.error = error
+        self.message = message
+        return self
+
+    @property
+    def sent(self):
+        """
+        True αν η εντολή μπορεί να έφτασε στον host: το αίτημα exec ξεκίνησε, ακόμα
+        κι αν απέτυχε (π.χ. timeout ενώ ο host την είχε ήδη εκτελέσει).
+        """
+        return 'exec' in self.timings
+
+    @property
+    def unreachable(self):
+        """
+        True αν ο host δεν απάντησε πριν σταλεί η εντολή (άρα σίγουρα δεν εκτελέστηκε
+        και μπορεί να ξανασταλεί, βλ. outbox.py).
+        """
+        return self.error in (TIMEOUT, REFUSED, NETWORK) and not self.sent
+
+    def set_output(self, stdout, stderr, stdout_bytes, stderr_bytes, exit_status):
+        """
+        Καταχωρεί την έξοδο της εντολής και κρίνει την επιτυχία.
+        stdout/stderr: τα πρώτα PREVIEW_BYTES bytes.
+        """
+        self.stdout = stdout.decode('utf-8', errors='replace').strip()
+        self.stderr = stderr.decode('utf-8', errors='replace').strip()
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        self.exit_status = exit_status
+
+        m = _PSEXEC_STARTED_RE.search(self.stderr)
+        if m:
+            self.pid = int(m.group(1))
+        elif exit_status != 0:
+            self.error = REMOTE
+        return self
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data['ok'] = self.ok
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(data['alias'])
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(result, slot, data[slot])
+        return result
+
+    def __repr__(self):
+        return f'<ExecResult {self.alias} error={self.error} exit={self.exit_status} {self.total_ms:.0f}ms>'
+
+
+def format_label(result):
+    """Κείμενο για την οθόνη (ένας server)."""
+    if result.ok:
+        text = '✓ Πρόγραμμα εκτελέστηκε με psexec'
+        if result.pid is not None:
+            text += f' (PID {result.pid})'
+        if result.stdout:
+            text += f'\n{result.stdout}'
+        if result.cached is not None:
+            text += f'\n🗄 Από cache (πριν {result.cached:.0f} s, ανανεώνεται)'
+        else:
+            text += f'\n⏱ {result.total_ms:.0f} ms'
+    else:
+        text = _ERROR_LABELS[result.error].format(
+            alias=result.alias, host=result.host, message=result.message,
+            exit_status=result.exit_status, stderr=result.stderr,
+        )
+    if result.retries:
+        text += f'\n🔁 {len(result.retries) + 1} προσπάθειες ({", ".join(retry["error"] for retry in result.retries)})'
+    return text
+
+
+def format_speech(results, cmd_name=''):
+    """Σύντομο μήνυμα για το TTS για όλους τους servers μιας εκτέλεσης."""
+    results = list(results)
+    if all(result.ok for result in results):
+        return f'η εντολή {cmd_name} εκτελέστηκε επιτυχώς'
+    if all(result.ok or result.error == QUEUED for result in results):
+        return f'η εντολή {cmd_name} θα εκτελεστεί όταν ο υπολογιστής είναι διαθέσιμος'
+    if any(result.error == CANCELLED for result in results):
+        return f'η εντολή {cmd_name} διακόπηκε'
+    return 'υπάρχει πρόβλημα'
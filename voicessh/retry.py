@@ -0,0 +1,204 @@
+# voicessh/retry.py
+"""
+Επανάληψη εκτελέσεων που απέτυχαν για παροδικούς λόγους (π.χ. το Wi-Fi χάθηκε
+για λίγο, SSHException στην ανταλλαγή του banner), ώστε ο χρήστης να μη χρειάζεται
+να ξαναπεί την εντολή.
+
+Πολιτική ανά εντολή (commands.retry_policy, JSON· NULL = η default πολιτική,
+που αλλάζει με τη ρύθμιση app_settings 'retry_policy'):
+    {"max_attempts": 3, "base_delay": 0.25, "max_delay": 2.0, "deadline": 8.0,
+     "retry_on": ["timeout", "refused", "network", "ssh"]}
+- max_attempts: συνολικές προσπάθειες (1 = χωρίς επανάληψη)
+- Αναμονή πριν την προσπάθεια n+1: τυχαία στο [0, min(max_delay, base_delay * 2^(n-1))]
+  (exponential backoff με full jitter: οι επαναλήψεις πολλών servers δεν συγχρονίζονται)
+- deadline: καμία νέα προσπάθεια αν θα ξεκινούσε μετά από τόσα δευτερόλεπτα
+- retry_on: κατηγορίες σφάλματος (βλ. results.py) που επαναλαμβάνονται
+
+Κλάσεις idempotency (commands.idempotent):
+- Idempotent (π.χ. ipconfig, ρύθμιση έντασης): επανάληψη σε κάθε σφάλμα του retry_on.
+- Μη idempotent (default· π.χ. εκκίνηση προγράμματος): επανάληψη μόνο αν η
+  εντολή δεν στάλθηκε (το σφάλμα έγινε πριν ζητηθεί το exec, βλ. ExecResult.sent,
+  όπως στο outbox), ώστε ένα πρόγραμμα να μην ανοίξει ποτέ δύο φορές. Ένα σφάλμα
+  κατά ή μετά το αίτημα exec δεν επαναλαμβάνεται: ο host μπορεί να την εκτέλεσε.
+
+Με pool (daemon), κάθε προσπάθεια παίρνει την pooled σύνδεση αν υπάρχει· μετά
+από σφάλμα SSH/δικτύου το run_remote την έχει ήδη απορρίψει, οπότε ανοίγει νέα.
+Το αποτέλεσμα κρατάει τις αποτυχημένες προσπάθειες στο ExecResult.retries και
+τον χρόνο τους (μαζί με τις αναμονές) στο timings['retry'].
+"""
+import json
+import random
+import sys
+import time
+
+from voicessh import database
+from voicessh import metrics
+from voicessh import results as exec_results
+
+# Ρύθμιση (app_settings) με τη default πολιτική
+POLICY_SETTING = 'retry_policy'
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.25
+DEFAULT_MAX_DELAY = 2.0
+# Μια φωνητική εντολή που ξαναλέγεται κοστίζει 5+ δευτερόλεπτα· πέρα από αυτό δεν αξίζει
+DEFAULT_DEADLINE = 8.0
+DEFAULT_RETRY_ON = (exec_results.TIMEOUT, exec_results.REFUSED, exec_results.NETWORK, exec_results.SSH)
+
+# Κατηγορίες που δεν έχει νόημα να επαναληφθούν (ίδιο αποτέλεσμα κάθε φορά· ένα λάθος
+# password, αν ξαναδοκιμαστεί, φέρνει και πιο γρήγορα το κλείδωμα του λογαριασμού)
+_NEVER_RETRY = (exec_results.NOT_CONFIGURED, exec_results.CONFIG, exec_results.AUTH, exec_results.QUEUED,
+                exec_results.CANCELLED)
+
+_ERRORS = frozenset((exec_results.NOT_CONFIGURED, exec_results.CONFIG, exec_results.AUTH, exec_results.TIMEOUT,
+                     exec_results.REFUSED, exec_results.NETWORK, exec_results.SSH, exec_results.REMOTE,
+                     exec_results.QUEUED, exec_results.CANCELLED, exec_results.UNEXPECTED))
+
+RETRIES = metrics.counter('voicessh_retries_total', 'Επαναλήψεις εκτελέσεων ανά server και σφάλμα που τις προκάλεσε',
+                          ('alias', 'error'))
+RETRY_OUTCOMES = metrics.counter('voicessh_retry_outcomes_total',
+                                 'Εκτελέσεις με επαναλήψεις: recovered (πέτυχε τελικά) ή exhausted',
+                                 ('alias', 'outcome'))
+
+
+class RetryPolicy:
+    """Πολιτική επανάληψης μιας εντολής (βλ. docstring του module)."""
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, deadline=DEFAULT_DEADLINE, retry_on=DEFAULT_RETRY_ON,
+                 idempotent=False):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = frozenset(retry_on)
+        self.idempotent = idempotent
+
+    @classmethod
+    def from_dict(cls, data, idempotent=None):
+        """
+        Από το JSON μιας εντολής, της ρύθμισης ή ενός αιτήματος του daemon.
+        Raises: ValueError με μήνυμα για τον χρήστη.
+        """
+        if not isinstance(data, dict):
+            raise ValueError('Η πολιτική επανάληψης πρέπει να είναι αντικείμενο JSON')
+        unknown = set(data) - {'max_attempts', 'base_delay', 'max_delay', 'deadline', 'retry_on', 'idempotent'}
+        if unknown:
+            raise ValueError(f'Άγνωστα πεδία πολιτικής επανάληψης: {", ".join(sorted(unknown))}')
+        policy = cls(idempotent=bool(data.get('idempotent', False)) if idempotent is None else idempotent)
+        attempts = data.get('max_attempts', policy.max_attempts)
+        if not isinstance(attempts, int) or isinstance(attempts, bool) or not 1 <= attempts <= 10:
+            raise ValueError('Το max_attempts πρέπει να είναι ακέραιος από 1 έως 10')
+        policy.max_attempts = attempts
+        for key in ('base_delay', 'max_delay', 'deadline'):
+            value = data.get(key, getattr(policy, key))
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+                raise ValueError(f'Το {key} πρέπει να είναι μη αρνητικός αριθμός (δευτερόλεπτα)')
+            setattr(policy, key, float(value))
+        retry_on = data.get('retry_on', sorted(policy.retry_on))
+        if isinstance(retry_on, str):
+            retry_on = [retry_on]
+        if not isinstance(retry_on, list) or not all(isinstance(error, str) for error in retry_on):
+            raise ValueError('Το retry_on πρέπει να είναι λίστα από κατηγορίες σφάλματος')
+        invalid = [error for error in retry_on if error not in _ERRORS or error in _NEVER_RETRY]
+        if invalid:
+            raise ValueError(f'Δεν επαναλαμβάνονται τα σφάλματα: {", ".join(map(str, invalid))}')
+        policy.retry_on = frozenset(retry_on)
+        return policy
+
+    def to_dict(self):
+        return {'max_attempts': self.max_attempts, 'base_delay': self.base_delay,
+                'max_delay': self.max_delay, 'deadline': self.deadline,
+                'retry_on': sorted(self.retry_on), 'idempotent': self.idempotent}
+
+    def delay(self, attempt, rng=random):
+        """Αναμονή (s) πριν την προσπάθεια attempt + 1 (full jitter)."""
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def should_retry(self, result, attempt):
+        """True αν μετά την προσπάθεια attempt (1, 2, ...) με αυτό το αποτέλεσμα γίνεται νέα."""
+        if result.ok or attempt >= self.max_attempts or result.error not in self.retry_on:
+            return False
+        # Μη idempotent: μόνο αν η εντολή σίγουρα δεν εκτελέστηκε
+        return self.idempotent or not result.sent
+
+    def __repr__(self):
+        return f'<RetryPolicy {self.to_dict()}>'
+
+
+# Χωρίς επανάληψη (π.χ. για callers που δεν δίνουν πολιτική)
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def default_policy(idempotent=False):
+    """Η default πολιτική (ρύθμιση 'retry_policy' ή οι σταθερές του module)."""
+    data = database.get_app_setting(POLICY_SETTING)
+    if data:
+        try:
+            return RetryPolicy.from_dict(data, idempotent)
+        except ValueError as e:
+            print(f'Retry: άκυρη ρύθμιση {POLICY_SETTING}: {e}')
+    return RetryPolicy(idempotent=idempotent)
+
+
+def policy_for(cmd):
+    """Η πολιτική μιας εντολής του καταλόγου (dict από το database, με retry_policy/idempotent)."""
+    idempotent = bool(cmd.get('idempotent'))
+    data = cmd.get('retry_policy')
+    if not data:
+        return default_policy(idempotent)
+    try:
+        return RetryPolicy.from_dict(json.loads(data) if isinstance(data, str) else data, idempotent)
+    except ValueError as e:
+        print(f'Retry: άκυρη πολιτική για "{cmd.get("name")}": {e}')
+        return default_policy(idempotent)
+
+
+def validate_policy(text):
+    """
+    Ελέγχει το JSON μιας πολιτικής (π.χ. από τη φόρμα της εντολής).
+    Returns: το κανονικοποιημένο JSON ή None για κενό κείμενο (= default).
+    Raises: ValueError
+    """
+    if not text or not text.strip():
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f'Μη έγκυρο JSON: {e}') from e
+    policy = RetryPolicy.from_dict(data, idempotent=False)  # Το idempotent είναι ξεχωριστό πεδίο της εντολής
+    return json.dumps({key: value for key, value in policy.to_dict().items() if key != 'idempotent'})
+
+
+def run_with_retry(run, executable, alias, conn_details, policy, sleep=time.sleep, rng=random):
+    """
+    Εκτελεί run(executable, alias, conn_details) με επαναλήψεις κατά την πολιτική.
+    sleep: η αναμονή ανάμεσα στις προσπάθειες (π.χ. CancelToken.wait, ώστε η ακύρωση να μην
+    περιμένει το backoff· η επόμενη προσπάθεια τότε επιστρέφει αμέσως CANCELLED).
+    Returns: το ExecResult της τελευταίας προσπάθειας, με τις προηγούμενες στο .retries.
+    """
+    start = time.perf_counter()
+    retries = []
+    attempt = 1
+    while True:
+        attempt_start = time.perf_counter()
+        result = run(executable, alias, conn_details)
+        if not policy.should_retry(result, attempt):
+            break
+        delay = policy.delay(attempt, rng)
+        if time.perf_counter() - start + delay > policy.deadline:
+            break
+        retries.append({'error': result.error, 'message': result.message,
+                        'ms': round((time.perf_counter() - attempt_start) * 1000, 1),
+                        'delay_ms': round(delay * 1000, 1)})
+        RETRIES.inc(alias=alias, error=result.error)
+        # Στο stderr: το stdout του CLI μένει καθαρό για --json
+        print(f'Retry: [{alias}] {result.error} ({result.message}), νέα προσπάθεια σε {delay * 1000:.0f} ms',
+              file=sys.stderr)
+        sleep(delay)
+        attempt += 1
+    if retries:
+        result.retries = retries
+        result.timings['retry'] = round((attempt_start - start) * 1000, 1)
+        RETRY_OUTCOMES.inc(alias=alias, outcome='recovered' if result.ok else 'exhausted')
+    return result
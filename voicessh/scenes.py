@@ -0,0 +1,221 @@
+# voicessh/scenes.py
+"""
+Σκηνές: πολλά βήματα (εντολή @ servers) με μία φράση, π.χ. μουσική στο media PC
+και σημειώσεις στο γραφείο, και μετά ένα script όταν πετύχουν και τα δύο.
+
+Τα βήματα σχηματίζουν γράφημα εξαρτήσεων (DAG): όσα δεν εξαρτώνται το ένα από
+το άλλο τρέχουν παράλληλα, και κάθε βήμα ξεκινά μόλις πετύχουν τα βήματα του
+'after' του. Ο συνολικός χρόνος είναι το κρίσιμο μονοπάτι, όχι το άθροισμα.
+Αν ένα βήμα αποτύχει, όσα εξαρτώνται από αυτό (άμεσα ή έμμεσα) παραλείπονται·
+τα ανεξάρτητα βήματα συνεχίζουν κανονικά.
+"""
+import queue
+import threading
+
+from voicessh import command_templates
+from voicessh import database
+from voicessh import dispatch
+from voicessh import results as exec_results
+from voicessh import retry
+from voicessh.results import ExecResult, format_label
+
+
+class SceneError(ValueError):
+    """Λάθος ορισμός σκηνής (κύκλος, άγνωστο βήμα, εντολή ή server)."""
+
+
+def _normalize_step(step):
+    """Βήμα με όλα τα πεδία· το key είναι by default το όνομα της εντολής."""
+    return {
+        'key': (step.get('key') or step['command']).strip(),
+        'command': step['command'].strip().lower(),
+        'aliases': list(step.get('aliases') or ()),
+        'after': list(step.get('after') or ()),
+    }
+
+
+def order_steps(steps):
+    """
+    Τοπολογική διάταξη των βημάτων (αλγόριθμος του Kahn).
+    Returns: τα keys, κάθε βήμα μετά από όλες τις εξαρτήσεις του.
+    Raises: SceneError για διπλό key, άγνωστη εξάρτηση ή κύκλο.
+    """
+    waiting = {}
+    for step in steps:
+        if step['key'] in waiting:
+            raise SceneError(f'Διπλό βήμα "{step["key"]}"')
+        waiting[step['key']] = set(step['after'])
+
+    dependents = {key: [] for key in waiting}
+    for key, after in waiting.items():
+        for dep in sorted(after):
+            if dep not in waiting:
+                raise SceneError(f'Το βήμα "{key}" εξαρτάται από άγνωστο βήμα "{dep}"')
+            dependents[dep].append(key)
+
+    order = []
+    ready = [key for key, after in waiting.items() if not after]
+    while ready:
+        key = ready.pop(0)
+        order.append(key)
+        for dependent in dependents[key]:
+            waiting[dependent].discard(key)
+            if not waiting[dependent]:
+                ready.append(dependent)
+
+    if len(order) != len(waiting):
+        cycle = [key for key in waiting if key not in order]
+        raise SceneError(f'Κυκλικές εξαρτήσεις στα βήματα: {", ".join(cycle)}')
+    return order
+
+
+def validate(name, steps, old_name=None):
+    """
+    Ελέγχει μια σκηνή πριν την αποθήκευση.
+    Returns: τα βήματα κανονικοποιημένα (βλ. _normalize_step).
+    Raises: SceneError με μήνυμα για τον χρήστη.
+    """
+    name = name.strip().lower()
+    if not name:
+        raise SceneError('Η σκηνή χρειάζεται όνομα')
+    snapshot = database.get_snapshot()
+    # Η φράση δεν πρέπει να "κρύβει" εντολή ή άλλη σκηνή
+    if snapshot.command_by_name(name) or snapshot.command_by_phrase(name):
+        raise SceneError(f'Υπάρχει ήδη εντολή "{name}"')
+    if name != old_name and snapshot.scene_by_name(name):
+        raise SceneError(f'Υπάρχει ήδη σκηνή "{name}"')
+
+    steps = [_normalize_step(step) for step in steps]
+    if not steps:
+        raise SceneError('Η σκηνή δεν έχει βήματα')
+    for step in steps:
+        cmd = snapshot.command_by_name(step['command'])
+        if cmd is None:
+            raise SceneError(f'Άγνωστη εντολή "{step["command"]}" στο βήμα "{step["key"]}"')
+        if command_templates.is_template(cmd['name']):
+            raise SceneError(f'Η παραμετρική εντολή "{cmd["name"]}" δεν μπορεί να είναι βήμα σκηνής')
+        for alias in step['aliases']:
+            if snapshot.connection(alias) is None:
+                raise SceneError(f'Άγνωστος server "{alias}" στο βήμα "{step["key"]}"')
+        if not step['aliases'] and not cmd['aliases']:
+            raise SceneError(f'Το βήμα "{step["key"]}" δεν έχει servers')
+    order_steps(steps)
+    return steps
+
+
+def save_scene(name, steps, old_name=None):
+    """
+    Ελέγχει και αποθηκεύει μια σκηνή.
+    steps: [{'key', 'command', 'aliases', 'after'}, ...] (key/aliases/after προαιρετικά)
+    Returns: το id της σκηνής ή None αν το όνομα υπάρχει ήδη.
+    Raises: SceneError
+    """
+    steps = validate(name, steps, old_name)
+    return database.save_scene(name, steps, old_name)
+
+
+def _step_target(snapshot, step):
+    """
+    Returns: (executable, aliases, RetryPolicy) ενός βήματος,
+    ή (None, aliases, None) αν η εντολή δεν υπάρχει πια.
+    """
+    cmd = snapshot.command_by_id(step['command_id'])
+    if cmd is None:
+        return None, list(step['aliases']), None
+    return cmd['executable'], list(step['aliases'] or cmd['aliases']), retry.policy_for(cmd)
+
+
+def step_ok(results):
+    return bool(results) and all(result.ok for result in results.values())
+
+
+def iter_scene(scene, run_step=None, use_daemon=True, cancel=None):
+    """
+    Εκτελεί τα βήματα μιας σκηνής ως γράφημα εξαρτήσεων (ένα thread ανά βήμα που τρέχει).
+    run_step(executable, aliases, policy) -> {alias: ExecResult}· default το dispatch.run_on_servers,
+    οπότε κάθε βήμα εκτελείται από το daemon αν τρέχει (use_daemon), με parallel fan-out στους servers του
+    και με την πολιτική επανάληψης (policy, βλ. retry.py) της εντολής του.
+    cancel: CancelToken (βλ. cancel.py)· τα βήματα που τρέχουν διακόπτονται και όσα δεν
+    ξεκίνησαν ακόμα δίνουν CANCELLED, οπότε τα εξαρτημένα τους παραλείπονται.
+    Yields: (βήμα, {alias: ExecResult}) με τη σειρά που ολοκληρώνονται·
+    None αντί για αποτελέσματα για βήματα που παραλείφθηκαν.
+    Raises: SceneError αν το γράφημα δεν είναι έγκυρο (πριν ξεκινήσει οτιδήποτε).
+    """
+    if run_step is None:
+        def run_step(executable, aliases, policy):
+            return dispatch.run_on_servers(executable, aliases, use_daemon, retry=policy, cancel=cancel)
+
+    order_steps(scene['steps'])
+    snapshot = database.get_snapshot()
+    steps = {step['key']: step for step in scene['steps']}
+    waiting = {key: set(step['after']) for key, step in steps.items()}
+    dependents = {key: [] for key in steps}
+    for key, step in steps.items():
+        for dep in step['after']:
+            dependents[dep].append(key)
+    done = queue.Queue()
+    skipped = set()
+
+    def execute(step):
+        executable, aliases, policy = _step_target(snapshot, step)
+        if executable is None:
+            results = {alias: ExecResult(alias).fail(exec_results.UNEXPECTED, 'Η εντολή δεν υπάρχει πια')
+                       for alias in aliases}
+        elif cancel is not None and cancel.cancelled:
+            results = {alias: ExecResult(alias).fail(exec_results.CANCELLED, cancel.reason)
+                       for alias in aliases}
+        else:
+            try:
+                results = run_step(executable, aliases, policy)
+            except Exception as e:
+                results = {alias: ExecResult(alias).fail(exec_results.UNEXPECTED, f'{type(e).__name__}: {e}')
+                           for alias in aliases}
+        done.put((step['key'], results))
+
+    def start(key):
+        threading.Thread(target=execute, args=(steps[key],), daemon=True).start()
+
+    for key, after in waiting.items():
+        if not after:
+            start(key)
+
+    for _ in steps:
+        key, results = done.get()
+        ok = results is not None and step_ok(results)
+        # Τα επόμενα βήματα ξεκινούν πριν το yield, ώστε ο caller να μην τα καθυστερεί
+        for dependent in dependents[key]:
+            if dependent in skipped:
+                continue
+            if not ok:
+                skipped.add(dependent)
+                done.put((dependent, None))
+                continue
+            waiting[dependent].discard(key)
+            if not waiting[dependent]:
+                start(dependent)
+        yield steps[key], results
+
+
+def run_scene(scene, run_step=None, use_daemon=True, cancel=None):
+    """Όπως το iter_scene, αλλά περιμένει όλα τα βήματα. Returns: [(βήμα, αποτελέσματα ή None), ...]"""
+    return list(iter_scene(scene, run_step, use_daemon, cancel))
+
+
+def format_step(step, results, header=True):
+    """Κείμενο για την οθόνη (ένα βήμα, όλοι οι servers του)· header=False χωρίς τον τίτλο του βήματος."""
+    text = f'─── Βήμα: {step["key"]} ({step["command"]}) ───\n' if header else ''
+    if results is None:
+        return text + '⏭ Παραλείφθηκε: απέτυχε προαπαιτούμενο βήμα\n'
+    for alias, result in results.items():
+        if len(results) > 1:
+            text += f'[{alias}] '
+        text += f'{format_label(result)}\n'
+    return text
+
+
+def format_scene_speech(outcomes, scene_name=''):
+    """Σύντομο μήνυμα για το TTS για όλα τα βήματα μιας σκηνής."""
+    failed = sum(1 for _, results in outcomes if results is None or not step_ok(results))
+    if not failed:
+        return f'η σκηνή {scene_name} εκτελέστηκε επιτυχώς'
+    return f'η σκηνή {scene_name}: {failed} από {len(outcomes)} βήματα δεν ολοκληρώθηκαν'
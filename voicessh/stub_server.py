@@ -0,0 +1,243 @@
+# voicessh/stub_server.py
+"""
+SSH server μέσα στη διεργασία (paramiko ServerInterface), για end-to-end δοκιμές
+του transport, του pool και του daemon χωρίς πραγματικό Windows host.
+
+    with StubSSHServer(username='user', password='pass') as stub:
+        conn = {'host': stub.host, 'port': stub.port, 'username': 'user', 'password': 'pass'}
+        run_remote('notepad.exe', 'stub', conn)
+        stub.commands  # ['psexec -i 1 -u user -p pass -d -accepteula notepad.exe']
+
+Με forwarding (direct-tcpip) ένα stub παίζει και τον ρόλο του jump host:
+οι συνδέσεις με via=<alias του stub> περνούν μέσα από αυτό.
+
+Για load tests (βλ. benchmarks/fleet.py): handshake_delay προσομοιώνει αργό
+δίκτυο/host πριν το SSH handshake και drop_rate hosts που δέχονται τη σύνδεση
+TCP αλλά δεν απαντούν ποτέ (ο client βλέπει timeout).
+
+Standalone (για χειροκίνητες δοκιμές από το CLI/daemon):
+    python -m voicessh.stub_server --port 2222
+"""
+import logging
+import random
+import socket
+import threading
+import time
+
+import paramiko
+
+# Τα transports του stub γράφουν στο δικό τους logger, ώστε οι αναμενόμενες διακοπές
+# (client που κλείνει απότομα) να μη γεμίζουν το stderr όπως το logger του paramiko
+_log = logging.getLogger('voicessh.stub_server')
+_log.addHandler(logging.NullHandler())
+_log.propagate = False
+
+# Πόσο περιμένει ο server να κλείσει ο client ένα κανάλι που ολοκληρώθηκε
+EXEC_CLOSE_TIMEOUT = 30
+
+_host_key = None
+_host_key_lock = threading.Lock()
+
+
+def _get_host_key():
+    """Ένα RSA host key ανά διεργασία (η δημιουργία του κοστίζει)."""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(2048)
+        return _host_key
+
+
+def psexec_handler(command):
+    """Default απάντηση: όπως το psexec -d, που γράφει στο stderr το PID της διεργασίας."""
+    program = command.rsplit(' ', 1)[-1]
+    return '', f'{program} started on STUB with process ID 4242.\r\n', 0
+
+
+class _Interface(paramiko.ServerInterface):
+    def __init__(self, stub):
+        self.stub = stub
+        self._destinations = {}  # chanid -> (host, port) των direct-tcpip καναλιών
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if username == self.stub.username and password == self.stub.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+        # Το ίδιο το κανάλι παραδίδεται αργότερα από το transport.accept() (βλ. _forward_loop)
+        self.stub.forwards.append(tuple(destination))
+        self._destinations[chanid] = tuple(destination)
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_exec_request(self, channel, command):
+        command = command.decode('utf-8', errors='replace')
+        self.stub.commands.append(command)
+        threading.Thread(target=self.stub._exec, args=(channel, command), daemon=True).start()
+        return True
+
+
+class StubSSHServer:
+    """
+    handler(command) -> (stdout, stderr, exit_status): η "εκτέλεση" μιας εντολής.
+    port=0: τυχαία ελεύθερη θύρα (διαβάζεται από το .port μετά το start()).
+    handshake_delay: δευτερόλεπτα αναμονής πριν το SSH handshake κάθε σύνδεσης.
+    drop_rate: πιθανότητα (0-1) μια σύνδεση να μείνει χωρίς απάντηση.
+    """
+
+    def __init__(self, username='user', password='pass', handler=psexec_handler,
+                 host='127.0.0.1', port=0, handshake_delay=0.0, drop_rate=0.0, seed=None):
+        self.username = username
+        self.password = password
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.handshake_delay = handshake_delay
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self._dropped = []     # Sockets χωρίς απάντηση (κλείνουν στο stop)
+        self.commands = []     # Οι εντολές που δέχτηκε, με τη σειρά
+        self.connections = 0   # Πόσες SSH συνδέσεις δέχτηκε
+        self.forwards = []     # Οι προορισμοί (host, port) των direct-tcpip καναλιών
+        self._sock = None
+        self._transports = []
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(128)
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._sock is not None:
+            self._sock.close()
+        for transport in self._transports:
+            transport.close()
+        for sock in self._dropped:
+            sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                client_sock, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                self._dropped.append(client_sock)
+                continue
+            if self.handshake_delay:
+                # Σε δικό της thread, ώστε η καθυστέρηση να μη σειριοποιεί τις συνδέσεις
+                threading.Thread(target=self._serve, args=(client_sock,), daemon=True).start()
+            else:
+                self._serve(client_sock)
+
+    def _serve(self, client_sock):
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        # Χωρίς Nagle: τα μικρά μηνύματα του SSH δεν περιμένουν delayed ACK
+        client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(client_sock)
+        transport.set_log_channel(_log.name)
+        transport.use_compression(True)  # Αν το ζητήσει ο client (βλ. compression ανά σύνδεση)
+        transport.add_server_key(_get_host_key())
+        self._transports.append(transport)
+        interface = _Interface(self)
+        try:
+            transport.start_server(server=interface)
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+            return
+        threading.Thread(target=self._forward_loop, args=(transport, interface),
+                         daemon=True).start()
+
+    def _forward_loop(self, transport, interface):
+        """Συνδέει κάθε direct-tcpip κανάλι του transport με ένα TCP socket προς τον προορισμό."""
+        while transport.is_active():
+            channel = transport.accept(timeout=1)
+            if channel is None:
+                continue
+            destination = interface._destinations.pop(channel.get_id(), None)
+            if destination is None:
+                continue  # Session κανάλι: το χειρίζεται το check_channel_exec_request
+            try:
+                sock = socket.create_connection(destination, timeout=10)
+            except OSError:
+                channel.close()
+                continue
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(channel, sock), daemon=True).start()
+            threading.Thread(target=self._pump, args=(sock, channel), daemon=True).start()
+
+    @staticmethod
+    def _pump(source, target):
+        try:
+            while True:
+                data = source.recv(32768)
+                if not data:
+                    break
+                target.sendall(data)
+        except (OSError, EOFError):
+            pass
+        finally:
+            source.close()
+            target.close()
+
+    def _exec(self, channel, command):
+        try:
+            stdout, stderr, exit_status = self.handler(command)
+            if stdout:
+                channel.sendall(stdout.encode('utf-8') if isinstance(stdout, str) else stdout)
+            if stderr:
+                channel.sendall_stderr(stderr.encode('utf-8') if isinstance(stderr, str) else stderr)
+            channel.send_exit_status(exit_status)
+            # Η απάντηση στο exec request στέλνεται από το thread του transport και μπορεί
+            # να φτάσει μετά από αυτά. Στέλνουμε EOF και περιμένουμε να κλείσει ο client,
+            # ώστε το κανάλι να μην κλείσει πριν ο client δει την επιβεβαίωση.
+            channel.shutdown_write()
+            channel.settimeout(EXEC_CLOSE_TIMEOUT)
+            while channel.recv(1024):
+                pass
+        except (EOFError, OSError):
+            pass  # Timeout, ή ο client έφυγε πριν πάρει την απάντηση
+        finally:
+            try:
+                channel.close()
+            except EOFError:
+                pass  # Ο client έκλεισε ήδη τη σύνδεση (π.χ. benchmark με νέα σύνδεση κάθε φορά)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stub SSH server για δοκιμές του VoiceSSH')
+    parser.add_argument('--port', type=int, default=2222)
+    parser.add_argument('--username', default='user')
+    parser.add_argument('--password', default='pass')
+    args = parser.parse_args()
+    stub = StubSSHServer(args.username, args.password, port=args.port).start()
+    print(f'Stub SSH server: {stub.host}:{stub.port} ({args.username}/{args.password})')
+    try:
+        stub._stopped.wait()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,382 @@
+# voicessh/transport.py
+"""
+Εκτέλεση εντολών σε Windows hosts μέσω SSH (Paramiko) και PsExec.
+Χωρίς εξάρτηση από το Kivy: χρησιμοποιείται από την εφαρμογή και από το CLI.
+"""
+import re
+import socket
+import threading
+import time
+
+from voicessh import cancel as cancellation
+from voicessh import database
+from voicessh import metrics
+from voicessh import results
+from voicessh.results import ExecResult
+
+# Καταλήξεις εκτελέσιμων: το path μέχρι την κατάληξη (χωρίς τα ορίσματα) μπαίνει σε
+# εισαγωγικά αν έχει κενά
+EXECUTABLE_EXTENSIONS = ('.exe', '.bat', '.cmd', '.com', '.lnk', '.ps1', '.msc')
+
+# Εντολή που ξεκινά με path (C:\... ή \\server\...)
+_PATH_RE = re.compile(r'(?:[A-Za-z]:\\|\\\\)')
+
+# Το εκτελέσιμο μιας τέτοιας εντολής: ως την πρώτη κατάληξη που ακολουθείται από κενό ή τέλος
+_EXECUTABLE_RE = re.compile(
+    _PATH_RE.pattern + r'.*?(?:' + '|'.join(re.escape(ext) for ext in EXECUTABLE_EXTENSIONS) + r')(?=\s|$)',
+    re.IGNORECASE)
+
+# Μέγεθος chunk για την ανάγνωση της εξόδου
+READ_CHUNK = 32768
+
+# Ρύθμιση (app_settings) με το profile αλγορίθμων της συσκευής, βλ. calibrate.py
+PROFILE_SETTING = 'transport_profile'
+
+# Πεδία του profile -> πεδία του paramiko.SecurityOptions
+_PROFILE_OPTIONS = (('kex', 'kex'), ('ciphers', 'ciphers'), ('macs', 'digests'))
+
+# Μέγιστο μήκος αλυσίδας jump hosts (bastion -> bastion -> host)
+MAX_VIA_DEPTH = 8
+
+# Pool για τους jump hosts όταν ο caller δεν δίνει δικό του (π.χ. τοπική εκτέλεση
+# χωρίς daemon): ένα fan-out σε πολλούς hosts πίσω από τον ίδιο bastion κάνει ένα handshake.
+# Οι αδρανείς bastions κλείνουν με το close_idle_upstream (βλ. outbox.OutboxWorker).
+_upstream_pool = None
+_upstream_pool_lock = threading.Lock()
+
+REMOTE_RUNS = metrics.counter('voicessh_remote_runs_total',
+                              'Εκτελέσεις run_remote ανά server και αποτέλεσμα (ok ή κατηγορία σφάλματος)',
+                              ('alias', 'status'))
+REMOTE_SECONDS = metrics.histogram('voicessh_remote_seconds', 'Συνολικός χρόνος του run_remote ανά server',
+                                   ('alias',))
+REMOTE_PHASE_SECONDS = metrics.histogram('voicessh_remote_phase_seconds',
+                                         'Χρόνος ανά φάση (connect, auth, exec, read) ανά server',
+                                         ('alias', 'phase'))
+
+
+class ConfigError(Exception):
+    """Λάθος ρύθμιση σύνδεσης (άγνωστος ή κυκλικός jump host)."""
+
+
+def _get_upstream_pool():
+    global _upstream_pool
+    with _upstream_pool_lock:
+        if _upstream_pool is None:
+            from voicessh.pool import ConnectionPool
+            _upstream_pool = ConnectionPool()
+        return _upstream_pool
+
+
+def close_idle_upstream():
+    """Κλείνει τους αδρανείς jump hosts του κοινού pool (βλ. pool.close_idle). Returns: πόσοι έκλεισαν."""
+    with _upstream_pool_lock:
+        pool = _upstream_pool
+    return pool.close_idle() if pool is not None else 0
+
+
+def close_upstream():
+    """Κλείνει όλους τους jump hosts του κοινού pool (π.χ. στην έξοδο της εφαρμογής)."""
+    with _upstream_pool_lock:
+        pool = _upstream_pool
+    if pool is not None:
+        pool.close_all()
+
+
+def _elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def connection_profile(conn_details):
+    """
+    Οι προτιμώμενοι αλγόριθμοι μιας σύνδεσης: πρώτα όσοι ορίστηκαν στη σύνδεση,
+    αλλιώς το profile της συσκευής. Κενή λίστα = τα defaults του paramiko.
+    Returns: {'kex': [...], 'ciphers': [...], 'macs': [...]}
+    """
+    device = database.get_app_setting(PROFILE_SETTING) or {}
+    profile = {}
+    for field, _ in _PROFILE_OPTIONS:
+        value = conn_details.get(field)
+        profile[field] = value.split(',') if value else list(device.get(field) or ())
+    return profile
+
+
+def _transport_factory(profile):
+    """transport_factory για το SSHClient.connect που εφαρμόζει τις προτιμήσεις του profile."""
+    import paramiko
+
+    def factory(sock, **kwargs):
+        transport = paramiko.Transport(sock, **kwargs)
+        options = transport.get_security_options()
+        for field, option in _PROFILE_OPTIONS:
+            # Αλγόριθμοι που δεν υποστηρίζει αυτή η έκδοση του paramiko αγνοούνται
+            supported = getattr(options, option)
+            preferred = tuple(name for name in profile[field] if name in supported)
+            if preferred:
+                setattr(options, option, preferred)
+        return transport
+    return factory
+
+
+def _connect(host, port, cancel):
+    """TCP σύνδεση (όπως το socket.create_connection) που διακόπτεται αμέσως με το cancel."""
+    if cancel is None:
+        return socket.create_connection((host, port), timeout=10)
+    error = OSError(f'Δεν βρέθηκε διεύθυνση για {host}')
+    for family, kind, proto, _, address in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM):
+        sock = socket.socket(family, kind, proto)
+        try:
+            sock.settimeout(10)
+            with cancellation.closing(cancel, sock):
+                sock.connect(address)
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+            if cancel.cancelled:
+                break
+    raise error
+
+
+def _check_via(chain, via):
+    """Ελέγχει το επόμενο βήμα via μιας αλυσίδας (chain: τα aliases ως εδώ). Raises: ConfigError"""
+    if via in chain:
+        raise ConfigError(f'Κυκλική αλυσίδα via: {" → ".join(chain + (via,))}')
+    if len(chain) > MAX_VIA_DEPTH:
+        raise ConfigError(f'Πολύ μεγάλη αλυσίδα via: {" → ".join(chain)}')
+
+
+def check_via_chain(alias, via, lookup=None):
+    """
+    Ελέγχει όλη την αλυσίδα jump hosts μιας σύνδεσης πριν αποθηκευτεί (π.χ. A → B → A),
+    με τους ίδιους ελέγχους που κάνει η σύνδεση βήμα-βήμα.
+    lookup(alias): η σύνδεση ενός jump host ή None (default: από το τρέχον config snapshot)
+    Returns: η αλυσίδα (alias, via, ...). Raises: ConfigError
+    """
+    if lookup is None:
+        lookup = database.get_snapshot().connection
+    chain = (alias,)
+    while via:
+        _check_via(chain, via)
+        bastion = lookup(via)
+        if bastion is None:
+            raise ConfigError(f'Άγνωστος jump host "{via}"')
+        chain += (via,)
+        via = bastion.get('via')
+    return chain
+
+
+def _open_socket(conn_details, pool, chain, cancel=None):
+    """
+    Το "καλώδιο" προς τον host: TCP socket, ή direct-tcpip channel μέσω του
+    (pooled) transport του jump host αν η σύνδεση έχει via. Οι αλυσίδες
+    λύνονται αναδρομικά, αφού και ο bastion ανοίγει με το open_client.
+    """
+    host, port = conn_details['host'], int(conn_details['port'])
+    via = conn_details.get('via')
+    if not via:
+        # Μικρότερα timeouts για να μην κολλάει η εφαρμογή
+        sock = _connect(host, port, cancel)
+        # Χωρίς Nagle: κάθε exec είναι μερικά μικρά μηνύματα (open, exec, eof) που
+        # αλλιώς περιμένουν το delayed ACK του server (~40 ms το καθένα)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    _check_via(chain, via)
+    bastion = database.get_snapshot().connection(via)
+    if bastion is None:
+        raise ConfigError(f'Άγνωστος jump host "{via}"')
+
+    upstream = (pool or _get_upstream_pool()).acquire(bastion, chain=chain + (via,), cancel=cancel)
+    return upstream.get_transport().open_channel(
+        'direct-tcpip', (host, port), ('127.0.0.1', 0), timeout=10)
+
+
+def open_client(conn_details, timings=None, pool=None, chain=(), cancel=None):
+    """
+    Νέα SSH σύνδεση (paramiko.SSHClient) με τα στοιχεία μιας αποθηκευμένης σύνδεσης,
+    τους αλγορίθμους του profile της και compression αν έχει ενεργοποιηθεί.
+    Αν η σύνδεση έχει via, περνάει από τον jump host (από το pool, ή από ένα κοινό
+    pool για bastions αν δεν δοθεί).
+    timings: προαιρετικό dict όπου καταγράφονται οι φάσεις 'connect' (TCP ή tunnel)
+    και 'auth' (SSH) σε ms.
+    cancel: CancelToken (βλ. cancel.py)· η ακύρωση διακόπτει αμέσως το connect ή το handshake.
+    Raises: ConfigError για άγνωστο/κυκλικό via, και τα σφάλματα δικτύου/paramiko.
+    """
+    import paramiko  # Lazy import: το CLI δεν πληρώνει το κόστος φόρτωσης αν δεν εκτελέσει τίποτα
+
+    host, port = conn_details['host'], int(conn_details['port'])
+    chain = chain or (conn_details.get('alias') or host,)
+    # Οι φάσεις χρονομετρούνται και όταν αποτυγχάνουν
+    if timings is None:
+        timings = {}
+    start = time.perf_counter()
+    try:
+        sock = _open_socket(conn_details, pool, chain, cancel)
+    finally:
+        timings['connect'] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        with cancellation.closing(cancel, sock):
+            client.connect(
+                host, port, conn_details['username'], conn_details['password'],
+                sock=sock,
+                timeout=10,        # Connection timeout
+                banner_timeout=10, # SSH banner timeout
+                compress=bool(conn_details.get('compression')),
+                transport_factory=_transport_factory(connection_profile(conn_details)),
+            )
+    except BaseException:
+        sock.close()
+        raise
+    finally:
+        timings['auth'] = _elapsed_ms(start)
+    return client
+
+
+def build_psexec_command(cmd, username, password):
+    """
+    Για GUI εφαρμογές, χρησιμοποιούμε το PsExec για να τρέξουν
+    στο interactive user session (Session 1).
+    -i 1 = interactive session 1
+    -u username -p password = τρέχει με τα δικαιώματα του συγκεκριμένου χρήστη
+    -d = don't wait for termination
+    -accepteula = αυτόματη αποδοχή EULA
+    """
+    cmd = cmd.strip()
+    # Αφαιρούμε το 'start ' αν υπάρχει
+    if cmd.lower().startswith('start '):
+        cmd = cmd[6:].strip()
+
+    # Αν η εντολή ξεκινά με path με κενά (π.χ. C:\Program Files\App.exe) και δεν
+    # έχει ήδη εισαγωγικά, τα προσθέτουμε μόνο γύρω από το εκτελέσιμο, ώστε τα ορίσματα
+    # (π.χ. από παραμετρικά templates: "C:\Program Files\x\tool.exe 30") να
+    # μείνουν ξεχωριστά· path χωρίς γνωστή κατάληξη μπαίνει ολόκληρο σε εισαγωγικά.
+    # Εντολές που δεν ξεκινούν με path ("nircmd setsysvolume 30",
+    # "cmd /c C:\my dir\run.bat") μένουν ως έχουν.
+    match = _EXECUTABLE_RE.match(cmd)
+    if match:
+        if ' ' in match.group():
+            cmd = f'"{match.group()}"{cmd[match.end():]}'
+    elif ' ' in cmd and '"' not in cmd and _PATH_RE.match(cmd):
+        cmd = f'"{cmd}"'
+
+    return f'psexec -i 1 -u {username} -p {password} -d -accepteula {cmd}'
+
+
+def _read_stream(stream):
+    """Διαβάζει όλη την έξοδο σε chunks. Returns: (preview bytes, συνολικά bytes)."""
+    preview = bytearray()
+    total = 0
+    while True:
+        chunk = stream.read(READ_CHUNK)
+        if not chunk:
+            return bytes(preview), total
+        total += len(chunk)
+        if len(preview) < results.PREVIEW_BYTES:
+            preview += chunk[:results.PREVIEW_BYTES - len(preview)]
+
+
+def run_remote(cmd, alias='Primary', conn_details=None, pool=None, cancel=None):
+    """
+    Εκτελεί εντολή σε Windows μέσω SSH (Paramiko) χρησιμοποιώντας το συγκεκριμένο alias.
+    conn_details: ήδη επιλυμένα στοιχεία σύνδεσης (από το config snapshot)·
+    αν λείπουν, διαβάζονται για το alias.
+    pool: προαιρετικό ConnectionPool (βλ. pool.py)· η σύνδεση μένει ανοιχτή για επαναχρησιμοποίηση.
+    cancel: CancelToken (βλ. cancel.py)· η ακύρωση κλείνει αμέσως ό,τι είναι ανοιχτό
+    (connect, handshake, channel) και το αποτέλεσμα είναι CANCELLED.
+    Returns: ExecResult (δεν κάνει raise για σφάλματα σύνδεσης/εκτέλεσης).
+    """
+    import paramiko
+
+    result = ExecResult(alias)
+    timings = result.timings
+
+    # Load settings for this alias
+    start = time.perf_counter()
+    if conn_details is None:
+        conn_details = database.get_ssh_connection(alias)
+    timings['resolve'] = _elapsed_ms(start)
+    if not conn_details:
+        _record_metrics(result.fail(results.NOT_CONFIGURED))
+        return result
+    if cancel is not None and cancel.cancelled:
+        _record_metrics(result.fail(results.CANCELLED, cancel.reason))
+        return result
+
+    result.host = f"{conn_details['host']}:{conn_details['port']}"
+    psexec_cmd = build_psexec_command(cmd, conn_details['username'], conn_details['password'])
+    result.command = build_psexec_command(cmd, '***', '***')
+
+    client = None
+    try:
+        if pool is not None:
+            client = pool.acquire(conn_details, timings, cancel=cancel)
+        else:
+            client = open_client(conn_details, timings, cancel=cancel)
+
+        # Μια δική μας σύνδεση κλείνει ολόκληρη στην ακύρωση· μια pooled μόνο το channel της
+        with cancellation.closing(cancel if pool is None else None, client):
+            start = time.perf_counter()
+            # Όπως το SSHClient.exec_command, σε δύο βήματα: ένα σφάλμα στο άνοιγμα του
+            # channel (π.χ. νεκρή pooled σύνδεση) σημαίνει ότι η εντολή δεν στάλθηκε
+            channel = client.get_transport().open_session(timeout=10)
+            try:
+                channel.settimeout(10)
+                channel.exec_command(psexec_cmd)
+            finally:
+                # Από εδώ και πέρα ο host μπορεί να την εκτέλεσε (βλ. ExecResult.sent)
+                timings['exec'] = _elapsed_ms(start)
+            stdout = channel.makefile('r')
+            stderr = channel.makefile_stderr('r')
+            channel.shutdown_write()
+
+            start = time.perf_counter()
+            with cancellation.closing(cancel, stdout.channel):
+                out_preview, out_bytes = _read_stream(stdout)
+                err_preview, err_bytes = _read_stream(stderr)
+                exit_status = stdout.channel.recv_exit_status()
+            timings['read'] = _elapsed_ms(start)
+
+        result.set_output(out_preview, err_preview, out_bytes, err_bytes, exit_status)
+
+    except ConfigError as config_err:
+        result.fail(results.CONFIG, str(config_err))
+    except paramiko.AuthenticationException:
+        result.fail(results.AUTH)
+    except paramiko.SSHException as ssh_err:
+        result.fail(results.SSH, str(ssh_err))
+    except (TimeoutError, socket.timeout):
+        result.fail(results.TIMEOUT)
+    except ConnectionRefusedError:
+        result.fail(results.REFUSED)
+    except OSError as os_err:
+        # Socket errors, network unreachable, etc.
+        result.fail(results.NETWORK, str(os_err))
+    except Exception as e:
+        result.fail(results.UNEXPECTED, f'{type(e).__name__}: {e}')
+
+    if cancel is not None and cancel.cancelled and result.error is not None:
+        # Το σφάλμα προκλήθηκε από την ακύρωση (κλειστό socket/channel)
+        result.fail(results.CANCELLED, cancel.reason)
+
+    if pool is None:
+        if client is not None:
+            client.close()
+    elif result.error in (results.SSH, results.TIMEOUT, results.NETWORK, results.UNEXPECTED):
+        # Μια χαλασμένη pooled σύνδεση δεν πρέπει να ξαναδοθεί
+        pool.discard(conn_details)
+    _record_metrics(result)
+    return result
+
+
+def _record_metrics(result):
+    """Μετρήσεις μιας εκτέλεσης (οι φάσεις που έγιναν· το connect λείπει όταν η σύνδεση ήταν pooled)."""
+    alias = result.alias
+    REMOTE_RUNS.inc(alias=alias, status=result.error or 'ok')
+    REMOTE_SECONDS.observe(result.total_ms / 1000, alias=alias)
+    for phase in ('connect', 'auth', 'exec', 'read'):
+        if phase in result.timings:
+            REMOTE_PHASE_SECONDS.observe(result.timings[phase] / 1000, alias=alias, phase=phase)